@@ -1,11 +1,14 @@
+import asyncio
 import os
-from typing import List
+import threading
+from typing import Dict, List
 from datetime import datetime, timezone
 
 from agents import Agent, Runner
 
 import tools
-from db import get_connection
+import context_cache
+from db import pooled_connection
 import psycopg2.extras
 
 # Use environment variable OPENAI_API_KEY by default
@@ -23,18 +26,16 @@ def get_timestamp():
 def get_recent_daily_summaries():
     """Get the most recent 5 daily summaries"""
     try:
-        conn = get_connection()
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur.execute("""
-            SELECT log_date, summary 
-            FROM daily_logs 
-            WHERE summary IS NOT NULL AND summary != '' 
-            ORDER BY log_date DESC 
-            LIMIT 5
-        """)
-        summaries = cur.fetchall()
-        conn.close()
-        return summaries
+        with pooled_connection() as conn:
+            cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cur.execute("""
+                SELECT log_date, summary 
+                FROM daily_logs 
+                WHERE summary IS NOT NULL AND summary != '' 
+                ORDER BY log_date DESC 
+                LIMIT 5
+            """)
+            return cur.fetchall()
     except Exception as e:
         print(f"Error fetching daily summaries: {e}")
         return []
@@ -42,35 +43,23 @@ def get_recent_daily_summaries():
 def get_current_prs():
     """Return current tracked personal-record data for tracked exercises."""
     try:
-        conn = get_connection()
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-        # Get tracked exercises from database instead of hardcoded list
-        cur.execute("SELECT exercise FROM tracked_exercises ORDER BY exercise")
-        tracked_rows = cur.fetchall()
-        tracked_exercises = [row['exercise'] for row in tracked_rows]
-        
-        if not tracked_exercises:
-            return {}  # No exercises being tracked
-
-        cur.execute(
-            """
-            SELECT e.name AS exercise,
-                   cs.reps_done,
-                   MAX(cs.load_done) AS max_load
-            FROM completed_sets cs
-            JOIN exercises e ON cs.exercise_id = e.id
-            WHERE e.name = ANY(%s)
-              AND cs.reps_done > 0
-              AND cs.load_done > 0
-            GROUP BY e.name, cs.reps_done
-            ORDER BY e.name, cs.reps_done
-            """,
-            (tracked_exercises,),
-        )
-
-        rows = cur.fetchall()
-        conn.close()
+        with pooled_connection() as conn:
+            cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+
+            # PR rows are maintained incrementally in exercise_rep_bests
+            cur.execute(
+                """
+                SELECT e.name AS exercise,
+                       b.reps AS reps_done,
+                       b.max_load
+                FROM tracked_exercises t
+                JOIN exercises e ON e.name = t.exercise
+                JOIN exercise_rep_bests b ON b.exercise_id = e.id
+                ORDER BY e.name, b.reps
+                """
+            )
+
+            rows = cur.fetchall()
 
         prs: dict[str, list[dict]] = {}
         for row in rows:
@@ -83,7 +72,11 @@ def get_current_prs():
         return {}
 
 def create_dynamic_context():
-    """Create dynamic context with recent summaries and PRs"""
+    """Create dynamic context with recent summaries and PRs, reusing it while data is unchanged"""
+    return context_cache.get_or_build(_build_dynamic_context)
+
+def _build_dynamic_context():
+    """Query summaries and PRs and render them into the context string"""
     context_parts = []
     
     # Add recent daily summaries
@@ -105,75 +98,147 @@ def create_dynamic_context():
     
     return "\n".join(context_parts)
 
-def create_agent() -> Agent:
-    """Return a CoachByte agent configured with available tools."""
-    
-    # Get dynamic context (recent summaries and PRs)
-    dynamic_context = create_dynamic_context()
-    
-    # Build the full instructions with context first
-    base_instructions = "You are CoachByte, a fitness tracking assistant that helps manage workout plans and logs. "
-    
+# Tool order as presented to the model; async_tools mirrors tools by name
+TOOL_NAMES = [
+    "get_today_plan",
+    "log_completed_set",
+    "complete_planned_set",
+    "new_daily_plan",
+    "update_summary",
+    "get_recent_history",
+    "get_training_analytics",
+    "set_weekly_split_day",
+    "get_weekly_split",
+    "apply_weekly_split",
+    "run_sql",
+    "arbitrary_update",
+    "set_timer",
+    "get_timer",
+]
+
+BASE_INSTRUCTIONS = "You are CoachByte, a fitness tracking assistant that helps manage workout plans and logs. "
+
+GUIDELINES = (
+    "\n\nKey capabilities:"
+    "\n- Create and modify workout plans using new_daily_plan (each set includes exercise, reps, load, rest time in seconds, and order)"
+    "\n- Log completed exercises using log_completed_set"
+    "\n- Complete planned sets using complete_planned_set (finds next set in queue, can override planned reps/load values)"
+    "\n- Track progress using get_recent_history"
+    "\n- Answer questions about trends, volume, tonnage, e1RM progression and adherence using get_training_analytics (never compute these by hand)"
+    "\n- Plan a day from the weekly split using apply_weekly_split (relative loads are resolved from estimated 1RMs)"
+    "\n- Query workout data using run_sql"
+    "\n- Update workout summaries using update_summary"
+    "\n- Make database modifications using arbitrary_update"
+    "\n- Set workout timers using set_timer (specify duration in minutes)"
+    "\n- Check timer status using get_timer"
+    "\n\nImportant workflow guidelines:"
+    "\n- When a user says they 'completed a set', 'finished a set', 'did a set', or similar, ALWAYS use complete_planned_set (NOT log_completed_set)"
+    "\n- complete_planned_set finds the next planned set in the queue and completes it properly"
+    "\n- NEVER use log_completed_set when completing planned sets - it bypasses the queue system"
+    "\n- Only use log_completed_set for unplanned/extra sets that weren't in the original plan"
+    "\n- The complete_planned_set tool will automatically find the next planned set and handle cases where none exist"
+    "\n- Do NOT check for planned sets manually when the user indicates they completed one - let the tool handle it"
+    "\n- If complete_planned_set says no sets are available, then offer to create a new plan"
+    "\n\nMemory and Context:"
+    "\n- You have access to previous conversation history. Use this to remember user preferences, names, and context."
+    "\n- If someone tells you their name, remember it and use it in future responses."
+    "\n- Maintain conversation continuity - reference previous topics and responses when relevant."
+    "\n- If asked about previous conversations, refer to the context provided."
+    "\n\nImportant notes:"
+    "\n- User messages include timestamps in format [YYYY-MM-DD HH:MM:SS]. Always acknowledge when you can see these timestamps."
+    "\n- Maintain conversation context - if asked a follow-up question, refer back to previous responses in the conversation."
+    "\n- For workout analysis, use data from tools to provide specific, data-driven insights."
+    "\n- Be encouraging and supportive about fitness progress."
+    "\n- Always use tools when they can help answer questions or complete tasks."
+    "\n- Be conversational and friendly, using names when you know them."
+)
+
+async def dynamic_instructions(run_context, agent: Agent) -> str:
+    """Render instructions at run time so the cached summaries/PRs stay current"""
+    # A cache miss queries Postgres, so keep it off the event loop
+    dynamic_context = await asyncio.to_thread(create_dynamic_context)
     if dynamic_context:
-        full_instructions = dynamic_context + "\n" + base_instructions
-    else:
-        full_instructions = base_instructions
-    
-    return Agent(
-        name="CoachByte",
-        instructions=(
-            full_instructions +
-            "\n\nKey capabilities:"
-            "\n- Create and modify workout plans using new_daily_plan (each set includes exercise, reps, load, rest time in seconds, and order)"
-            "\n- Log completed exercises using log_completed_set"
-            "\n- Complete planned sets using complete_planned_set (finds next set in queue, can override planned reps/load values)"
-            "\n- Track progress using get_recent_history"
-            "\n- Query workout data using run_sql"
-            "\n- Update workout summaries using update_summary"
-            "\n- Make database modifications using arbitrary_update"
-            "\n- Set workout timers using set_timer (specify duration in minutes)"
-            "\n- Check timer status using get_timer"
-            "\n\nImportant workflow guidelines:"
-            "\n- When a user says they 'completed a set', 'finished a set', 'did a set', or similar, ALWAYS use complete_planned_set (NOT log_completed_set)"
-            "\n- complete_planned_set finds the next planned set in the queue and completes it properly"
-            "\n- NEVER use log_completed_set when completing planned sets - it bypasses the queue system"
-            "\n- Only use log_completed_set for unplanned/extra sets that weren't in the original plan"
-            "\n- The complete_planned_set tool will automatically find the next planned set and handle cases where none exist"
-            "\n- Do NOT check for planned sets manually when the user indicates they completed one - let the tool handle it"
-            "\n- If complete_planned_set says no sets are available, then offer to create a new plan"
-            "\n\nMemory and Context:"
-            "\n- You have access to previous conversation history. Use this to remember user preferences, names, and context."
-            "\n- If someone tells you their name, remember it and use it in future responses."
-            "\n- Maintain conversation continuity - reference previous topics and responses when relevant."
-            "\n- If asked about previous conversations, refer to the context provided."
-            "\n\nImportant notes:"
-            "\n- User messages include timestamps in format [YYYY-MM-DD HH:MM:SS]. Always acknowledge when you can see these timestamps."
-            "\n- Maintain conversation context - if asked a follow-up question, refer back to previous responses in the conversation."
-            "\n- For workout analysis, use data from tools to provide specific, data-driven insights."
-            "\n- Be encouraging and supportive about fitness progress."
-            "\n- Always use tools when they can help answer questions or complete tasks."
-            "\n- Be conversational and friendly, using names when you know them."
-        ),
-        tools=[
-            tools.get_today_plan,
-            tools.log_completed_set,
-            tools.complete_planned_set,
-            tools.new_daily_plan,
-            tools.update_summary,
-            tools.get_recent_history,
-            tools.set_weekly_split_day,
-            tools.get_weekly_split,
-            tools.run_sql,
-            tools.arbitrary_update,
-            tools.set_timer,
-            tools.get_timer,
-        ],
-        model=MODEL,
-    )
+        return dynamic_context + "\n" + BASE_INSTRUCTIONS + GUIDELINES
+    return BASE_INSTRUCTIONS + GUIDELINES
+
+_agents: Dict[bool, Agent] = {}
+_agents_lock = threading.Lock()
+
+def create_agent(async_tools: bool = False) -> Agent:
+    """Return the process-wide CoachByte agent, building it on first use.
+
+    The agent holds no per-turn state: instructions are rendered by
+    dynamic_instructions on each run, so one instance serves every message.
+    With async_tools=True the agent uses the asyncio-native tools backed by the
+    async connection pool; use it only with run_agent_async.
+    """
+    agent = _agents.get(async_tools)
+    if agent is not None:
+        return agent
+    with _agents_lock:
+        if async_tools not in _agents:
+            if async_tools:
+                import async_tools as tool_module
+            else:
+                tool_module = tools
+            _agents[async_tools] = Agent(
+                name="CoachByte",
+                instructions=dynamic_instructions,
+                tools=[getattr(tool_module, name) for name in TOOL_NAMES],
+                model=MODEL,
+            )
+        return _agents[async_tools]
 
 def run_agent(agent: Agent, user_input: str):
-    """Run agent with automatic timestamp inclusion"""
+    """Run agent with automatic timestamp inclusion (blocking shim over the async runner)"""
     timestamped_message = f"{get_timestamp()} {user_input}"
     return Runner.run_sync(agent, timestamped_message)
 
+async def run_agent_async(agent: Agent, user_input: str):
+    """Run agent on the current event loop with automatic timestamp inclusion"""
+    timestamped_message = f"{get_timestamp()} {user_input}"
+    return await Runner.run(agent, timestamped_message)
+
+# Short progress labels shown while a tool runs
+TOOL_PROGRESS = {
+    "get_today_plan": "checking today's plan…",
+    "log_completed_set": "logging set…",
+    "complete_planned_set": "completing set…",
+    "new_daily_plan": "writing today's plan…",
+    "update_summary": "updating summary…",
+    "get_recent_history": "reading recent history…",
+    "get_training_analytics": "crunching training stats…",
+    "set_weekly_split_day": "updating split…",
+    "get_weekly_split": "reading split…",
+    "apply_weekly_split": "planning from split…",
+    "run_sql": "querying database…",
+    "arbitrary_update": "updating database…",
+    "set_timer": "setting timer…",
+    "get_timer": "checking timer…",
+}
+
+async def stream_agent(agent: Agent, user_input: str):
+    """Run agent in streaming mode, yielding event dicts as they happen.
+
+    Yields {"type": "delta", "text"} for output text, {"type": "tool", "name",
+    "status"} when a tool starts and finishes, and finally {"type": "final",
+    "text"} with the complete reply.
+    """
+    timestamped_message = f"{get_timestamp()} {user_input}"
+    result = Runner.run_streamed(agent, timestamped_message)
+    pending_tools = []
+    async for event in result.stream_events():
+        if event.type == "raw_response_event":
+            if getattr(event.data, "type", None) == "response.output_text.delta":
+                yield {"type": "delta", "text": event.data.delta}
+        elif event.type == "run_item_stream_event":
+            if event.name == "tool_called":
+                name = getattr(event.item.raw_item, "name", "tool")
+                pending_tools.append(name)
+                yield {"type": "tool", "name": name, "status": TOOL_PROGRESS.get(name, f"running {name}…")}
+            elif event.name == "tool_output":
+                name = pending_tools.pop(0) if pending_tools else "tool"
+                yield {"type": "tool", "name": name, "status": "done"}
+    yield {"type": "final", "text": result.final_output or ""}
+
 
@@ -0,0 +1,191 @@
+"""Resident Python service for the CoachByte agent.
+
+Loads the agent, tools and database pool once and serves chat, chat-memory,
+timer, complete-next-set and apply-split requests over local HTTP so `server.js` can proxy
+to it instead of spawning a Python process per request.
+
+Run with:
+    python agent_service.py
+"""
+
+import json
+import os
+import threading
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Header
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+import context_cache
+import conversation_context
+import intent_router
+import prepared_statements
+import read_cache
+from agent import create_agent
+from async_db import close_async_pool
+from button_presses import PressCoalescer
+from chat_agent import handle_chat_async, stream_chat
+from db import DEFAULT_CONVERSATION, apply_migrations, clear_chat_memory, close_pool, maintain_partitions
+from timer_temp import get_timer_temp, set_timer_temp
+from workout_ops import apply_weekly_split, complete_planned_set, warm_exercise_cache
+
+HOST = os.environ.get("AGENT_SERVICE_HOST", "127.0.0.1")
+PORT = int(os.environ.get("AGENT_SERVICE_PORT", "8765"))
+# How often to make sure next months' completed_sets partitions exist
+PARTITION_MAINTENANCE_SECONDS = 24 * 60 * 60
+
+app = FastAPI(title="CoachByte agent service")
+
+
+class ChatRequest(BaseModel):
+    message: str
+    conversation_id: str = DEFAULT_CONVERSATION
+
+
+class TimerRequest(BaseModel):
+    seconds: int
+
+
+class ApplySplitRequest(BaseModel):
+    date: Optional[str] = None  # YYYY-MM-DD; defaults to today
+
+
+class CompleteSetRequest(BaseModel):
+    device_id: Optional[str] = None
+    idempotency_key: Optional[str] = None
+    exercise: Optional[str] = None
+
+
+# Button presses are debounced per device and completed in order
+presses = PressCoalescer(complete_planned_set)
+_stop_maintenance = threading.Event()
+
+
+def _partition_maintenance():
+    while not _stop_maintenance.wait(PARTITION_MAINTENANCE_SECONDS):
+        try:
+            maintain_partitions()
+        except Exception as e:
+            print(f"Partition maintenance failed: {e}")
+
+
+@app.on_event("startup")
+def startup():
+    # Build the shared agent (and its tool schemas) before the first message
+    create_agent(async_tools=True)
+    try:
+        # One version check when the schema is already current
+        apply_migrations()
+        maintain_partitions()
+        warm_exercise_cache()
+    except Exception as e:
+        print(f"Database startup checks failed: {e}")
+    threading.Thread(target=_partition_maintenance, name="partition-maintenance", daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    _stop_maintenance.set()
+    presses.shutdown()
+    await close_async_pool()
+    close_pool()
+
+
+@app.get("/health")
+def health():
+    return {"ok": True}
+
+
+@app.get("/stats")
+def stats():
+    return {
+        "context_cache": context_cache.stats(),
+        "intent_router": intent_router.stats(),
+        "read_cache": read_cache.stats(),
+        "prepared_statements": prepared_statements.stats(),
+        "button_presses": dict(presses.stats),
+    }
+
+
+@app.post("/chat")
+async def chat(req: ChatRequest):
+    # Runs on the event loop so one worker can serve many chats while they wait on the LLM
+    if not req.message:
+        return JSONResponse(status_code=400, content={"error": "Message is required"})
+    return {"response": await handle_chat_async(req.message, req.conversation_id)}
+
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest):
+    """Server-sent events: delta, tool and final events, then an error event if the turn fails."""
+    if not req.message:
+        return JSONResponse(status_code=400, content={"error": "Message is required"})
+
+    async def events():
+        try:
+            async for event in stream_chat(req.message, req.conversation_id):
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            print(f"Error streaming chat: {e}")
+            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.delete("/chat/memory")
+def clear_memory(conversation_id: Optional[str] = None):
+    clear_chat_memory(conversation_id)
+    conversation_context.clear(conversation_id)
+    return {"success": True, "message": "Chat memory cleared"}
+
+
+@app.get("/timer")
+def get_timer():
+    return get_timer_temp()
+
+
+@app.post("/timer")
+def set_timer(req: TimerRequest):
+    try:
+        return {"message": set_timer_temp(req.seconds, "seconds")}
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+
+@app.post("/complete-next-set")
+def complete_next_set(
+    req: Optional[CompleteSetRequest] = None,
+    exercise: Optional[str] = None,
+    idempotency_key: Optional[str] = Header(None),
+):
+    req = req or CompleteSetRequest()
+    try:
+        message, coalesced = presses.press(
+            device_id=req.device_id,
+            idempotency_key=req.idempotency_key or idempotency_key,
+            exercise=req.exercise or exercise,
+        )
+        return {"message": message, "coalesced": coalesced}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.post("/apply-split")
+def apply_split(req: Optional[ApplySplitRequest] = None):
+    req = req or ApplySplitRequest()
+    try:
+        return {"message": apply_weekly_split(req.date)}
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host=HOST, port=PORT)
@@ -0,0 +1,208 @@
+"""Training analytics computed in bulk with NumPy.
+
+Completed sets for the requested window are read in one query into arrays
+and aggregated on (exercise, day) grids: sets, reps (volume), tonnage
+(reps x load) and best estimated 1RM, then rolled up by day or week. The
+result is a few compact column/row tables, small enough to hand straight
+to the model.
+
+Months already summarized into completed_sets_archive are included from
+their per-day rows (set count, best load, volume), so long windows still
+count them; their e1RM comes from the best load at each rep count.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from db import current_log_date, pooled_connection
+from workout_ops import normalize_exercise_name
+
+MAX_ANALYTICS_DAYS = 3660
+# Trailing window of the rolling tonnage average, in periods
+ROLLING_PERIODS = {"day": 7, "week": 4}
+
+# Same key as workout_ops.normalize_exercise_name / EXERCISE_LOOKUP_SQL
+EXERCISE_KEY_SQL = "lower(regexp_replace(btrim(e.name), '\\s+', ' ', 'g'))"
+
+# (log_date, exercise, reps, load, sets, tonnage, planned sets); live rows are
+# single sets, planned if complete_planned_set recorded them or they still link
+# to their plan. completed_at bound (with a day of slack, as in
+# get_recent_history) prunes partitions
+COMPLETED_SETS_SQL = f"""
+    SELECT dl.log_date, e.name, cs.reps_done, COALESCE(cs.load_done, 0),
+           1, cs.reps_done * COALESCE(cs.load_done, 0),
+           (cs.planned OR cs.planned_set_id IS NOT NULL)::int
+    FROM completed_sets cs
+    JOIN daily_logs dl ON cs.log_id = dl.id
+    JOIN exercises e ON cs.exercise_id = e.id
+    WHERE cs.completed_at >= %s AND dl.log_date BETWEEN %s AND %s
+      AND cs.reps_done > 0
+      AND (%s::text IS NULL OR {EXERCISE_KEY_SQL} = %s)
+    UNION ALL
+    SELECT a.log_date, e.name, a.reps, a.max_load, a.sets, a.total_volume, a.planned_sets
+    FROM completed_sets_archive a
+    JOIN exercises e ON a.exercise_id = e.id
+    WHERE a.log_date BETWEEN %s AND %s
+      AND (%s::text IS NULL OR {EXERCISE_KEY_SQL} = %s)
+"""
+
+# Planned sets not completed yet (a kept plan row linked from a completion is done)
+REMAINING_PLANNED_SQL = f"""
+    SELECT dl.log_date, COUNT(*)
+    FROM planned_sets ps
+    JOIN daily_logs dl ON ps.log_id = dl.id
+    JOIN exercises e ON ps.exercise_id = e.id
+    WHERE dl.log_date BETWEEN %s AND %s
+      AND (%s::text IS NULL OR {EXERCISE_KEY_SQL} = %s)
+      AND NOT EXISTS (SELECT 1 FROM completed_sets cs WHERE cs.planned_set_id = ps.id)
+    GROUP BY dl.log_date
+"""
+
+EXERCISE_COLUMNS = ["exercise", "sessions", "sets", "reps", "tonnage", "best_e1rm", "first_e1rm", "last_e1rm"]
+PERIOD_COLUMNS = ["period_start", "exercise", "sets", "reps", "tonnage", "best_e1rm", "rolling_tonnage"]
+ADHERENCE_COLUMNS = ["date", "planned_done", "planned", "adherence_pct"]
+
+
+def estimate_1rm(reps, load):
+    """Epley estimate, as in db.js applySplitIfEmpty: a single is its own 1RM."""
+    reps = np.asarray(reps, dtype=np.float64)
+    load = np.asarray(load, dtype=np.float64)
+    return np.where(reps == 1, load, load * (1 + reps / 30))
+
+
+def _load_window(start: date, end: date, exercise: Optional[str]):
+    completed_after = datetime.combine(start - timedelta(days=1), datetime.min.time())
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(COMPLETED_SETS_SQL, (completed_after, start, end, exercise, exercise, start, end, exercise, exercise))
+        sets = cur.fetchall()
+        cur.execute(REMAINING_PLANNED_SQL, (start, end, exercise, exercise))
+        remaining = cur.fetchall()
+    return sets, remaining
+
+
+def _table(columns: List[str], rows) -> Dict[str, Any]:
+    return {"columns": columns, "rows": rows}
+
+
+def _round(values):
+    return np.round(values, 1).tolist()
+
+
+def _rolling_mean(grid: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean along axis 1, over however many periods exist so far."""
+    n = grid.shape[1]
+    cumulative = np.concatenate([np.zeros((grid.shape[0], 1)), np.cumsum(grid, axis=1)], axis=1)
+    idx = np.arange(n)
+    lo = np.maximum(idx + 1 - window, 0)
+    return (cumulative[:, idx + 1] - cumulative[:, lo]) / (idx + 1 - lo)
+
+
+def training_analytics(days: int = 28, exercise: Optional[str] = None, period: str = "week") -> Dict[str, Any]:
+    """Volume, tonnage, e1RM progression and adherence for the last `days` days."""
+    if period not in ROLLING_PERIODS:
+        raise ValueError("period must be 'day' or 'week'")
+    if not (1 <= days <= MAX_ANALYTICS_DAYS):
+        raise ValueError("days out of range")
+    end = current_log_date()
+    start = end - timedelta(days=days - 1)
+    key = normalize_exercise_name(exercise) if exercise else None
+    rows, remaining = _load_window(start, end, key)
+
+    result: Dict[str, Any] = {
+        "window": {"start": start.isoformat(), "end": end.isoformat(), "days": days, "period": period},
+        "exercises": _table(EXERCISE_COLUMNS, []),
+        "periods": _table(PERIOD_COLUMNS, []),
+        "adherence": _table(ADHERENCE_COLUMNS, []),
+    }
+
+    planned_done_per_day = np.zeros(days, dtype=np.int64)
+    if rows:
+        log_dates, names, reps, loads, set_counts, tonnage, planned_counts = zip(*rows)
+        day = np.fromiter(((d - start).days for d in log_dates), dtype=np.intp, count=len(rows))
+        exercises, ex = np.unique(np.array(names), return_inverse=True)
+        reps = np.asarray(reps, dtype=np.float64)
+        loads = np.asarray(loads, dtype=np.float64)
+        set_counts = np.asarray(set_counts, dtype=np.float64)
+        tonnage = np.asarray(tonnage, dtype=np.float64)
+
+        # (exercise, day) grids
+        n_ex = len(exercises)
+        cell = ex * days + day
+        size = n_ex * days
+        sets_grid = np.bincount(cell, weights=set_counts, minlength=size).astype(np.int64).reshape(n_ex, days)
+        reps_grid = np.bincount(cell, weights=reps * set_counts, minlength=size).reshape(n_ex, days)
+        tonnage_grid = np.bincount(cell, weights=tonnage, minlength=size).reshape(n_ex, days)
+        e1rm_grid = np.zeros(size)
+        np.maximum.at(e1rm_grid, cell, estimate_1rm(reps, loads))
+        e1rm_grid = e1rm_grid.reshape(n_ex, days)
+        planned_done_per_day = np.bincount(day, weights=planned_counts, minlength=days).astype(np.int64)
+
+        # Per-exercise totals and e1RM at the first and last session in the window
+        trained = sets_grid > 0
+        first = trained.argmax(axis=1)
+        last = days - 1 - trained[:, ::-1].argmax(axis=1)
+        rows_idx = np.arange(n_ex)
+        result["exercises"]["rows"] = [
+            list(row) for row in zip(
+                exercises.tolist(),
+                trained.sum(axis=1).tolist(),
+                sets_grid.sum(axis=1).tolist(),
+                reps_grid.sum(axis=1).astype(np.int64).tolist(),
+                _round(tonnage_grid.sum(axis=1)),
+                _round(e1rm_grid.max(axis=1)),
+                _round(e1rm_grid[rows_idx, first]),
+                _round(e1rm_grid[rows_idx, last]),
+            )
+        ]
+
+        # Roll days up into periods (weeks start on Monday)
+        if period == "week":
+            offset = start.weekday()
+            period_of_day = (np.arange(days) + offset) // 7
+            bounds = np.flatnonzero(np.diff(period_of_day, prepend=-1))
+            sets_p = np.add.reduceat(sets_grid, bounds, axis=1)
+            reps_p = np.add.reduceat(reps_grid, bounds, axis=1)
+            tonnage_p = np.add.reduceat(tonnage_grid, bounds, axis=1)
+            e1rm_p = np.maximum.reduceat(e1rm_grid, bounds, axis=1)
+            first_monday = start - timedelta(days=offset)
+            period_starts = [first_monday + timedelta(weeks=i) for i in range(len(bounds))]
+        else:
+            sets_p, reps_p, tonnage_p, e1rm_p = sets_grid, reps_grid, tonnage_grid, e1rm_grid
+            period_starts = [start + timedelta(days=i) for i in range(days)]
+        rolling = _rolling_mean(tonnage_p, ROLLING_PERIODS[period])
+
+        p_idx, e_idx = np.nonzero(sets_p.T)
+        result["periods"]["rows"] = [
+            list(row) for row in zip(
+                [period_starts[i].isoformat() for i in p_idx.tolist()],
+                exercises[e_idx].tolist(),
+                sets_p[e_idx, p_idx].tolist(),
+                reps_p[e_idx, p_idx].astype(np.int64).tolist(),
+                _round(tonnage_p[e_idx, p_idx]),
+                _round(e1rm_p[e_idx, p_idx]),
+                _round(rolling[e_idx, p_idx]),
+            )
+        ]
+
+    # Adherence: share of each day's planned sets that were completed; unplanned
+    # extras (log_completed_set) count towards volume but not here
+    remaining_per_day = np.zeros(days, dtype=np.int64)
+    if remaining:
+        remaining_days = np.array([(d - start).days for d, _ in remaining], dtype=np.intp)
+        remaining_per_day[remaining_days] = [count for _, count in remaining]
+    planned_per_day = planned_done_per_day + remaining_per_day
+    active = np.flatnonzero(planned_per_day)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = 100 * planned_done_per_day / planned_per_day
+    result["adherence"]["rows"] = [
+        [(start + timedelta(days=int(i))).isoformat(), int(planned_done_per_day[i]), int(planned_per_day[i]), round(float(pct[i]), 1)]
+        for i in active
+    ]
+    total_planned = int(planned_per_day.sum())
+    result["window"]["adherence_pct"] = (
+        round(100 * int(planned_done_per_day.sum()) / total_planned, 1) if total_planned else None
+    )
+    return result
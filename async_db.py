@@ -0,0 +1,89 @@
+"""Async PostgreSQL access for the asyncio agent path.
+
+Uses a psycopg 3 ``AsyncConnectionPool`` sized from ``db_config`` so one
+event loop can serve many concurrent chats. SQL is shared with the sync
+psycopg2 helpers: both drivers use ``%s`` placeholders.
+"""
+
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from db import (
+    TODAY_LOG_SELECT_SQL,
+    TODAY_LOG_UPSERT_SQL,
+    cached_log_id,
+    current_log_date,
+    remember_log_id,
+)
+from db_config import get_db_config
+
+_pool = None
+_pool_lock = asyncio.Lock()
+
+
+async def _get_pool() -> AsyncConnectionPool:
+    """Open the pool on first use, inside the running event loop."""
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                config = get_db_config()
+                conninfo = (
+                    f"host={config['host']} port={config['port']} dbname={config['database']} "
+                    f"user={config['user']} password={config['password']}"
+                )
+                pool = AsyncConnectionPool(
+                    conninfo,
+                    min_size=int(config["pool_min_size"]),
+                    max_size=int(config["pool_max_size"]),
+                    max_idle=float(config["pool_max_idle"]),
+                    check=AsyncConnectionPool.check_connection,
+                    kwargs={"row_factory": dict_row},
+                    open=False,
+                )
+                await pool.open()
+                _pool = pool
+    return _pool
+
+
+@asynccontextmanager
+async def async_pooled_connection():
+    """Borrow an async connection; the transaction commits on success and rolls back on error."""
+    pool = await _get_pool()
+    async with pool.connection() as conn:
+        yield conn
+
+
+async def close_async_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+async def get_today_log_id_async(conn, create: bool = True):
+    """Async counterpart of db.get_today_log_id sharing its per-date cache.
+
+    Only ids of rows that already existed are cached here; a freshly inserted
+    row is picked up on the next call, once the caller has committed it.
+    """
+    today = current_log_date()
+    log_id = cached_log_id(today)
+    if log_id is not None:
+        return log_id
+    if create:
+        cur = await conn.execute(TODAY_LOG_UPSERT_SQL, (str(uuid.uuid4()), today))
+        row = await cur.fetchone()
+        if not row["inserted"]:
+            remember_log_id(today, row["id"])
+        return row["id"]
+    cur = await conn.execute(TODAY_LOG_SELECT_SQL, (today,))
+    row = await cur.fetchone()
+    if row is None:
+        return None
+    remember_log_id(today, row["id"])
+    return row["id"]
@@ -0,0 +1,205 @@
+"""Async versions of the agent tools for the asyncio execution path.
+
+Each tool reuses the description (and therefore the schema) of its sync
+counterpart in tools.py, so the model sees the same toolset. The per-turn
+workout tools run on the async Postgres pool; the bulk and free-form SQL
+tools run their sync implementation in a worker thread so they never block
+the event loop.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import psycopg.errors
+from agents import function_tool
+
+import tools
+import workout_ops
+from async_db import async_pooled_connection, get_today_log_id_async
+from context_cache import bump_data_version
+from read_cache import read_through
+from timer_engine import DEFAULT_TIMER
+
+
+async def _get_exercise_id_async(conn, name: str) -> int:
+    key = workout_ops.normalize_exercise_name(name)
+    ex_id = workout_ops.exercise_cache.get(key)
+    if ex_id is None:
+        cur = await conn.execute(workout_ops.EXERCISE_LOOKUP_SQL, ([key],))
+        row = await cur.fetchone()
+        if row is None:
+            cur = await conn.execute(workout_ops.EXERCISE_UPSERT_SQL, ([" ".join(name.split())],))
+            row = await cur.fetchone()
+        ex_id = row["id"]
+        workout_ops.exercise_cache.put(key, ex_id)
+    return ex_id
+
+
+@function_tool(strict_mode=False, description_override=tools.new_daily_plan.description)
+async def new_daily_plan(items: List[Dict[str, Any]]):
+    return await asyncio.to_thread(workout_ops.new_daily_plan, items)
+
+
+@function_tool(strict_mode=False, description_override=tools.get_today_plan.description)
+async def get_today_plan() -> List[Dict[str, Any]]:
+    return await _get_today_plan()
+
+
+@read_through("get_today_plan")
+async def _get_today_plan() -> List[Dict[str, Any]]:
+    async with async_pooled_connection() as conn:
+        log_id = await get_today_log_id_async(conn, create=False)
+        if log_id is None:
+            return []
+        cur = await conn.execute(workout_ops.TODAY_PLAN_SQL, (log_id,))
+        return await cur.fetchall()
+
+
+@function_tool(strict_mode=False, description_override=tools.log_completed_set.description)
+async def log_completed_set(exercise: str, reps: int, load: float):
+    workout_ops.validate_set_values(reps, load)
+    try:
+        return await _log_completed_set(exercise, reps, load)
+    except psycopg.errors.ForeignKeyViolation:
+        # A cached id went stale, as in workout_ops.retry_on_stale_ids
+        workout_ops.invalidate_exercise_cache()
+        workout_ops.invalidate_today_log_cache()
+        return await _log_completed_set(exercise, reps, load)
+
+
+async def _log_completed_set(exercise: str, reps: int, load: float) -> str:
+    async with async_pooled_connection() as conn:
+        log_id = await get_today_log_id_async(conn)
+        exercise_id = await _get_exercise_id_async(conn, exercise)
+        await conn.execute(
+            workout_ops.INSERT_EXTRA_COMPLETION_SQL,
+            (log_id, exercise_id, reps, load, datetime.now(timezone.utc)),
+        )
+        await conn.commit()
+    bump_data_version()
+    return "logged"
+
+
+async def _complete_planned_set(exercise: Optional[str] = None, reps: Optional[int] = None, load: Optional[float] = None) -> str:
+    """Async counterpart of workout_ops.complete_planned_set"""
+    workout_ops.validate_overrides(reps, load)
+    async with async_pooled_connection() as conn:
+        log_id = await get_today_log_id_async(conn, create=False)
+        if log_id is None:
+            return "No planned sets remaining for today"
+        cur = await conn.execute(
+            workout_ops.COMPLETE_NEXT_SET_SQL, workout_ops.complete_next_set_params(log_id, exercise, reps, load)
+        )
+        planned_set = await cur.fetchone()
+        if not planned_set:
+            if exercise:
+                return f"No planned sets found for exercise: {exercise}"
+            return "No planned sets remaining for today"
+        await conn.commit()
+
+    actual_reps = planned_set['reps_done']
+    actual_load = planned_set['load_done']
+    # Starts the rest timer, which writes the timer file
+    return await asyncio.to_thread(workout_ops.finish_completion, planned_set, actual_reps, actual_load, reps, load)
+
+
+@function_tool(strict_mode=False, description_override=tools.complete_planned_set.description)
+async def complete_planned_set(exercise: Optional[str] = None, reps: Optional[int] = None, load: Optional[float] = None):
+    return await _complete_planned_set(exercise, reps, load)
+
+
+@function_tool(strict_mode=False, description_override=tools.update_summary.description)
+async def update_summary(text: str):
+    async with async_pooled_connection() as conn:
+        log_id = await get_today_log_id_async(conn)
+        await conn.execute(workout_ops.UPDATE_SUMMARY_SQL, (text, log_id))
+        await conn.commit()
+    bump_data_version()
+    return "summary updated"
+
+
+@function_tool(strict_mode=False, description_override=tools.get_recent_history.description)
+async def get_recent_history(days: int) -> List[Dict[str, Any]]:
+    return await _get_recent_history(days)
+
+
+@read_through("get_recent_history")
+async def _get_recent_history(days: int) -> List[Dict[str, Any]]:
+    async with async_pooled_connection() as conn:
+        cur = await conn.execute(workout_ops.RECENT_HISTORY_SQL, workout_ops.recent_history_params(days))
+        return await cur.fetchall()
+
+
+@function_tool(strict_mode=False, description_override=tools.get_training_analytics.description)
+async def get_training_analytics(days: int = 28, exercise: Optional[str] = None, period: str = "week") -> Dict[str, Any]:
+    import analytics
+
+    return await asyncio.to_thread(analytics.training_analytics, days, exercise, period)
+
+
+@function_tool(strict_mode=False, description_override=tools.set_weekly_split_day.description)
+async def set_weekly_split_day(day: str, items: List[Dict[str, Any]]):
+    return await asyncio.to_thread(workout_ops.set_weekly_split_day, day, items)
+
+
+@function_tool(strict_mode=False, description_override=tools.get_weekly_split.description)
+async def get_weekly_split(day: Optional[str] = None) -> List[Dict[str, Any]]:
+    return await _get_weekly_split(day)
+
+
+@read_through("get_weekly_split")
+async def _get_weekly_split(day: Optional[str] = None) -> List[Dict[str, Any]]:
+    async with async_pooled_connection() as conn:
+        if day is None:
+            cur = await conn.execute(workout_ops.WEEKLY_SPLIT_ALL_SQL)
+        else:
+            key = day.lower()
+            if key not in workout_ops.DAY_MAP:
+                raise ValueError("invalid day")
+            cur = await conn.execute(workout_ops.WEEKLY_SPLIT_DAY_SQL, (workout_ops.DAY_MAP[key],))
+        return await cur.fetchall()
+
+
+@function_tool(strict_mode=False, description_override=tools.apply_weekly_split.description)
+async def apply_weekly_split(log_date: Optional[str] = None):
+    return await asyncio.to_thread(workout_ops.apply_weekly_split, log_date)
+
+
+@function_tool(strict_mode=False, description_override=tools.run_sql.description)
+async def run_sql(query: str, params: Optional[Dict[str, Any]] = None, confirm: bool = False, summary: bool = False):
+    return await asyncio.to_thread(workout_ops.execute_sql, query, params, confirm, summary)
+
+
+@function_tool(strict_mode=False, description_override=tools.arbitrary_update.description)
+async def arbitrary_update(query: str, params: Optional[Dict[str, Any]] = None):
+    return await asyncio.to_thread(workout_ops.execute_sql, query, params or {}, True)
+
+
+@function_tool(strict_mode=False, description_override=tools.set_timer.description)
+async def set_timer(minutes: int, name: str = DEFAULT_TIMER, interval_seconds: Optional[int] = None):
+    # The timer engine reads and replaces a JSON file under a file lock
+    return await asyncio.to_thread(workout_ops.set_timer, minutes, name, interval_seconds)
+
+
+@function_tool(strict_mode=False, description_override=tools.get_timer.description)
+async def get_timer(name: Optional[str] = None) -> Dict[str, Any]:
+    return await asyncio.to_thread(workout_ops.get_timer, name)
+
+
+__all__ = [
+    "new_daily_plan",
+    "get_today_plan",
+    "log_completed_set",
+    "complete_planned_set",
+    "update_summary",
+    "get_recent_history",
+    "get_training_analytics",
+    "set_weekly_split_day",
+    "get_weekly_split",
+    "apply_weekly_split",
+    "run_sql",
+    "arbitrary_update",
+    "set_timer",
+    "get_timer",
+]
@@ -0,0 +1,360 @@
+"""Benchmarks for the tool functions and context builder on synthetic data.
+
+Seeds a separate database (``BENCH_DB_NAME``, default ``<DB_NAME>_bench``;
+it is wiped for every scale) with 1 month, 1 year and 5 years of daily logs,
+then calls each hot path repeatedly with its caches cleared and reports
+p50/p95/p99 latency, statements executed per call and peak Python
+allocations per call (tracemalloc, measured in a separate pass so it does
+not skew the timings).
+
+Results are compared against a JSON baseline; `--save` writes a new one.
+
+Run with:
+    python benchmark.py                      # all scales, compare to benchmark_baseline.json
+    python benchmark.py --scales month,year --save
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import psycopg2
+import psycopg2.extensions
+
+import db_config
+
+MAIN_DB_NAME = os.environ.get("DB_NAME", "workout_tracker")
+BENCH_DB_NAME = os.environ.get("BENCH_DB_NAME", f"{MAIN_DB_NAME}_bench")
+SCALES = {"month": 30, "year": 365, "5years": 1826}
+SETS_PER_DAY = 24
+CHAT_MESSAGES = 500
+DEFAULT_BASELINE = "benchmark_baseline.json"
+# Latency deltas below this are noise, whatever the percentage
+MIN_REGRESSION_MS = 0.5
+MIN_REGRESSION_KIB = 64
+
+EXERCISES = [
+    "bench press", "squat", "deadlift", "overhead press", "rows", "pull-ups",
+    "dips", "lunges", "romanian deadlift", "incline bench press", "curls", "plank",
+]
+TRACKED = ["bench press", "squat", "deadlift"]
+
+# Generated server-side; completed sets get a slow upward load trend
+SEED_SQL = """
+SELECT setseed(0.42);
+
+INSERT INTO exercises (name) SELECT unnest(%(exercises)s::text[]);
+DELETE FROM tracked_exercises;
+INSERT INTO tracked_exercises (exercise) SELECT unnest(%(tracked)s::text[]);
+
+SELECT create_completed_sets_partition(month::date)
+FROM generate_series(date_trunc('month', %(start)s::date), date_trunc('month', %(today)s::date),
+                     interval '1 month') month;
+
+INSERT INTO daily_logs (id, log_date, summary)
+SELECT 'bench-' || to_char(d, 'YYYY-MM-DD'), d::date,
+       CASE WHEN random() < 0.3 THEN 'Solid session, ' || (10 + floor(random() * 20))::int || ' sets' END
+FROM generate_series(%(start)s::date, %(today)s::date, interval '1 day') d;
+
+INSERT INTO completed_sets (log_id, exercise_id, reps_done, load_done, completed_at)
+SELECT 'bench-' || to_char(d, 'YYYY-MM-DD'),
+       e.id,
+       1 + floor(random() * 12)::int,
+       round((45 + random() * 200 + (d::date - %(start)s::date) * 0.05)::numeric / 5) * 5,
+       d + interval '18 hours' + n * interval '3 minutes'
+FROM generate_series(%(start)s::date, %(today)s::date - 1, interval '1 day') d,
+     generate_series(1, %(sets_per_day)s) n
+JOIN exercises e ON e.name = (%(exercises)s::text[])[1 + n %% cardinality(%(exercises)s::text[])];
+
+-- A couple of sets left over on past days, and a long plan for today
+INSERT INTO planned_sets (log_id, exercise_id, order_num, reps, load, rest)
+SELECT 'bench-' || to_char(d, 'YYYY-MM-DD'), e.id, 100 + n, 8, 135, 60
+FROM generate_series(%(start)s::date, %(today)s::date - 1, interval '1 day') d,
+     generate_series(1, 2) n
+JOIN exercises e ON e.name = (%(exercises)s::text[])[n];
+
+INSERT INTO planned_sets (log_id, exercise_id, order_num, reps, load, rest)
+SELECT 'bench-' || to_char(%(today)s::date, 'YYYY-MM-DD'), e.id, n, 5, 185, 0
+FROM generate_series(1, %(planned_today)s) n
+JOIN exercises e ON e.name = (%(exercises)s::text[])[1 + n %% 3];
+
+INSERT INTO split_sets (day_of_week, exercise_id, order_num, reps, load, rest, relative)
+SELECT dow, e.id, n, 5, CASE WHEN n %% 2 = 0 THEN 75 ELSE 135 END, 90, n %% 2 = 0
+FROM generate_series(0, 6) dow, generate_series(1, 5) n
+JOIN exercises e ON e.name = (%(exercises)s::text[])[n];
+
+INSERT INTO chat_messages (conversation_id, message_type, content)
+SELECT 'default', CASE WHEN n %% 2 = 0 THEN 'assistant' ELSE 'user' END, 'message ' || n
+FROM generate_series(1, %(chat_messages)s) n;
+
+ANALYZE;
+"""
+
+_queries = [0]
+_counting_classes = {}
+
+
+def _counting(factory):
+    """Subclass of a cursor class that counts executed statements."""
+    cls = _counting_classes.get(factory)
+    if cls is None:
+        class CountingCursor(factory):
+            def execute(self, query, vars=None):
+                _queries[0] += 1
+                return super().execute(query, vars)
+
+            def executemany(self, query, vars_list):
+                _queries[0] += 1
+                return super().executemany(query, vars_list)
+
+        cls = _counting_classes[factory] = CountingCursor
+    return cls
+
+
+def _counting_connection_factory():
+    from prepared_statements import PreparedConnection
+
+    class CountingConnection(PreparedConnection):
+        """Pooled connection whose cursors count the statements they execute."""
+
+        def cursor(self, *args, **kwargs):
+            factory = kwargs.get("cursor_factory") or self.cursor_factory or psycopg2.extensions.cursor
+            kwargs["cursor_factory"] = _counting(factory)
+            return super().cursor(*args, **kwargs)
+
+    return CountingConnection
+
+
+def ensure_bench_database():
+    config = db_config.get_db_config()
+    conn = psycopg2.connect(host=config["host"], port=config["port"], database="postgres",
+                            user=config["user"], password=config["password"])
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+        cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (BENCH_DB_NAME,))
+        if not cur.fetchone():
+            cur.execute(f'CREATE DATABASE "{BENCH_DB_NAME}"')
+    finally:
+        conn.close()
+
+
+def seed(days: int, planned_today: int):
+    """Rebuild the benchmark database with `days` days of history ending today."""
+    import context_cache
+    import db
+    import read_cache
+    import workout_ops
+
+    db.reset_db()
+    workout_ops.invalidate_exercise_cache()
+    context_cache.clear()
+    read_cache.clear()
+    today = db.current_log_date()
+    with db.pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(SEED_SQL, {
+            "exercises": EXERCISES,
+            "tracked": TRACKED,
+            "start": today - timedelta(days=days - 1),
+            "today": today,
+            "sets_per_day": SETS_PER_DAY,
+            "planned_today": planned_today,
+            "chat_messages": CHAT_MESSAGES,
+        })
+        conn.commit()
+    db.invalidate_today_log_cache()
+
+
+def benchmarks():
+    """Name -> zero-argument callable for every measured hot path."""
+    import agent
+    import analytics
+    import db
+    import workout_ops
+
+    return {
+        "complete_planned_set": workout_ops.complete_planned_set,
+        "get_today_plan": workout_ops.get_today_plan,
+        "get_recent_history_7d": lambda: workout_ops.get_recent_history(7),
+        "get_recent_history_30d": lambda: workout_ops.get_recent_history(30),
+        "get_current_prs": db.get_current_prs,
+        "training_analytics_28d": lambda: analytics.training_analytics(28),
+        "create_dynamic_context": agent.create_dynamic_context,
+        "save_chat_message": lambda: db.save_chat_message("user", "benchmark message"),
+    }
+
+
+def _clear_caches():
+    import context_cache
+    import read_cache
+
+    context_cache.clear()
+    read_cache.clear()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def measure(func, iterations: int, warmup: int, alloc_iterations: int):
+    for _ in range(warmup):
+        _clear_caches()
+        func()
+
+    timings = []
+    queries = 0
+    for _ in range(iterations):
+        _clear_caches()
+        before = _queries[0]
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+        queries += _queries[0] - before
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_iterations):
+            _clear_caches()
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    peaks.sort()
+    return {
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "queries": round(queries / iterations, 2),
+        "alloc_peak_kib": round(percentile(peaks, 50) / 1024, 1) if peaks else None,
+    }
+
+
+def compare(baseline, results, tolerance: float):
+    """Return human-readable regressions of `results` against `baseline`."""
+    regressions = []
+    for scale, benches in results.items():
+        for name, current in benches.items():
+            base = baseline.get("results", {}).get(scale, {}).get(name)
+            if not base:
+                continue
+            for metric in ("p50_ms", "p95_ms"):
+                if (current[metric] > base[metric] * (1 + tolerance)
+                        and current[metric] - base[metric] > MIN_REGRESSION_MS):
+                    regressions.append(f"{scale}/{name}: {metric} {base[metric]} -> {current[metric]}")
+            if current["queries"] > base["queries"]:
+                regressions.append(f"{scale}/{name}: queries {base['queries']} -> {current['queries']}")
+            base_alloc, alloc = base.get("alloc_peak_kib"), current.get("alloc_peak_kib")
+            if (base_alloc is not None and alloc is not None and alloc > base_alloc * (1 + tolerance)
+                    and alloc - base_alloc > MIN_REGRESSION_KIB):
+                regressions.append(f"{scale}/{name}: alloc_peak_kib {base_alloc} -> {alloc}")
+    return regressions
+
+
+def _print_results(scale, benches, baseline):
+    base_benches = baseline.get("results", {}).get(scale, {}) if baseline else {}
+    print(f"\n{scale} ({SCALES[scale]} days)")
+    print(f"  {'benchmark':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'alloc KiB':>11}  vs baseline p50")
+    for name, r in benches.items():
+        delta = ""
+        base = base_benches.get(name)
+        if base and base["p50_ms"]:
+            delta = f"{(r['p50_ms'] - base['p50_ms']) / base['p50_ms'] * 100:+.0f}%"
+        print(f"  {name:<26}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+              f"{r['queries']:>9}{r['alloc_peak_kib'] if r['alloc_peak_kib'] is not None else '-':>11}  {delta}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default=",".join(SCALES), help="comma-separated: " + ", ".join(SCALES))
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--alloc-iterations", type=int, default=5)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f"unknown scale(s): {', '.join(unknown)}")
+    if BENCH_DB_NAME == MAIN_DB_NAME:
+        parser.error("BENCH_DB_NAME must differ from DB_NAME; the benchmark database is wiped")
+
+    # Everything below runs against the benchmark database with counted statements
+    os.environ["DB_NAME"] = BENCH_DB_NAME
+    ensure_bench_database()
+    import db
+    db.CONNECTION_FACTORY = _counting_connection_factory()
+
+    all_benchmarks = benchmarks()
+    selected = all_benchmarks
+    if args.only:
+        names = [n.strip() for n in args.only.split(",")]
+        missing = [n for n in names if n not in all_benchmarks]
+        if missing:
+            parser.error(f"unknown benchmark(s): {', '.join(missing)}")
+        selected = {n: all_benchmarks[n] for n in names}
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    calls_per_bench = args.warmup + args.iterations + args.alloc_iterations
+    results = {}
+    for scale in scales:
+        print(f"Seeding {scale} ({SCALES[scale]} days) into {BENCH_DB_NAME}...")
+        seed(SCALES[scale], planned_today=calls_per_bench + 10)
+        results[scale] = {
+            name: measure(func, args.iterations, args.warmup, args.alloc_iterations)
+            for name, func in selected.items()
+        }
+        _print_results(scale, results[scale], baseline)
+    db.close_pool()
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "iterations": args.iterations,
+            "sets_per_day": SETS_PER_DAY,
+        },
+        "results": results,
+    }
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save to create one")
+        return 0
+    regressions = compare(baseline, results, args.tolerance)
+    if regressions:
+        print("\nRegressions:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nNo regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
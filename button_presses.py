@@ -0,0 +1,106 @@
+"""Debouncing and ordering for complete-next-set button presses.
+
+Zigbee buttons bounce and Home Assistant retries, so one physical press can
+arrive several times. ``PressCoalescer.press`` collapses presses that repeat
+an idempotency key, or that come from the same device within
+``BUTTON_DEBOUNCE_SECONDS`` of the last accepted press, onto that press's
+result. Presses that get through run one at a time per device, in arrival
+order, on a small shared worker pool: each device with pending presses has a
+queue drained by one worker job, and the queue is dropped once it is empty.
+Only successful results are remembered; a press that failed (e.g. on a
+transient database error) can be retried with the same key.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+BUTTON_DEBOUNCE_SECONDS = float(os.environ.get("BUTTON_DEBOUNCE_SECONDS", "2"))
+# Worker threads shared by all devices
+BUTTON_WORKERS = int(os.environ.get("BUTTON_WORKERS", "4"))
+# How long a seen idempotency key keeps returning its original result
+IDEMPOTENCY_TTL_SECONDS = 600
+DEFAULT_DEVICE = "default"
+
+
+def _failed(future: Future) -> bool:
+    return future.done() and not future.cancelled() and future.exception() is not None
+
+
+class PressCoalescer:
+    """Coalesce duplicate presses and serialize real ones per device."""
+
+    def __init__(self, action: Callable[[Optional[str]], str], window: float = BUTTON_DEBOUNCE_SECONDS,
+                 workers: int = BUTTON_WORKERS):
+        self.action = action
+        self.window = window
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="press")
+        # device -> (future, exercise) presses waiting to run; present only while the device has work
+        self._queues: Dict[str, Deque[Tuple[Future, Optional[str]]]] = {}
+        self._last_press: Dict[str, Tuple[float, Future]] = {}
+        self._keys: Dict[str, Tuple[float, Future]] = {}
+        self.stats = {"accepted": 0, "coalesced": 0}
+
+    def press(self, device_id: Optional[str] = None, idempotency_key: Optional[str] = None,
+              exercise: Optional[str] = None) -> Tuple[str, bool]:
+        """Handle one press; returns (message, coalesced). Blocks until the press's set is done."""
+        device = device_id or DEFAULT_DEVICE
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            future = None
+            if idempotency_key and idempotency_key in self._keys:
+                future = self._keys[idempotency_key][1]
+            elif not idempotency_key and device in self._last_press:
+                pressed_at, last = self._last_press[device]
+                if now - pressed_at < self.window:
+                    future = last
+            if future is not None and not _failed(future):
+                self.stats["coalesced"] += 1
+                coalesced = True
+            else:
+                future = Future()
+                queue = self._queues.get(device)
+                if queue is None:
+                    queue = self._queues[device] = deque()
+                    self._executor.submit(self._drain, device)
+                queue.append((future, exercise))
+                self._last_press[device] = (now, future)
+                if idempotency_key:
+                    self._keys[idempotency_key] = (now, future)
+                self.stats["accepted"] += 1
+                coalesced = False
+        return future.result(), coalesced
+
+    def _drain(self, device: str):
+        """Run a device's queued presses in order, then drop its queue."""
+        while True:
+            with self._lock:
+                queue = self._queues[device]
+                if not queue:
+                    del self._queues[device]
+                    return
+                future, exercise = queue.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self.action(exercise))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def _expire(self, now: float):
+        """Forget stale or failed idempotency keys and debounce entries older than the window."""
+        expired = [key for key, (seen, future) in self._keys.items()
+                   if now - seen > IDEMPOTENCY_TTL_SECONDS or _failed(future)]
+        for key in expired:
+            del self._keys[key]
+        idle = [device for device, (pressed_at, _) in self._last_press.items() if now - pressed_at >= self.window]
+        for device in idle:
+            del self._last_press[device]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
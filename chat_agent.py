@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 import sys
@@ -7,8 +8,11 @@ import io
 if os.name == 'nt':  # Windows
     os.environ['PYTHONIOENCODING'] = 'utf-8'
 
-from agent import create_agent, run_agent
-from db import save_chat_message, get_recent_chat_messages
+import read_cache
+from agent import create_agent, run_agent, run_agent_async, stream_agent
+from conversation_context import build_context
+from db import DEFAULT_CONVERSATION, save_chat_exchange, get_recent_chat_messages
+from intent_router import route
 
 
 def safe_print(text):
@@ -39,6 +43,80 @@ def safe_print(text):
         print("Message content could not be displayed due to encoding issues.")
 
 
+def _prepare_turn(message: str, conversation_id: str) -> str:
+    recent_messages = get_recent_chat_messages(conversation_id=conversation_id)
+    context = build_context(recent_messages, conversation_id)
+    print(
+        f"Context: {context.tokens} tokens ({context.verbatim_messages} verbatim, "
+        f"{context.summarized_messages} summarized, {context.excerpted_messages} older not yet summarized)",
+        file=sys.stderr,
+    )
+    return context.text + "Current user message: " + message
+
+
+def _final_output(result) -> str:
+    if hasattr(result, 'final_output') and result.final_output:
+        return result.final_output
+    return "Error: Could not extract final output"
+
+
+def handle_chat(message: str, conversation_id: str = DEFAULT_CONVERSATION) -> str:
+    """Run one chat turn: load memory, call the agent and persist both sides."""
+    # Common commands ("done", "what's next", ...) skip the model entirely
+    fast_reply = route(message)
+    if fast_reply is not None:
+        save_chat_exchange(message, fast_reply, conversation_id)
+        return fast_reply
+
+    message_with_context = _prepare_turn(message, conversation_id)
+
+    agent = create_agent()
+    with read_cache.turn():
+        result = run_agent(agent, message_with_context)
+
+    assistant_response = _final_output(result)
+    save_chat_exchange(message, assistant_response, conversation_id)
+    return assistant_response
+
+
+async def handle_chat_async(message: str, conversation_id: str = DEFAULT_CONVERSATION) -> str:
+    """handle_chat for an event loop: async tools, with memory I/O kept off the loop."""
+    fast_reply = await asyncio.to_thread(route, message)
+    if fast_reply is not None:
+        await asyncio.to_thread(save_chat_exchange, message, fast_reply, conversation_id)
+        return fast_reply
+
+    message_with_context = await asyncio.to_thread(_prepare_turn, message, conversation_id)
+
+    agent = create_agent(async_tools=True)
+    with read_cache.turn():
+        result = await run_agent_async(agent, message_with_context)
+
+    assistant_response = _final_output(result)
+    await asyncio.to_thread(save_chat_exchange, message, assistant_response, conversation_id)
+    return assistant_response
+
+
+async def stream_chat(message: str, conversation_id: str = DEFAULT_CONVERSATION):
+    """Streaming handle_chat_async: yields agent events, persisting the reply before "final"."""
+    fast_reply = await asyncio.to_thread(route, message)
+    if fast_reply is not None:
+        await asyncio.to_thread(save_chat_exchange, message, fast_reply, conversation_id)
+        yield {"type": "final", "text": fast_reply}
+        return
+
+    message_with_context = await asyncio.to_thread(_prepare_turn, message, conversation_id)
+
+    agent = create_agent(async_tools=True)
+    with read_cache.turn():
+        async for event in stream_agent(agent, message_with_context):
+            if event["type"] == "final":
+                if not event["text"]:
+                    event["text"] = "Error: Could not extract final output"
+                await asyncio.to_thread(save_chat_exchange, message, event["text"], conversation_id)
+            yield event
+
+
 def main():
     if len(sys.argv) != 2:
         safe_print("Usage: python chat_agent.py <temp_file>")
@@ -48,29 +126,7 @@ def main():
         chat_data = json.load(f)
     message = chat_data.get('message', '')
 
-    recent_messages = get_recent_chat_messages(25)
-    context = ""
-    if recent_messages:
-        context += "Previous conversation context:\n"
-        for msg in recent_messages:
-            role = "User" if msg['type'] == 'user' else 'Assistant'
-            context += f"{role}: {msg['content']}\n"
-        context += "\n"
-
-    message_with_context = context + "Current user message: " + message
-    save_chat_message('user', message)
-
-    agent = create_agent()
-    result = run_agent(agent, message_with_context)
-
-    if hasattr(result, 'final_output') and result.final_output:
-        assistant_response = result.final_output
-        save_chat_message('assistant', assistant_response)
-        safe_print(assistant_response)
-    else:
-        error_msg = "Error: Could not extract final output"
-        save_chat_message('assistant', error_msg)
-        safe_print(error_msg)
+    safe_print(handle_chat(message))
 
     os.remove(temp_file)
     return 0
@@ -2,10 +2,10 @@ import sys
 import json
 import os
 
-# Ensure we can import tools from project root
+# Ensure we can import workout_ops from project root
 sys.path.append(os.path.dirname(__file__))
 
-from tools import complete_planned_set
+from workout_ops import complete_planned_set
 
 
 def main():
@@ -0,0 +1,62 @@
+"""Data-version keyed cache for the agent's dynamic context.
+
+Writes made through the tools call ``bump_data_version()``; ``get_or_build()``
+reuses the last rendered context string while the version is unchanged (the
+version also keys ``read_cache``). Writes made outside this process (for
+example through the Node UI) are not seen, so entries also expire after
+``CONTEXT_CACHE_TTL`` seconds.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+CONTEXT_CACHE_TTL = float(os.environ.get("CONTEXT_CACHE_TTL", "300"))
+
+_lock = threading.Lock()
+_version = 0
+_cached: Optional[Tuple[int, float, str]] = None  # (version, built_at, context)
+_stats = {"hits": 0, "misses": 0}
+
+
+def bump_data_version() -> int:
+    """Mark the cached context as stale after a relevant write."""
+    global _version
+    with _lock:
+        _version += 1
+        return _version
+
+
+def data_version() -> int:
+    return _version
+
+
+def get_or_build(build: Callable[[], str]) -> str:
+    """Return the cached context for the current data version, building it on a miss."""
+    global _cached
+    with _lock:
+        version = _version
+        cached = _cached
+        if cached and cached[0] == version and time.monotonic() - cached[1] < CONTEXT_CACHE_TTL:
+            _stats["hits"] += 1
+            return cached[2]
+        _stats["misses"] += 1
+    context = build()
+    with _lock:
+        # Only store if nothing was written while we were building
+        if _version == version:
+            _cached = (version, time.monotonic(), context)
+    return context
+
+
+def stats() -> Dict[str, int]:
+    """Hit/miss counters plus the current data version."""
+    with _lock:
+        return {**_stats, "version": _version}
+
+
+def clear():
+    global _cached
+    with _lock:
+        _cached = None
@@ -0,0 +1,242 @@
+"""Token-budgeted conversation context for chat turns.
+
+The most recent messages are kept verbatim while they fit in the budget.
+Older messages are folded into a rolling summary written by a small model
+(CHAT_SUMMARY_MODEL). The summary is cached per conversation, keyed on the
+id of the newest message it covers, and is only refreshed when more
+messages have scrolled out of the verbatim window. Refreshes run in a
+background thread off the request path. Until a refresh lands, the messages
+it does not cover yet are shown as truncated excerpts. With CHAT_SUMMARY=0,
+or if the model call fails, only excerpts are used.
+
+Token counts come from tiktoken when it is installed and its encoding can
+be loaded; otherwise a four-characters-per-token estimate is used.
+"""
+
+import os
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+CHAT_CONTEXT_TOKENS = int(os.environ.get("CHAT_CONTEXT_TOKENS", "2000"))
+# Share of the budget set aside for older turns (summary plus excerpts)
+SUMMARY_SHARE = 0.25
+# Characters kept from each older message in its excerpt
+EXCERPT_CHARS = 160
+CHAT_SUMMARY = os.environ.get("CHAT_SUMMARY", "1") != "0"
+CHAT_SUMMARY_MODEL = os.environ.get("CHAT_SUMMARY_MODEL", "gpt-4o-mini")
+# Characters of each message passed to the summarizer
+SUMMARY_INPUT_CHARS = 2000
+
+# None until first use, then the tiktoken encoding or False if unavailable
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """Load tiktoken on first use; missing package or failed download means no encoding."""
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+
+                    _encoding = tiktoken.get_encoding("o200k_base")
+                except ImportError:
+                    _encoding = False
+                except Exception as e:
+                    # The encoding file is downloaded on first use and may be unreachable
+                    print(f"tiktoken encoding unavailable, estimating tokens from length: {e}", file=sys.stderr)
+                    _encoding = False
+    return _encoding
+
+
+def estimate_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text))
+    # Roughly four characters per token for English text
+    return len(text) // 4 + 1
+
+
+@dataclass
+class ConversationContext:
+    text: str
+    tokens: int
+    verbatim_messages: int
+    summarized_messages: int
+    excerpted_messages: int
+
+
+# conversation_id -> (id of the newest message the summary covers, summary text)
+_summaries: Dict[str, Tuple[int, str]] = {}
+# conversation_id -> running refresh thread
+_refreshing: Dict[str, threading.Thread] = {}
+# Bumped by clear() so a refresh that started before it does not store its result
+_epoch = 0
+_lock = threading.Lock()
+
+SUMMARY_INSTRUCTIONS = (
+    "You keep a running summary of a chat between a lifter and their workout coach. "
+    "Merge the new messages into the existing summary. Keep what matters for later turns: "
+    "goals, injuries, preferences, plans and agreed changes, numbers such as loads, reps and PRs. "
+    "Drop small talk. Answer with the summary only, in plain sentences, under {words} words."
+)
+
+
+def _role(msg) -> str:
+    return "User" if msg["type"] == "user" else "Assistant"
+
+
+def _excerpt(msg) -> str:
+    text = " ".join(msg["content"].split())
+    if len(text) > EXCERPT_CHARS:
+        text = text[:EXCERPT_CHARS].rsplit(" ", 1)[0] + "..."
+    return f"- {_role(msg)}: {text}"
+
+
+_client = None
+
+
+def summarize_messages(previous: str, messages: List[dict], max_tokens: int) -> str:
+    """Ask CHAT_SUMMARY_MODEL to fold `messages` into the `previous` summary."""
+    global _client
+    if _client is None:
+        # Imported on first use to keep the SDK off the import path
+        from openai import OpenAI
+
+        _client = OpenAI()
+    transcript = "\n".join(f"{_role(m)}: {m['content'][:SUMMARY_INPUT_CHARS]}" for m in messages)
+    response = _client.chat.completions.create(
+        model=CHAT_SUMMARY_MODEL,
+        max_tokens=max_tokens,
+        messages=[
+            {"role": "system", "content": SUMMARY_INSTRUCTIONS.format(words=max(20, max_tokens * 3 // 4))},
+            {"role": "user", "content": f"Existing summary:\n{previous or '(none)'}\n\nNew messages:\n{transcript}"},
+        ],
+    )
+    return (response.choices[0].message.content or "").strip()
+
+
+# Called as SUMMARIZER(previous, messages, max_tokens); replaceable, e.g. in tests
+SUMMARIZER: Callable[[str, List[dict], int], str] = summarize_messages
+
+
+def _refresh(conversation_id: str, previous: str, messages: List[dict], budget: int, epoch: int):
+    try:
+        text = SUMMARIZER(previous, messages, budget)
+    except Exception as e:
+        print(f"Conversation summary failed, using excerpts: {e}", file=sys.stderr)
+        text = ""
+    with _lock:
+        if text and epoch == _epoch:
+            newest_id = messages[-1]["id"]
+            cached = _summaries.get(conversation_id)
+            if cached is None or cached[0] < newest_id:
+                _summaries[conversation_id] = (newest_id, text)
+        _refreshing.pop(conversation_id, None)
+
+
+def _schedule_refresh(conversation_id: str, previous: str, messages: List[dict], budget: int):
+    with _lock:
+        if conversation_id in _refreshing:
+            return
+        thread = threading.Thread(
+            target=_refresh, args=(conversation_id, previous, messages, budget, _epoch), daemon=True
+        )
+        _refreshing[conversation_id] = thread
+    thread.start()
+
+
+def _older_context(conversation_id: str, folded: List[dict], budget: int) -> Tuple[str, int, List[str]]:
+    """(cached summary, messages it covers, excerpts of the rest) for the folded messages.
+
+    A refresh is scheduled only when the folded messages include some the
+    summary does not cover yet.
+    """
+    if not folded:
+        return "", 0, []
+    with _lock:
+        cached = _summaries.get(conversation_id)
+    if cached and cached[0] > folded[-1]["id"]:
+        # Memory was cleared or trimmed behind our back
+        cached = None
+    summary, covered_id = (cached[1], cached[0]) if cached else ("", None)
+    pending = [m for m in folded if covered_id is None or m["id"] > covered_id]
+    if pending and CHAT_SUMMARY:
+        _schedule_refresh(conversation_id, summary, pending, budget)
+
+    used = estimate_tokens(summary) if summary else 0
+    # Keep the newest excerpts of what the summary does not cover yet
+    excerpts: List[str] = []
+    for msg in reversed(pending):
+        line = _excerpt(msg)
+        cost = estimate_tokens(line)
+        if used + cost > budget:
+            break
+        excerpts.append(line)
+        used += cost
+    excerpts.reverse()
+    return summary, len(folded) - len(pending), excerpts
+
+
+def build_context(messages: List[dict], conversation_id: str = "default",
+                  budget: Optional[int] = None) -> ConversationContext:
+    """Render prior messages (oldest first, as from get_recent_chat_messages) within a token budget."""
+    if budget is None:
+        budget = CHAT_CONTEXT_TOKENS
+    if not messages:
+        return ConversationContext("", 0, 0, 0, 0)
+
+    summary_budget = int(budget * SUMMARY_SHARE)
+    verbatim_budget = budget - summary_budget
+    verbatim: List[str] = []
+    used = 0
+    split = len(messages)
+    for i in range(len(messages) - 1, -1, -1):
+        line = f"{_role(messages[i])}: {messages[i]['content']}"
+        cost = estimate_tokens(line)
+        if used + cost > verbatim_budget:
+            if not verbatim:
+                # Always keep the latest message, clipped to the budget
+                line = line[: verbatim_budget * 4]
+                cost = estimate_tokens(line)
+                verbatim.append(line)
+                used += cost
+                split = i
+            break
+        verbatim.append(line)
+        used += cost
+        split = i
+    verbatim.reverse()
+
+    folded = messages[:split]
+    summary, summarized, excerpts = _older_context(conversation_id, folded, summary_budget)
+
+    parts = ["Previous conversation context:"]
+    if summary:
+        parts.append("Summary of earlier conversation:")
+        parts.append(summary)
+        parts.append("")
+    if excerpts:
+        parts.append("Earlier messages (truncated excerpts):")
+        parts.extend(excerpts)
+        parts.append("")
+    parts.extend(verbatim)
+    text = "\n".join(parts) + "\n\n"
+    return ConversationContext(
+        text, estimate_tokens(text), len(verbatim), summarized, len(folded) - summarized
+    )
+
+
+def clear(conversation_id: Optional[str] = None):
+    """Drop cached summaries, e.g. after chat memory was cleared."""
+    global _epoch
+    with _lock:
+        _epoch += 1
+        if conversation_id is None:
+            _summaries.clear()
+        else:
+            _summaries.pop(conversation_id, None)
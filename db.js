@@ -27,64 +27,11 @@ const pool = new Pool(dbConfig);
 async function initDb(sample = false) {
   const client = await pool.connect();
   try {
-    await client.query(`
-      CREATE TABLE IF NOT EXISTS exercises (
-        id SERIAL PRIMARY KEY,
-        name VARCHAR(255) UNIQUE NOT NULL
-      );
-      CREATE TABLE IF NOT EXISTS daily_logs (
-        id VARCHAR(255) PRIMARY KEY,
-        log_date DATE NOT NULL UNIQUE,
-        summary TEXT
-      );
-      CREATE TABLE IF NOT EXISTS planned_sets (
-        id SERIAL PRIMARY KEY,
-        log_id VARCHAR(255) REFERENCES daily_logs(id) ON DELETE CASCADE,
-        exercise_id INTEGER REFERENCES exercises(id),
-        order_num INTEGER NOT NULL,
-        reps INTEGER NOT NULL,
-        load REAL NOT NULL,
-        rest INTEGER DEFAULT 60
-      );
-      CREATE TABLE IF NOT EXISTS completed_sets (
-        id SERIAL PRIMARY KEY,
-        log_id VARCHAR(255) REFERENCES daily_logs(id) ON DELETE CASCADE,
-        exercise_id INTEGER REFERENCES exercises(id),
-        planned_set_id INTEGER REFERENCES planned_sets(id),
-        reps_done INTEGER,
-        load_done REAL,
-        completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-      );
-      CREATE TABLE IF NOT EXISTS tracked_prs (
-        exercise VARCHAR(255) NOT NULL,
-        reps INTEGER NOT NULL,
-        max_load REAL NOT NULL,
-        PRIMARY KEY (exercise, reps)
-      );
-      CREATE TABLE IF NOT EXISTS tracked_exercises (
-        exercise VARCHAR(255) PRIMARY KEY
-      );
-      CREATE TABLE IF NOT EXISTS split_sets (
-        id SERIAL PRIMARY KEY,
-        day_of_week INTEGER NOT NULL,
-        exercise_id INTEGER REFERENCES exercises(id),
-        order_num INTEGER NOT NULL,
-        reps INTEGER NOT NULL,
-        load REAL NOT NULL,
-        rest INTEGER DEFAULT 60,
-        relative BOOLEAN DEFAULT FALSE
-      );
-    `);
-    
-    // Add 'relative' column to split_sets if it doesn't exist, for backward compatibility
-    await client.query(`
-      DO $$
-      BEGIN
-        IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='split_sets' AND column_name='relative') THEN
-          ALTER TABLE split_sets ADD COLUMN relative BOOLEAN DEFAULT FALSE;
-        END IF;
-      END $$;
-    `);
+    // The schema is owned by the versioned migrations in db.py
+    const migrated = await client.query("SELECT to_regclass('schema_migrations') AS name");
+    if (!migrated.rows[0].name) {
+      throw new Error('Database schema is not initialized; run `python db.py` to apply migrations');
+    }
 
     // Initialize with default tracked exercises if none exist
     const result = await client.query('SELECT COUNT(*) FROM tracked_exercises');
@@ -239,39 +186,31 @@ async function deleteSplit(id) {
 async function applySplitIfEmpty(logId, logDate) {
   const client = await pool.connect();
   try {
+    await client.query('BEGIN');
+    // Lock the day so concurrent appliers (Node or Python) cannot both fill it
+    await client.query('SELECT 1 FROM daily_logs WHERE id = $1 FOR UPDATE', [logId]);
     const countRes = await client.query('SELECT COUNT(*) FROM planned_sets WHERE log_id = $1', [logId]);
-    if (parseInt(countRes.rows[0].count) > 0) return;
-    // By appending T00:00:00, we ensure this is parsed as a local date, not UTC
-    const dow = new Date(logDate + 'T00:00:00').getDay();
-    const splitRes = await client.query(
-      `SELECT ss.exercise_id, e.name as exercise, ss.order_num, ss.reps, ss.load, ss.rest, ss.relative
-       FROM split_sets ss JOIN exercises e ON ss.exercise_id = e.id
-       WHERE ss.day_of_week = $1 ORDER BY ss.order_num`, [dow]);
-
-    const prs = await getPRs();
-    const oneRMs = {};
-    for (const [ex, records] of Object.entries(prs)) {
-      let max = 0;
-      for (const r of records) {
-        const est = r.reps === 1 ? r.maxLoad : r.maxLoad * (1 + r.reps / 30);
-        if (est > max) max = est;
-      }
-      oneRMs[ex] = max;
-    }
-
-    for (const row of splitRes.rows) {
-      let load = row.load;
-      if (row.relative) {
-        const rm = oneRMs[row.exercise];
-        if (rm) {
-          load = Math.round(rm * row.load / 100);
-        } else {
-          load = 0;
-        }
-      }
-      await client.query('INSERT INTO planned_sets (log_id, exercise_id, order_num, reps, load, rest) VALUES ($1,$2,$3,$4,$5,$6)',
-        [logId, row.exercise_id, row.order_num, row.reps, load, row.rest]);
+    if (parseInt(countRes.rows[0].count) === 0) {
+      // By appending T00:00:00, we ensure this is parsed as a local date, not UTC
+      const dow = new Date(logDate + 'T00:00:00').getDay();
+      // Relative loads are a percentage of the best estimated 1RM, kept in
+      // exercise_e1rm by a trigger (same as workout_ops.APPLY_SPLIT_SQL)
+      await client.query(
+        `INSERT INTO planned_sets (log_id, exercise_id, order_num, reps, load, rest)
+         SELECT $1, ss.exercise_id, ss.order_num, ss.reps,
+                CASE WHEN ss.relative THEN COALESCE(ROUND((r.e1rm * ss.load / 100)::numeric), 0)::real ELSE ss.load END,
+                ss.rest
+         FROM split_sets ss
+         LEFT JOIN exercise_e1rm r ON r.exercise_id = ss.exercise_id
+         WHERE ss.day_of_week = $2
+         ORDER BY ss.order_num`,
+        [logId, dow]
+      );
     }
+    await client.query('COMMIT');
+  } catch (error) {
+    await client.query('ROLLBACK');
+    throw error;
   } finally {
     client.release();
   }
@@ -399,27 +338,17 @@ async function updateSummary(id, summary) {
 async function getPRs() {
   const client = await pool.connect();
   try {
-    // Get tracked exercises from database instead of hardcoded list
-    const trackedResult = await client.query('SELECT exercise FROM tracked_exercises');
-    const trackedExercises = trackedResult.rows.map(row => row.exercise);
-    
-    if (trackedExercises.length === 0) {
-      return {}; // No exercises being tracked
-    }
-    
+    // Best loads are kept current in exercise_rep_bests by a trigger on completed_sets
     const result = await client.query(`
       SELECT 
         e.name as exercise,
-        cs.reps_done,
-        MAX(cs.load_done) as max_load
-      FROM completed_sets cs
-      JOIN exercises e ON cs.exercise_id = e.id
-      WHERE e.name = ANY($1)
-        AND cs.reps_done > 0
-        AND cs.load_done > 0
-      GROUP BY e.name, cs.reps_done
-      ORDER BY e.name, cs.reps_done
-    `, [trackedExercises]);
+        b.reps as reps_done,
+        b.max_load
+      FROM tracked_exercises t
+      JOIN exercises e ON e.name = t.exercise
+      JOIN exercise_rep_bests b ON b.exercise_id = e.id
+      ORDER BY e.name, b.reps
+    `);
     
     // Group by exercise
     const prsByExercise = {};
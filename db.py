@@ -1,102 +1,261 @@
 """Database helper functions for PostgreSQL backend."""
 
+import hashlib
 import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
 import psycopg2
+import psycopg2.errors
 import psycopg2.extras
+import psycopg2.pool
 import uuid
 from datetime import datetime, date, timedelta, timezone
+from typing import Tuple
+from zoneinfo import ZoneInfo
 
-# Database configuration
-DB_HOST = os.environ.get("DB_HOST", "192.168.1.93")
-DB_PORT = os.environ.get("DB_PORT", "5432")
-DB_NAME = os.environ.get("DB_NAME", "workout_tracker")
-DB_USER = os.environ.get("DB_USER", "postgres")
-DB_PASSWORD = os.environ.get("DB_PASSWORD", "")
+from db_config import get_db_config
+from context_cache import bump_data_version
+from prepared_statements import PreparedConnection, execute_prepared, register
 
 # Connection helper
 def get_connection():
+    """Open a dedicated (unpooled) connection, e.g. for schema resets."""
+    config = get_db_config()
     conn = psycopg2.connect(
-        host=DB_HOST,
-        port=DB_PORT,
-        database=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD
+        host=config["host"],
+        port=config["port"],
+        database=config["database"],
+        user=config["user"],
+        password=config["password"],
     )
     conn.autocommit = False
     return conn
 
-# Initialize database with schema
+
+# Connection pool
+_pool = None
+_pool_lock = threading.Lock()
+# psycopg2 connection class for pooled connections (benchmark.py swaps in a counting subclass)
+CONNECTION_FACTORY = PreparedConnection
+_last_used = {}
+
+# Today's daily_logs id per date, plus (date, id) of rows a connection created but has not committed
+_log_id_cache = {}
+_uncommitted_log_ids = {}
+
+# Local day boundary: sets logged before DAY_ROLLOVER_HOUR count towards the previous day
+WORKOUT_TZ = os.environ.get("WORKOUT_TZ")  # e.g. America/New_York; defaults to system local time
+DAY_ROLLOVER_HOUR = int(os.environ.get("DAY_ROLLOVER_HOUR", "0"))
+
+
+def _get_pool():
+    """Create the process-wide connection pool on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = get_db_config()
+                _pool = psycopg2.pool.ThreadedConnectionPool(
+                    int(config["pool_min_size"]),
+                    int(config["pool_max_size"]),
+                    connection_factory=CONNECTION_FACTORY,
+                    host=config["host"],
+                    port=config["port"],
+                    database=config["database"],
+                    user=config["user"],
+                    password=config["password"],
+                )
+                # getconn() fails at once when the pool is exhausted; callers queue here instead
+                _pool.slots = threading.BoundedSemaphore(int(config["pool_max_size"]))
+    return _pool
+
+
+def _is_healthy(conn) -> bool:
+    """Ping connections that have been idle for a while before handing them out."""
+    if conn.closed:
+        return False
+    # Connections the pool has just opened have no entry and need no ping
+    now = time.monotonic()
+    idle_for = now - _last_used.get(id(conn), now)
+    if idle_for < float(get_db_config()["pool_health_check_after"]):
+        return True
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT 1")
+        cur.close()
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _checkout():
+    """Return (connection, the pool it came from); release it to that pool."""
+    pool = _get_pool()
+    if not pool.slots.acquire(timeout=float(get_db_config()["pool_timeout"])):
+        raise psycopg2.pool.PoolError("timed out waiting for a database connection")
+    try:
+        # One retry is enough: a stale connection is discarded and the pool
+        # opens a fresh one for the second attempt.
+        for _ in range(2):
+            conn = pool.getconn()
+            if _is_healthy(conn):
+                conn.autocommit = False
+                return conn, pool
+            _last_used.pop(id(conn), None)
+            pool.putconn(conn, close=True)
+        raise psycopg2.OperationalError("could not obtain a healthy database connection")
+    except BaseException:
+        pool.slots.release()
+        raise
+
+
+def _release(pool, conn, broken: bool = False, failed: bool = False):
+    created = _uncommitted_log_ids.pop(id(conn), None)
+    if created is not None:
+        committed = (
+            not broken and not failed and not conn.closed
+            and conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        )
+        if committed:
+            # Only now is the new daily_logs row visible to other connections
+            remember_log_id(*created)
+    if not broken and not conn.closed:
+        try:
+            # Never hand out a connection with an open transaction
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except psycopg2.Error:
+            broken = True
+    try:
+        if pool.closed:
+            # close_pool() ran while this connection was out; the old pool is gone
+            _last_used.pop(id(conn), None)
+            if not conn.closed:
+                conn.close()
+        elif broken or conn.closed:
+            _last_used.pop(id(conn), None)
+            pool.putconn(conn, close=True)
+        else:
+            _last_used[id(conn)] = time.monotonic()
+            pool.putconn(conn)
+    finally:
+        pool.slots.release()
+
+
+@contextmanager
+def pooled_connection():
+    """Borrow a connection from the pool for the duration of a ``with`` block.
+
+    Callers commit explicitly; anything left uncommitted is rolled back when
+    the connection goes back to the pool. Connections that fail with an
+    operational error are discarded so the next checkout reconnects.
+    """
+    conn, pool = _checkout()
+    broken = False
+    failed = False
+    try:
+        yield conn
+    except psycopg2.errors.QueryCanceled:
+        # statement_timeout fired; the connection itself is fine
+        failed = True
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            broken = True
+        raise
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    except Exception as e:
+        failed = True
+        if isinstance(e, psycopg2.errors.ForeignKeyViolation):
+            # Most likely a cached daily_logs id whose day was deleted elsewhere
+            invalidate_today_log_cache()
+        if not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        raise
+    finally:
+        _release(pool, conn, broken, failed)
+
+
+def close_pool():
+    """Close every pooled connection (used on shutdown and in scripts)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+            _last_used.clear()
+
+
+# Base schema (migration 1). Later changes go in new migrations, never here.
 SCHEMA = """
-DROP TABLE IF EXISTS completed_sets CASCADE;
-DROP TABLE IF EXISTS planned_sets CASCADE;
-DROP TABLE IF EXISTS daily_logs CASCADE;
-DROP TABLE IF EXISTS exercises CASCADE;
-DROP TABLE IF EXISTS timer CASCADE;
-DROP TABLE IF EXISTS chat_messages CASCADE;
-
-CREATE TABLE tracked_prs (
+CREATE TABLE IF NOT EXISTS tracked_prs (
     exercise VARCHAR(255) NOT NULL,
     reps INTEGER NOT NULL,
     max_load REAL NOT NULL,
     PRIMARY KEY (exercise, reps)
 );
 
-CREATE TABLE tracked_exercises (
+CREATE TABLE IF NOT EXISTS tracked_exercises (
     exercise VARCHAR(255) PRIMARY KEY
 );
 
-CREATE TABLE split_sets (
+CREATE TABLE IF NOT EXISTS exercises (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) UNIQUE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS split_sets (
     id SERIAL PRIMARY KEY,
     day_of_week INTEGER NOT NULL,
     exercise_id INTEGER REFERENCES exercises(id),
     order_num INTEGER NOT NULL,
     reps INTEGER NOT NULL,
     load REAL NOT NULL,
-    rest INTEGER DEFAULT 60,
-    relative BOOLEAN DEFAULT FALSE
+    rest INTEGER DEFAULT 60
 );
 CREATE INDEX IF NOT EXISTS ix_split_order ON split_sets (day_of_week, order_num);
 
-CREATE TABLE exercises (
-    id SERIAL PRIMARY KEY,
-    name VARCHAR(255) UNIQUE NOT NULL
-);
-
-CREATE TABLE daily_logs (
+CREATE TABLE IF NOT EXISTS daily_logs (
     id TEXT PRIMARY KEY,
     log_date DATE NOT NULL UNIQUE,
     summary TEXT
 );
 
-CREATE TABLE planned_sets (
+CREATE TABLE IF NOT EXISTS planned_sets (
     id SERIAL PRIMARY KEY,
     log_id TEXT REFERENCES daily_logs(id) ON DELETE CASCADE,
     exercise_id INTEGER REFERENCES exercises(id),
     order_num INTEGER NOT NULL,
     reps INTEGER NOT NULL,
-    load REAL NOT NULL,
-    rest INTEGER DEFAULT 60
+    load REAL NOT NULL
 );
 CREATE INDEX IF NOT EXISTS ix_planned_order ON planned_sets (log_id, order_num);
 
-CREATE TABLE completed_sets (
+CREATE TABLE IF NOT EXISTS completed_sets (
     id SERIAL PRIMARY KEY,
     log_id TEXT REFERENCES daily_logs(id) ON DELETE CASCADE,
     exercise_id INTEGER REFERENCES exercises(id),
-    planned_set_id INTEGER REFERENCES planned_sets(id),
     reps_done INTEGER,
     load_done REAL,
     completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 CREATE INDEX IF NOT EXISTS ix_completed_time ON completed_sets (log_id, completed_at);
 
-CREATE TABLE timer (
+CREATE TABLE IF NOT EXISTS timer (
     id SERIAL PRIMARY KEY,
     timer_end_time TIMESTAMP NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE TABLE chat_messages (
+CREATE TABLE IF NOT EXISTS chat_messages (
     id SERIAL PRIMARY KEY,
     message_type VARCHAR(10) NOT NULL CHECK (message_type IN ('user', 'assistant')),
     content TEXT NOT NULL,
@@ -105,26 +264,542 @@ CREATE TABLE chat_messages (
 CREATE INDEX IF NOT EXISTS ix_chat_timestamp ON chat_messages (timestamp DESC);
 """
 
+# Columns added after the first release (migration 2)
+LATE_COLUMNS = """
+ALTER TABLE split_sets ADD COLUMN IF NOT EXISTS relative BOOLEAN DEFAULT FALSE;
+ALTER TABLE planned_sets ADD COLUMN IF NOT EXISTS rest INTEGER DEFAULT 60;
+ALTER TABLE completed_sets ADD COLUMN IF NOT EXISTS planned_set_id INTEGER REFERENCES planned_sets(id);
+ALTER TABLE chat_messages ADD COLUMN IF NOT EXISTS conversation_id TEXT NOT NULL DEFAULT 'default';
+CREATE INDEX IF NOT EXISTS ix_chat_conversation ON chat_messages (conversation_id, id);
+"""
+
+# Every table the app owns, for reset_db()
+APP_TABLES = (
+    "schema_migrations", "exercise_e1rm", "exercise_rep_bests", "chat_messages", "timer",
+    "completed_sets_archive", "completed_sets", "planned_sets", "daily_logs", "split_sets",
+    "exercises", "tracked_exercises", "tracked_prs",
+)
+
+# Best load per (exercise, reps), kept current by a trigger on completed_sets so
+# PR lookups read a handful of rows instead of aggregating the whole history.
+# Migration 3 counted only sets with load_done > 0; since migration 9 any
+# recorded load counts, so bodyweight (zero-load) bests are kept as well.
+REP_BESTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS exercise_rep_bests (
+    exercise_id INTEGER NOT NULL REFERENCES exercises(id) ON DELETE CASCADE,
+    reps INTEGER NOT NULL,
+    max_load REAL NOT NULL,
+    PRIMARY KEY (exercise_id, reps)
+);
+
+CREATE OR REPLACE FUNCTION refresh_rep_best(p_exercise_id INTEGER, p_reps INTEGER) RETURNS VOID AS $$
+BEGIN
+    DELETE FROM exercise_rep_bests WHERE exercise_id = p_exercise_id AND reps = p_reps;
+    INSERT INTO exercise_rep_bests (exercise_id, reps, max_load)
+    SELECT exercise_id, reps_done, MAX(load_done)
+    FROM completed_sets
+    WHERE exercise_id = p_exercise_id AND reps_done = p_reps AND load_done > 0
+    GROUP BY exercise_id, reps_done;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION completed_sets_rep_bests() RETURNS TRIGGER AS $$
+BEGIN
+    -- A removed or changed set only matters if it was (tied for) the best
+    IF TG_OP IN ('UPDATE', 'DELETE')
+       AND OLD.exercise_id IS NOT NULL AND OLD.reps_done > 0 AND OLD.load_done > 0
+       AND OLD.load_done >= COALESCE(
+           (SELECT max_load FROM exercise_rep_bests
+            WHERE exercise_id = OLD.exercise_id AND reps = OLD.reps_done), 0) THEN
+        PERFORM refresh_rep_best(OLD.exercise_id, OLD.reps_done);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE')
+       AND NEW.exercise_id IS NOT NULL AND NEW.reps_done > 0 AND NEW.load_done > 0 THEN
+        INSERT INTO exercise_rep_bests (exercise_id, reps, max_load)
+        VALUES (NEW.exercise_id, NEW.reps_done, NEW.load_done)
+        ON CONFLICT (exercise_id, reps)
+        DO UPDATE SET max_load = GREATEST(exercise_rep_bests.max_load, EXCLUDED.max_load);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_completed_sets_rep_bests ON completed_sets;
+CREATE TRIGGER trg_completed_sets_rep_bests
+AFTER INSERT OR UPDATE OR DELETE ON completed_sets
+FOR EACH ROW EXECUTE FUNCTION completed_sets_rep_bests();
+"""
+
+REP_BESTS_AGGREGATE = """
+SELECT exercise_id, reps_done AS reps, MAX(load_done) AS max_load
+FROM completed_sets
+WHERE exercise_id IS NOT NULL AND reps_done > 0 AND load_done > 0
+GROUP BY exercise_id, reps_done
+"""
+
+# Current definition (migration 9): any recorded load, including sets already
+# summarized into completed_sets_archive
+REP_BESTS_ALL_TIME = """
+SELECT exercise_id, reps, MAX(max_load) AS max_load
+FROM (
+    SELECT exercise_id, reps_done AS reps, load_done AS max_load
+    FROM completed_sets
+    WHERE exercise_id IS NOT NULL AND reps_done > 0 AND load_done IS NOT NULL
+    UNION ALL
+    SELECT exercise_id, reps, max_load FROM completed_sets_archive
+) loads
+GROUP BY exercise_id, reps
+"""
+
+
+# Hot-path indexes (migration 4), built without blocking writers
+HOT_PATH_INDEXES = (
+    ("ix_completed_exercise_reps_load",
+     "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_completed_exercise_reps_load"
+     " ON completed_sets (exercise_id, reps_done, load_done)"),
+    ("ix_completed_planned_set",
+     "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_completed_planned_set ON completed_sets (planned_set_id)"),
+    ("ix_planned_exercise",
+     "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_planned_exercise ON planned_sets (exercise_id)"),
+    ("ix_daily_logs_summary",
+     "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_daily_logs_summary ON daily_logs (log_date DESC)"
+     " WHERE summary IS NOT NULL AND summary <> ''"),
+)
+
+
+# Monthly range partitioning of completed_sets on completed_at (migration 5).
+# create_completed_sets_partition() adds one month, moving any rows that
+# already landed in the default partition; ensure_completed_sets_partitions()
+# keeps the current month and the next few ready.
+COMPLETED_SETS_PARTITIONING = """
+CREATE TABLE IF NOT EXISTS completed_sets_archive (
+    log_date DATE NOT NULL,
+    exercise_id INTEGER NOT NULL REFERENCES exercises(id) ON DELETE CASCADE,
+    reps INTEGER NOT NULL,
+    sets INTEGER NOT NULL,
+    max_load REAL NOT NULL,
+    total_volume REAL NOT NULL,
+    PRIMARY KEY (log_date, exercise_id, reps)
+);
+
+-- Archived sets still count towards PRs
+CREATE OR REPLACE FUNCTION refresh_rep_best(p_exercise_id INTEGER, p_reps INTEGER) RETURNS VOID AS $$
+BEGIN
+    DELETE FROM exercise_rep_bests WHERE exercise_id = p_exercise_id AND reps = p_reps;
+    INSERT INTO exercise_rep_bests (exercise_id, reps, max_load)
+    SELECT p_exercise_id, p_reps, MAX(load)
+    FROM (
+        SELECT load_done AS load FROM completed_sets
+        WHERE exercise_id = p_exercise_id AND reps_done = p_reps AND load_done > 0
+        UNION ALL
+        SELECT max_load FROM completed_sets_archive
+        WHERE exercise_id = p_exercise_id AND reps = p_reps AND max_load > 0
+    ) loads
+    HAVING MAX(load) IS NOT NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION create_completed_sets_partition(p_month DATE) RETURNS TEXT AS $$
+DECLARE
+    v_start DATE := date_trunc('month', p_month)::date;
+    v_end DATE := (date_trunc('month', p_month) + INTERVAL '1 month')::date;
+    v_name TEXT := 'completed_sets_' || to_char(v_start, 'YYYY_MM');
+    v_pair RECORD;
+BEGIN
+    IF to_regclass(v_name) IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+    IF EXISTS (SELECT 1 FROM completed_sets_default WHERE completed_at >= v_start AND completed_at < v_end) THEN
+        EXECUTE format('CREATE TABLE %I (LIKE completed_sets INCLUDING DEFAULTS)', v_name);
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM completed_sets_default WHERE completed_at >= %L AND completed_at < %L RETURNING *) '
+            'INSERT INTO %I SELECT * FROM moved', v_start, v_end, v_name);
+        EXECUTE format('ALTER TABLE completed_sets ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                       v_name, v_start, v_end);
+        -- The move fired the delete trigger; recompute the affected bests
+        FOR v_pair IN EXECUTE format(
+            'SELECT DISTINCT exercise_id, reps_done FROM %I WHERE exercise_id IS NOT NULL AND reps_done > 0', v_name)
+        LOOP
+            PERFORM refresh_rep_best(v_pair.exercise_id, v_pair.reps_done);
+        END LOOP;
+    ELSE
+        EXECUTE format('CREATE TABLE %I PARTITION OF completed_sets FOR VALUES FROM (%L) TO (%L)',
+                       v_name, v_start, v_end);
+    END IF;
+    RETURN v_name;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION ensure_completed_sets_partitions(p_months_ahead INTEGER) RETURNS INTEGER AS $$
+DECLARE
+    v_created INTEGER := 0;
+BEGIN
+    FOR i IN 0..p_months_ahead LOOP
+        IF create_completed_sets_partition(
+               (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::date) IS NOT NULL THEN
+            v_created := v_created + 1;
+        END IF;
+    END LOOP;
+    RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+LOCK TABLE completed_sets IN ACCESS EXCLUSIVE MODE;
+ALTER TABLE completed_sets RENAME TO completed_sets_unpartitioned;
+ALTER INDEX IF EXISTS completed_sets_pkey RENAME TO completed_sets_unpartitioned_pkey;
+
+CREATE TABLE completed_sets (
+    id INTEGER NOT NULL DEFAULT nextval('completed_sets_id_seq'),
+    log_id TEXT REFERENCES daily_logs(id) ON DELETE CASCADE,
+    exercise_id INTEGER REFERENCES exercises(id),
+    planned_set_id INTEGER REFERENCES planned_sets(id),
+    reps_done INTEGER,
+    load_done REAL,
+    completed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, completed_at)
+) PARTITION BY RANGE (completed_at);
+ALTER SEQUENCE completed_sets_id_seq OWNED BY completed_sets.id;
+CREATE TABLE completed_sets_default PARTITION OF completed_sets DEFAULT;
+
+SELECT create_completed_sets_partition(month)
+FROM (SELECT DISTINCT date_trunc('month', completed_at)::date AS month
+      FROM completed_sets_unpartitioned WHERE completed_at IS NOT NULL) months;
+SELECT ensure_completed_sets_partitions(3);
+
+INSERT INTO completed_sets (id, log_id, exercise_id, planned_set_id, reps_done, load_done, completed_at)
+SELECT id, log_id, exercise_id, planned_set_id, reps_done, load_done, COALESCE(completed_at, CURRENT_TIMESTAMP)
+FROM completed_sets_unpartitioned;
+DROP TABLE completed_sets_unpartitioned;
+
+-- Indexes on the parent cascade to every partition, current and future
+CREATE INDEX ix_completed_time ON completed_sets (log_id, completed_at);
+CREATE INDEX ix_completed_exercise_reps_load ON completed_sets (exercise_id, reps_done, load_done);
+CREATE INDEX ix_completed_planned_set ON completed_sets (planned_set_id);
+
+CREATE TRIGGER trg_completed_sets_rep_bests
+AFTER INSERT OR UPDATE OR DELETE ON completed_sets
+FOR EACH ROW EXECUTE FUNCTION completed_sets_rep_bests();
+
+ANALYZE completed_sets;
+"""
+
+# Best estimated 1RM per exercise (migration 6), derived from exercise_rep_bests
+# with the Epley formula db.js uses for relative split loads. A new or raised
+# best can only raise the e1RM, so that path is a single upsert.
+E1RM_SCHEMA = """
+CREATE TABLE IF NOT EXISTS exercise_e1rm (
+    exercise_id INTEGER PRIMARY KEY REFERENCES exercises(id) ON DELETE CASCADE,
+    e1rm REAL NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION refresh_exercise_e1rm(p_exercise_id INTEGER) RETURNS VOID AS $$
+BEGIN
+    DELETE FROM exercise_e1rm WHERE exercise_id = p_exercise_id;
+    INSERT INTO exercise_e1rm (exercise_id, e1rm)
+    SELECT p_exercise_id, MAX(CASE WHEN reps = 1 THEN max_load ELSE max_load * (1 + reps / 30.0) END)
+    FROM exercise_rep_bests
+    WHERE exercise_id = p_exercise_id
+    HAVING COUNT(*) > 0;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION exercise_rep_bests_e1rm() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT'
+       OR (TG_OP = 'UPDATE' AND NEW.exercise_id = OLD.exercise_id AND NEW.reps = OLD.reps
+           AND NEW.max_load >= OLD.max_load) THEN
+        INSERT INTO exercise_e1rm (exercise_id, e1rm)
+        VALUES (NEW.exercise_id,
+                CASE WHEN NEW.reps = 1 THEN NEW.max_load ELSE NEW.max_load * (1 + NEW.reps / 30.0) END)
+        ON CONFLICT (exercise_id) DO UPDATE SET e1rm = GREATEST(exercise_e1rm.e1rm, EXCLUDED.e1rm);
+    ELSE
+        PERFORM refresh_exercise_e1rm(OLD.exercise_id);
+        IF TG_OP = 'UPDATE' AND NEW.exercise_id <> OLD.exercise_id THEN
+            PERFORM refresh_exercise_e1rm(NEW.exercise_id);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_exercise_rep_bests_e1rm ON exercise_rep_bests;
+CREATE TRIGGER trg_exercise_rep_bests_e1rm
+AFTER INSERT OR UPDATE OR DELETE ON exercise_rep_bests
+FOR EACH ROW EXECUTE FUNCTION exercise_rep_bests_e1rm();
+
+INSERT INTO exercise_e1rm (exercise_id, e1rm)
+SELECT exercise_id, MAX(CASE WHEN reps = 1 THEN max_load ELSE max_load * (1 + reps / 30.0) END)
+FROM exercise_rep_bests
+GROUP BY exercise_id
+ON CONFLICT (exercise_id) DO UPDATE SET e1rm = EXCLUDED.e1rm;
+"""
+
+# Migration 7: a month detached with --keep-detached used to keep its
+# completed_sets_YYYY_MM name, and to_regclass() then made the month look
+# present, so it was never partitioned again and its rows went to the default
+# partition. Only an attached partition counts now; any other table of that
+# name is renamed out of the way first.
+DETACHED_PARTITION_CLASH = """
+CREATE OR REPLACE FUNCTION create_completed_sets_partition(p_month DATE) RETURNS TEXT AS $$
+DECLARE
+    v_start DATE := date_trunc('month', p_month)::date;
+    v_end DATE := (date_trunc('month', p_month) + INTERVAL '1 month')::date;
+    v_name TEXT := 'completed_sets_' || to_char(v_start, 'YYYY_MM');
+    v_pair RECORD;
+BEGIN
+    IF to_regclass(v_name) IS NOT NULL THEN
+        IF EXISTS (SELECT 1 FROM pg_inherits
+                   WHERE inhrelid = to_regclass(v_name) AND inhparent = 'completed_sets'::regclass) THEN
+            RETURN NULL;
+        END IF;
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', v_name,
+                       v_name || '_detached_' || to_char(clock_timestamp(), 'YYYYMMDD_HH24MISS'));
+    END IF;
+    IF EXISTS (SELECT 1 FROM completed_sets_default WHERE completed_at >= v_start AND completed_at < v_end) THEN
+        EXECUTE format('CREATE TABLE %I (LIKE completed_sets INCLUDING DEFAULTS)', v_name);
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM completed_sets_default WHERE completed_at >= %L AND completed_at < %L RETURNING *) '
+            'INSERT INTO %I SELECT * FROM moved', v_start, v_end, v_name);
+        EXECUTE format('ALTER TABLE completed_sets ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                       v_name, v_start, v_end);
+        -- The move fired the delete trigger; recompute the affected bests
+        FOR v_pair IN EXECUTE format(
+            'SELECT DISTINCT exercise_id, reps_done FROM %I WHERE exercise_id IS NOT NULL AND reps_done > 0', v_name)
+        LOOP
+            PERFORM refresh_rep_best(v_pair.exercise_id, v_pair.reps_done);
+        END LOOP;
+    ELSE
+        EXECUTE format('CREATE TABLE %I PARTITION OF completed_sets FOR VALUES FROM (%L) TO (%L)',
+                       v_name, v_start, v_end);
+    END IF;
+    RETURN v_name;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+@dataclass(frozen=True)
+class Migration:
+    """One schema version: either transactional SQL or CONCURRENTLY-built indexes."""
+    version: int
+    name: str
+    sql: str = ""
+    # (index name, CREATE INDEX CONCURRENTLY statement); run outside a transaction
+    concurrent_indexes: Tuple[Tuple[str, str], ...] = ()
+
+    @property
+    def checksum(self) -> str:
+        body = self.sql + "".join(stmt for _, stmt in self.concurrent_indexes)
+        return hashlib.sha256(" ".join(body.split()).encode()).hexdigest()
+
+
+# Migration 8: complete_planned_set deletes the planned row in the same
+# statement, so a completion records that it was planned, and the planned reps
+# and load, on its own row. planned_set_id still links rows whose plan is kept
+# (sample data, db.js) and is nulled rather than blocking a plan delete.
+PLANNED_COMPLETIONS = """
+ALTER TABLE completed_sets
+    ADD COLUMN IF NOT EXISTS planned BOOLEAN NOT NULL DEFAULT FALSE,
+    ADD COLUMN IF NOT EXISTS planned_reps INTEGER,
+    ADD COLUMN IF NOT EXISTS planned_load REAL;
+ALTER TABLE completed_sets_archive ADD COLUMN IF NOT EXISTS planned_sets INTEGER NOT NULL DEFAULT 0;
+
+UPDATE completed_sets cs SET planned = TRUE, planned_reps = ps.reps, planned_load = ps.load
+FROM planned_sets ps WHERE cs.planned_set_id = ps.id;
+
+ALTER TABLE completed_sets DROP CONSTRAINT IF EXISTS completed_sets_planned_set_id_fkey;
+ALTER TABLE completed_sets ADD CONSTRAINT completed_sets_planned_set_id_fkey
+    FOREIGN KEY (planned_set_id) REFERENCES planned_sets(id) ON DELETE SET NULL;
+"""
+
+# Migration 9: PR lookups before exercise_rep_bests (db.get_current_prs)
+# returned bodyweight and zero-load sets; count any recorded load again and
+# add the bests that migrations 3 and 5 left out.
+ZERO_LOAD_BESTS = """
+CREATE OR REPLACE FUNCTION refresh_rep_best(p_exercise_id INTEGER, p_reps INTEGER) RETURNS VOID AS $$
+BEGIN
+    DELETE FROM exercise_rep_bests WHERE exercise_id = p_exercise_id AND reps = p_reps;
+    INSERT INTO exercise_rep_bests (exercise_id, reps, max_load)
+    SELECT p_exercise_id, p_reps, MAX(load)
+    FROM (
+        SELECT load_done AS load FROM completed_sets
+        WHERE exercise_id = p_exercise_id AND reps_done = p_reps AND load_done IS NOT NULL
+        UNION ALL
+        SELECT max_load FROM completed_sets_archive
+        WHERE exercise_id = p_exercise_id AND reps = p_reps
+    ) loads
+    HAVING MAX(load) IS NOT NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION completed_sets_rep_bests() RETURNS TRIGGER AS $$
+BEGIN
+    -- A removed or changed set only matters if it was (tied for) the best
+    IF TG_OP IN ('UPDATE', 'DELETE')
+       AND OLD.exercise_id IS NOT NULL AND OLD.reps_done > 0 AND OLD.load_done IS NOT NULL
+       AND OLD.load_done >= COALESCE(
+           (SELECT max_load FROM exercise_rep_bests
+            WHERE exercise_id = OLD.exercise_id AND reps = OLD.reps_done), '-Infinity'::real) THEN
+        PERFORM refresh_rep_best(OLD.exercise_id, OLD.reps_done);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE')
+       AND NEW.exercise_id IS NOT NULL AND NEW.reps_done > 0 AND NEW.load_done IS NOT NULL THEN
+        INSERT INTO exercise_rep_bests (exercise_id, reps, max_load)
+        VALUES (NEW.exercise_id, NEW.reps_done, NEW.load_done)
+        ON CONFLICT (exercise_id, reps)
+        DO UPDATE SET max_load = GREATEST(exercise_rep_bests.max_load, EXCLUDED.max_load);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Existing rows already hold the best positive load; only zero-load pairs are new
+LOCK TABLE exercise_rep_bests IN EXCLUSIVE MODE;
+INSERT INTO exercise_rep_bests (exercise_id, reps, max_load)
+SELECT exercise_id, reps, MAX(max_load)
+FROM (
+    SELECT exercise_id, reps_done AS reps, load_done AS max_load
+    FROM completed_sets
+    WHERE exercise_id IS NOT NULL AND reps_done > 0 AND load_done IS NOT NULL
+    UNION ALL
+    SELECT exercise_id, reps, max_load FROM completed_sets_archive
+) loads
+GROUP BY exercise_id, reps
+ON CONFLICT (exercise_id, reps) DO NOTHING;
+"""
+
+# Append only: an applied migration's SQL must not change (its checksum is recorded)
+MIGRATIONS = (
+    Migration(1, "base schema", SCHEMA),
+    Migration(2, "late columns", LATE_COLUMNS),
+    Migration(3, "exercise rep bests", REP_BESTS_SCHEMA + f"""
+        LOCK TABLE exercise_rep_bests IN EXCLUSIVE MODE;
+        DELETE FROM exercise_rep_bests;
+        INSERT INTO exercise_rep_bests (exercise_id, reps, max_load) {REP_BESTS_AGGREGATE};
+    """),
+    Migration(4, "hot path indexes", concurrent_indexes=HOT_PATH_INDEXES),
+    Migration(5, "partition completed_sets by month", COMPLETED_SETS_PARTITIONING),
+    Migration(6, "exercise e1rm", E1RM_SCHEMA),
+    Migration(7, "recreate months over detached partitions", DETACHED_PARTITION_CLASH),
+    Migration(8, "planned flag on completed sets", PLANNED_COMPLETIONS),
+    Migration(9, "zero-load rep bests", ZERO_LOAD_BESTS),
+)
+
+MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    checksum TEXT NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+# Serializes concurrent migrators (service, scripts) on the same database
+MIGRATION_LOCK_ID = 724_311_021
+
 
 def init_db(sample: bool = False):
-    """Create a new database schema. If sample=True, populate with demo data."""
-    conn = get_connection()
-    try:
+    """Bring the schema up to date without touching existing data.
+
+    Seeds the default tracked exercises on an empty database; if sample=True
+    and there are no daily logs yet, also loads the demo workouts. Use
+    reset_db() to start over.
+    """
+    apply_migrations()
+    maintain_partitions()
+    with pooled_connection() as conn:
         cur = conn.cursor()
-        # Execute schema (drops and recreates tables)
-        cur.execute(SCHEMA)
-        
-        # Initialize with default tracked exercises
         cur.execute("""
-            INSERT INTO tracked_exercises (exercise) VALUES 
-            ('Bench Press'), ('Squat'), ('Deadlift')
+            INSERT INTO tracked_exercises (exercise)
+            SELECT name FROM (VALUES ('Bench Press'), ('Squat'), ('Deadlift')) AS d(name)
+            WHERE NOT EXISTS (SELECT 1 FROM tracked_exercises)
         """)
-        
         if sample:
-            populate_comprehensive_sample_data(conn)
+            cur.execute("SELECT EXISTS (SELECT 1 FROM daily_logs)")
+            if not cur.fetchone()[0]:
+                populate_comprehensive_sample_data(conn)
+        conn.commit()
+    bump_data_version()
+
+
+def reset_db(sample: bool = False):
+    """Drop every app table and rebuild the schema from scratch. Deletes all data."""
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("DROP TABLE IF EXISTS " + ", ".join(APP_TABLES) + " CASCADE")
         conn.commit()
     finally:
         conn.close()
+    close_pool()
+    invalidate_today_log_cache()
+    init_db(sample=sample)
+
+
+PARTITION_MONTHS_AHEAD = int(os.environ.get("PARTITION_MONTHS_AHEAD", "3"))
+ARCHIVE_KEEP_MONTHS = int(os.environ.get("ARCHIVE_KEEP_MONTHS", "24"))
+
+COMPLETED_SETS_PARTITIONS_SQL = r"""
+SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'completed_sets'::regclass AND c.relname ~ '^completed_sets_\d{4}_\d{2}$'
+ORDER BY c.relname
+"""
+
+# Per day, exercise and rep count; enough for history totals and PRs
+ARCHIVE_PARTITION_SQL = """
+INSERT INTO completed_sets_archive (log_date, exercise_id, reps, sets, max_load, total_volume, planned_sets)
+SELECT COALESCE(dl.log_date, cs.completed_at::date), cs.exercise_id, cs.reps_done,
+       COUNT(*), MAX(COALESCE(cs.load_done, 0)), SUM(cs.reps_done * COALESCE(cs.load_done, 0)),
+       COUNT(*) FILTER (WHERE cs.planned OR cs.planned_set_id IS NOT NULL)
+FROM {partition} cs
+LEFT JOIN daily_logs dl ON dl.id = cs.log_id
+WHERE cs.exercise_id IS NOT NULL AND cs.reps_done > 0
+GROUP BY 1, 2, 3
+ON CONFLICT (log_date, exercise_id, reps) DO UPDATE SET
+    sets = completed_sets_archive.sets + EXCLUDED.sets,
+    max_load = GREATEST(completed_sets_archive.max_load, EXCLUDED.max_load),
+    total_volume = completed_sets_archive.total_volume + EXCLUDED.total_volume,
+    planned_sets = completed_sets_archive.planned_sets + EXCLUDED.planned_sets
+"""
+
+
+def maintain_partitions(months_ahead: int = PARTITION_MONTHS_AHEAD) -> int:
+    """Create completed_sets partitions for this month and the next few; returns how many were added."""
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT ensure_completed_sets_partitions(%s)", (months_ahead,))
+        created = cur.fetchone()[0]
+        conn.commit()
+    return created
+
+
+def archive_completed_sets(keep_months: int = ARCHIVE_KEEP_MONTHS, drop: bool = True):
+    """Summarize monthly partitions older than keep_months into completed_sets_archive.
+
+    Each archived partition is detached from completed_sets and, unless
+    drop=False, dropped. A kept table is renamed to
+    completed_sets_YYYY_MM_detached_<timestamp> so the month can be
+    partitioned again. PRs are unaffected. Returns the partition names.
+    """
+    today = current_log_date()
+    months = today.year * 12 + today.month - 1 - keep_months
+    cutoff = date(months // 12, months % 12 + 1, 1)
+    archived = []
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(COMPLETED_SETS_PARTITIONS_SQL)
+        for (name,) in cur.fetchall():
+            if date(int(name[-7:-3]), int(name[-2:]), 1) >= cutoff:
+                continue
+            cur.execute(ARCHIVE_PARTITION_SQL.format(partition=name))
+            cur.execute(f"ALTER TABLE completed_sets DETACH PARTITION {name}")
+            if drop:
+                cur.execute(f"DROP TABLE {name}")
+            else:
+                cur.execute(f"ALTER TABLE {name} RENAME TO {name}_detached_{datetime.now():%Y%m%d_%H%M%S}")
+            archived.append(name)
+        conn.commit()
+    if archived:
+        bump_data_version()
+    return archived
 
 
 def populate_comprehensive_sample_data(conn):
@@ -161,7 +836,10 @@ def populate_comprehensive_sample_data(conn):
     
     exercise_ids = {}
     for exercise in exercises:
-        cur.execute("INSERT INTO exercises (name) VALUES (%s) RETURNING id", (exercise,))
+        cur.execute(
+            "INSERT INTO exercises (name) VALUES (%s) ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name RETURNING id",
+            (exercise,),
+        )
         exercise_ids[exercise] = cur.fetchone()[0]
     
     # Day 1 (2 days ago) - Upper Body Focus
@@ -314,163 +992,339 @@ def populate_sample_data(conn):
     return populate_comprehensive_sample_data(conn)
 
 
-def get_today_log_id(conn):
-    today = date.today().isoformat()
+def current_log_date() -> date:
+    """The workout day "now" belongs to, honouring WORKOUT_TZ and DAY_ROLLOVER_HOUR."""
+    now = datetime.now(ZoneInfo(WORKOUT_TZ)) if WORKOUT_TZ else datetime.now()
+    return (now - timedelta(hours=DAY_ROLLOVER_HOUR)).date()
+
+
+TODAY_LOG_UPSERT_SQL = """
+    INSERT INTO daily_logs (id, log_date) VALUES (%s, %s)
+    ON CONFLICT (log_date) DO UPDATE SET log_date = EXCLUDED.log_date
+    RETURNING id, (xmax = 0) AS inserted
+"""
+
+TODAY_LOG_SELECT_SQL = "SELECT id FROM daily_logs WHERE log_date = %s"
+
+register("today_log_upsert", TODAY_LOG_UPSERT_SQL)
+register("today_log_select", TODAY_LOG_SELECT_SQL)
+
+
+def cached_log_id(day: date):
+    return _log_id_cache.get(day)
+
+
+def remember_log_id(day: date, log_id: str):
+    # Only today's entry is ever useful, so the cache rolls over with the day
+    _log_id_cache.clear()
+    _log_id_cache[day] = log_id
+
+
+def get_today_log_id(conn, create: bool = True):
+    """Return today's daily_logs id, creating the row if needed (unless create=False).
+
+    The id is cached per date, so repeat calls cost no round trip. Creation is a
+    single race-free upsert and is left for the caller to commit; a freshly
+    inserted id stays local to this connection and is only published to the
+    shared cache once the transaction has committed (see ``_release``), so no
+    other connection can reference a row it cannot see yet.
+    """
+    today = current_log_date()
+    log_id = cached_log_id(today)
+    if log_id is not None:
+        return log_id
+    pending = _uncommitted_log_ids.get(id(conn))
+    if pending is not None and pending[0] == today:
+        return pending[1]
     cur = conn.cursor()
-    cur.execute("SELECT id FROM daily_logs WHERE log_date = %s", (today,))
-    row = cur.fetchone()
-    if row:
-        return row[0]
-    log_id = str(uuid.uuid4())
-    cur.execute("INSERT INTO daily_logs (id, log_date) VALUES (%s, %s)", (log_id, today))
-    conn.commit()
+    if create:
+        # DO UPDATE so the existing id is returned; xmax = 0 only for fresh inserts
+        execute_prepared(cur, "today_log_upsert", (str(uuid.uuid4()), today))
+        log_id, inserted = cur.fetchone()
+        if inserted:
+            _uncommitted_log_ids[id(conn)] = (today, log_id)
+            return log_id
+    else:
+        execute_prepared(cur, "today_log_select", (today,))
+        row = cur.fetchone()
+        if row is None:
+            return None
+        log_id = row[0]
+    remember_log_id(today, log_id)
     return log_id
 
-def save_chat_message(message_type, content):
-    """Save a chat message to the database and keep only the last 25 messages"""
-    conn = get_connection()
-    try:
+
+def invalidate_today_log_cache():
+    """Forget cached daily_logs ids, e.g. after days were deleted or edited."""
+    _log_id_cache.clear()
+
+# Chat memory: appends are a single INSERT; trimming to the retention limit
+# happens lazily every CHAT_TRIM_EVERY appends per conversation, since reads
+# only ever look at the newest rows anyway.
+DEFAULT_CONVERSATION = "default"
+CHAT_MEMORY_LIMIT = int(os.environ.get("CHAT_MEMORY_LIMIT", "25"))
+CHAT_TRIM_EVERY = int(os.environ.get("CHAT_TRIM_EVERY", "10"))
+_chat_memory_limits = {}
+_appends_since_trim = {}
+
+
+def set_chat_memory_limit(conversation_id, limit):
+    """Override how many messages are retained for one conversation"""
+    _chat_memory_limits[conversation_id] = limit
+
+
+def get_chat_memory_limit(conversation_id=DEFAULT_CONVERSATION):
+    return _chat_memory_limits.get(conversation_id, CHAT_MEMORY_LIMIT)
+
+
+def _append_chat_messages(messages, conversation_id):
+    with pooled_connection() as conn:
         cur = conn.cursor()
-        
-        # Insert the new message
-        cur.execute(
-            "INSERT INTO chat_messages (message_type, content) VALUES (%s, %s)",
-            (message_type, content)
+        psycopg2.extras.execute_values(
+            cur,
+            "INSERT INTO chat_messages (conversation_id, message_type, content) VALUES %s",
+            [(conversation_id, message_type, content) for message_type, content in messages],
         )
-        
-        # Keep only the last 25 messages
-        cur.execute("""
-            DELETE FROM chat_messages 
-            WHERE id NOT IN (
-                SELECT id FROM chat_messages 
-                ORDER BY timestamp DESC 
-                LIMIT 25
-            )
-        """)
-        
+        pending = _appends_since_trim.get(conversation_id, 0) + len(messages)
+        if pending >= CHAT_TRIM_EVERY:
+            _trim_chat_messages(cur, conversation_id)
+            pending = 0
         conn.commit()
-    finally:
-        conn.close()
+    _appends_since_trim[conversation_id] = pending
 
-def get_recent_chat_messages(limit=25):
-    """Get the most recent chat messages, ordered chronologically"""
-    conn = get_connection()
-    try:
+
+def _trim_chat_messages(cur, conversation_id):
+    """Delete everything older than the newest N messages (index-backed keyset delete)"""
+    cur.execute("""
+        DELETE FROM chat_messages
+        WHERE conversation_id = %s AND id <= (
+            SELECT id FROM chat_messages
+            WHERE conversation_id = %s
+            ORDER BY id DESC
+            OFFSET %s LIMIT 1
+        )
+    """, (conversation_id, conversation_id, get_chat_memory_limit(conversation_id)))
+
+def save_chat_message(message_type, content, conversation_id=DEFAULT_CONVERSATION):
+    """Append a chat message to the conversation's memory"""
+    _append_chat_messages([(message_type, content)], conversation_id)
+
+def save_chat_exchange(user_content, assistant_content, conversation_id=DEFAULT_CONVERSATION):
+    """Append a user message and the assistant reply in one transaction"""
+    _append_chat_messages([('user', user_content), ('assistant', assistant_content)], conversation_id)
+
+def get_recent_chat_messages(limit=None, conversation_id=DEFAULT_CONVERSATION):
+    """Get the newest chat messages of a conversation, ordered chronologically"""
+    if limit is None:
+        limit = get_chat_memory_limit(conversation_id)
+    with pooled_connection() as conn:
         cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
         cur.execute("""
-            SELECT message_type, content, timestamp 
-            FROM chat_messages 
-            ORDER BY timestamp ASC 
-            LIMIT %s
-        """, (limit,))
+            SELECT id, message_type, content, timestamp
+            FROM (
+                SELECT id, message_type, content, timestamp
+                FROM chat_messages
+                WHERE conversation_id = %s
+                ORDER BY id DESC
+                LIMIT %s
+            ) newest
+            ORDER BY id ASC
+        """, (conversation_id, limit))
         
         messages = []
         for row in cur.fetchall():
             messages.append({
+                'id': row['id'],
                 'type': row['message_type'],
                 'content': row['content'],
                 'timestamp': row['timestamp'].isoformat()
             })
         
         return messages
-    finally:
-        conn.close()
 
-def clear_chat_memory():
-    """Clear all chat messages from the database"""
-    conn = get_connection()
-    try:
+def clear_chat_memory(conversation_id=None):
+    """Clear chat messages for one conversation, or all of them"""
+    with pooled_connection() as conn:
         cur = conn.cursor()
-        cur.execute("DELETE FROM chat_messages")
+        if conversation_id is None:
+            cur.execute("DELETE FROM chat_messages")
+        else:
+            cur.execute("DELETE FROM chat_messages WHERE conversation_id = %s", (conversation_id,))
         conn.commit()
-    finally:
-        conn.close()
+
+def _applied_migrations():
+    """Recorded {version: checksum}; empty if the database has never been migrated."""
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT version, checksum FROM schema_migrations")
+        except psycopg2.errors.UndefinedTable:
+            conn.rollback()
+            return {}
+        applied = dict(cur.fetchall())
+        conn.commit()
+        return applied
+
+
+def _pending_migrations(applied):
+    """Migrations not yet recorded; refuses to run if a recorded one has changed."""
+    pending = []
+    for migration in MIGRATIONS:
+        checksum = applied.get(migration.version)
+        if checksum is None:
+            pending.append(migration)
+        elif checksum != migration.checksum:
+            raise RuntimeError(
+                f"Migration {migration.version} ({migration.name}) was changed after it was applied; "
+                "add a new migration instead"
+            )
+    return pending
+
+
+def _build_index_concurrently(cur, name, statement):
+    # A failed CONCURRENTLY build leaves an INVALID index that IF NOT EXISTS would skip
+    cur.execute(
+        """
+        SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = %s AND NOT i.indisvalid
+        """,
+        (name,),
+    )
+    if cur.fetchone():
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    cur.execute(statement)
+
 
 def apply_migrations():
-    """Apply incremental schema changes."""
+    """Apply pending schema migrations in order; returns the versions applied.
+
+    When the schema is current this is a single query. Otherwise migrations
+    run under an advisory lock on a dedicated connection, each in its own
+    transaction together with its schema_migrations row.
+    """
+    if not _pending_migrations(_applied_migrations()):
+        return []
+
+    applied_now = []
     conn = get_connection()
     try:
+        conn.autocommit = True
         cur = conn.cursor()
-        # Add planned_set_id column to completed_sets if it does not exist
-        cur.execute(
-            """
-            SELECT column_name FROM information_schema.columns
-            WHERE table_name='completed_sets' AND column_name='planned_set_id'
-            """
-        )
-        if not cur.fetchone():
-            cur.execute(
-                "ALTER TABLE completed_sets ADD COLUMN planned_set_id INTEGER REFERENCES planned_sets(id)"
-            )
-        conn.commit()
+        cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+        try:
+            cur.execute(MIGRATIONS_TABLE)
+            cur.execute("SELECT version, checksum FROM schema_migrations")
+            for migration in _pending_migrations(dict(cur.fetchall())):
+                started = time.perf_counter()
+                record = (
+                    "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                    (migration.version, migration.name, migration.checksum),
+                )
+                if migration.concurrent_indexes:
+                    for name, statement in migration.concurrent_indexes:
+                        _build_index_concurrently(cur, name, statement)
+                    cur.execute(*record)
+                else:
+                    conn.autocommit = False
+                    try:
+                        cur.execute(migration.sql)
+                        cur.execute(*record)
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
+                    finally:
+                        conn.autocommit = True
+                applied_now.append(migration.version)
+                print(f"Applied migration {migration.version} ({migration.name}) "
+                      f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+        finally:
+            cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
     finally:
         conn.close()
+    if applied_now:
+        bump_data_version()
+    return applied_now
+
+def backfill_rep_bests(conn):
+    """Rebuild exercise_rep_bests from completed_sets (and the archive) in the caller's transaction."""
+    cur = conn.cursor()
+    cur.execute("LOCK TABLE exercise_rep_bests IN EXCLUSIVE MODE")
+    cur.execute("DELETE FROM exercise_rep_bests")
+    cur.execute(f"INSERT INTO exercise_rep_bests (exercise_id, reps, max_load) {REP_BESTS_ALL_TIME}")
+    return cur.rowcount
+
+def check_rep_bests(repair: bool = False):
+    """Compare exercise_rep_bests with a full aggregation of completed_sets and its archive.
+
+    Returns the mismatching (exercise_id, reps, stored, actual) rows; with
+    repair=True the table is rebuilt when any are found.
+    """
+    with pooled_connection() as conn:
+        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cur.execute(f"""
+            SELECT COALESCE(b.exercise_id, a.exercise_id) AS exercise_id,
+                   COALESCE(b.reps, a.reps) AS reps,
+                   b.max_load AS stored,
+                   a.max_load AS actual
+            FROM exercise_rep_bests b
+            FULL OUTER JOIN ({REP_BESTS_ALL_TIME}) a
+              ON a.exercise_id = b.exercise_id AND a.reps = b.reps
+            WHERE b.max_load IS DISTINCT FROM a.max_load
+            ORDER BY 1, 2
+        """)
+        mismatches = [dict(row) for row in cur.fetchall()]
+        if mismatches and repair:
+            backfill_rep_bests(conn)
+            conn.commit()
+            bump_data_version()
+        return mismatches
 
 def get_tracked_exercises():
     """Get all tracked exercises from the database"""
-    conn = get_connection()
-    try:
+    with pooled_connection() as conn:
         cur = conn.cursor()
         cur.execute("SELECT exercise FROM tracked_exercises ORDER BY exercise")
         return [row[0] for row in cur.fetchall()]
-    finally:
-        conn.close()
 
 def add_tracked_exercise(exercise_name):
     """Add a new tracked exercise"""
-    conn = get_connection()
-    try:
+    with pooled_connection() as conn:
         cur = conn.cursor()
         cur.execute("INSERT INTO tracked_exercises (exercise) VALUES (%s)", (exercise_name,))
         conn.commit()
-    finally:
-        conn.close()
+    bump_data_version()
 
 def remove_tracked_exercise(exercise_name):
     """Remove a tracked exercise"""
-    conn = get_connection()
-    try:
+    with pooled_connection() as conn:
         cur = conn.cursor()
         cur.execute("DELETE FROM tracked_exercises WHERE exercise = %s", (exercise_name,))
         conn.commit()
-    finally:
-        conn.close()
+    bump_data_version()
 
 def get_current_prs():
     """Get current PRs for all tracked exercises"""
-    conn = get_connection()
-    try:
+    with pooled_connection() as conn:
         cur = conn.cursor()
-        
-        # Get all tracked exercises
-        tracked_exercises = get_tracked_exercises()
-        
-        if not tracked_exercises:
-            return []
-        
-        # Build query for all tracked exercises
-        placeholders = ','.join(['%s'] * len(tracked_exercises))
-        
-        cur.execute(f"""
-            SELECT 
-                e.name as exercise,
-                cs.reps_done as reps,
-                MAX(cs.load_done) as max_load
-            FROM completed_sets cs
-            JOIN exercises e ON cs.exercise_id = e.id
-            WHERE e.name IN ({placeholders})
-            AND cs.reps_done IS NOT NULL 
-            AND cs.load_done IS NOT NULL
-            GROUP BY e.name, cs.reps_done
-            ORDER BY e.name, cs.reps_done
-        """, tracked_exercises)
+        cur.execute("""
+            SELECT e.name AS exercise, b.reps, b.max_load
+            FROM tracked_exercises t
+            JOIN exercises e ON e.name = t.exercise
+            JOIN exercise_rep_bests b ON b.exercise_id = e.id
+            ORDER BY e.name, b.reps
+        """)
         
         return [{'exercise': row[0], 'reps': row[1], 'max_load': row[2]} for row in cur.fetchall()]
-    finally:
-        conn.close()
 
 if __name__ == "__main__":
-    print("Resetting database with new schema...")
-    init_db(sample=False)
-    apply_migrations()
-    print("Database reset complete with sample data!")
+    import sys
+    if "--reset" in sys.argv:
+        print("Resetting database (all data will be deleted)...")
+        reset_db(sample="--sample" in sys.argv)
+    elif "--archive" in sys.argv:
+        archived = archive_completed_sets(drop="--keep-detached" not in sys.argv)
+        print(f"Archived {len(archived)} partition(s): {', '.join(archived) or 'none'}")
+    else:
+        init_db(sample="--sample" in sys.argv)
+    print("Database schema is up to date.")
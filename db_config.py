@@ -12,6 +12,11 @@ DB_PORT=5432
 DB_NAME=workout_tracker
 DB_USER=postgres
 DB_PASSWORD=your_password_here
+DB_POOL_MIN=1
+DB_POOL_MAX=10
+DB_POOL_HEALTH_CHECK_AFTER=30
+DB_POOL_TIMEOUT=30
+DB_POOL_MAX_IDLE=600
 """
 
 import os
@@ -29,6 +34,14 @@ def get_db_config() -> Dict[str, str]:
         "database": os.environ.get("DB_NAME", "workout_tracker"),
         "user": os.environ.get("DB_USER", "postgres"),
         "password": os.environ.get("DB_PASSWORD", ""),
+        "pool_min_size": os.environ.get("DB_POOL_MIN", "1"),
+        "pool_max_size": os.environ.get("DB_POOL_MAX", "10"),
+        # Seconds a pooled connection may sit idle before it is pinged on checkout
+        "pool_health_check_after": os.environ.get("DB_POOL_HEALTH_CHECK_AFTER", "30"),
+        # Seconds to wait for a free connection once all DB_POOL_MAX are checked out
+        "pool_timeout": os.environ.get("DB_POOL_TIMEOUT", "30"),
+        # Seconds an idle connection is kept by the async pool before it is closed (psycopg default)
+        "pool_max_idle": os.environ.get("DB_POOL_MAX_IDLE", "600"),
     }
 
 def print_config():
@@ -40,6 +53,7 @@ def print_config():
     print(f"  Database: {config['database']}")
     print(f"  User: {config['user']}")
     print(f"  Password: {'*' * len(config['password']) if config['password'] else '(not set)'}")
+    print(f"  Pool size: {config['pool_min_size']}-{config['pool_max_size']}")
 
 if __name__ == "__main__":
     print_config() 
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""Deterministic fast path for common chat commands.
+
+Short messages such as "done", "did 8 reps at 185", "what's my timer" or
+"what's next" are matched against a small set of patterns and handled by
+calling the tool implementations directly, with a templated reply. Anything
+the router is not sure about returns None so the caller falls back to the
+agent. Set INTENT_FAST_PATH=0 to send everything to the agent.
+"""
+
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import workout_ops
+from timer_engine import DEFAULT_TIMER, MAX_TIMER_SECONDS, engine as timer_engine
+
+INTENT_FAST_PATH = os.environ.get("INTENT_FAST_PATH", "1") != "0"
+
+_EXERCISE = r"(?P<exercise>[a-z][a-z' -]*?)"
+_LOAD = r"(?P<load>\d+(?:\.\d+)?)(?: ?(?:lbs?|pounds))?"
+_DID = r"(?:i )?(?:just )?(?:did|got|hit|completed|finished|logged)"
+
+PATTERNS = [
+    # The most common message: a bare "done" / "finished" after a set
+    ("complete_set", re.compile(r"^(?:just )?(?:done|finished|completed?)$")),
+    # With a subject ("I'm done") it may mean the whole workout, so a set or exercise must be named
+    ("complete_set", re.compile(
+        r"^(?:i'?m |i am |i )?(?:just )?(?:done|finished|completed?)(?: with)?"
+        r"(?: (?:a|my|the|that|this|another|next))? set$"
+    )),
+    # "finished bench", "done with my squats"; only dispatched if the exercise is planned today
+    ("complete_set", re.compile(
+        rf"^(?:i'?m |i am |i )?(?:just )?(?:done|finished|completed?)(?: with)?(?: (?:my|the))? {_EXERCISE}$"
+    )),
+    ("complete_set", re.compile(r"^(?:next |that |this )?set (?:done|finished|completed?)$")),
+    # "did 8 reps at 185", "8 reps @ 185 lbs on bench press", "did 5 of squat at 225"
+    ("complete_set", re.compile(
+        rf"^(?:{_DID} )?(?P<reps>\d+)(?: ?reps?)?(?: (?:of|on|for) {_EXERCISE})?"
+        rf" ?(?:at|@|with|x) ?{_LOAD}(?: (?:of|on|for) {_EXERCISE.replace('exercise', 'exercise2')})?$"
+    )),
+    ("complete_set", re.compile(rf"^{_DID} (?P<reps>\d+) reps?(?: (?:of|on|for) {_EXERCISE})?$")),
+    ("timer_status", re.compile(
+        r"^(?:(?:what'?s|what is|how'?s|check)(?: on)? (?:my |the )?(?:rest )?timer(?: status| at)?"
+        r"|how (?:much|long)(?: time)? (?:is )?left(?: on (?:my |the )?timer)?"
+        r"|timer(?: status)?)$"
+    )),
+    ("set_timer", re.compile(
+        r"^(?:set|start)(?: a| an| the| my)?(?: rest)? timer (?:for )?(?P<amount>\d+) ?(?P<unit>[a-z]+)$"
+    )),
+    ("set_timer", re.compile(
+        r"^(?:set|start)(?: a| an)? (?P<amount>\d+)[ -]?(?P<unit>[a-z]+) (?:rest )?timer$"
+    )),
+    ("whats_next", re.compile(
+        r"^(?:(?:what'?s|what is) (?:my )?next(?: set| exercise| up)?|next(?: set)?|what do i do next)$"
+    )),
+]
+
+# "done for today", "finished my workout": the session, not a set; left to the agent
+_WORKOUT_END = re.compile(r"\b(?:for (?:today|the day|now|tonight)|workouts?|sessions?|training|gym|day)\b")
+
+_SECONDS = {"s", "sec", "secs", "second", "seconds"}
+_MINUTES = {"m", "min", "mins", "minute", "minutes"}
+
+
+@dataclass
+class Intent:
+    name: str
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+_stats = {"handled": 0, "fallback": 0}
+_stats_lock = threading.Lock()
+
+
+def _normalize(message: str) -> str:
+    text = message.strip().lower().replace("’", "'")
+    text = re.sub(r"[.!?]+$", "", text)
+    return " ".join(text.split())
+
+
+def match(message: str) -> Optional[Intent]:
+    """Return the intent for a message, or None if no pattern matches it exactly."""
+    text = _normalize(message)
+    for name, pattern in PATTERNS:
+        m = pattern.match(text)
+        if not m:
+            continue
+        if name == "complete_set" and _WORKOUT_END.search(text):
+            return None
+        groups = {k: v for k, v in m.groupdict().items() if v is not None}
+        args: Dict[str, Any] = {}
+        if "reps" in groups:
+            args["reps"] = int(groups["reps"])
+        if "load" in groups:
+            args["load"] = float(groups["load"])
+        exercise = groups.get("exercise") or groups.get("exercise2")
+        if exercise:
+            args["exercise"] = exercise.strip()
+        if "amount" in groups:
+            unit = groups["unit"]
+            if unit in _SECONDS:
+                args["seconds"] = int(groups["amount"])
+            elif unit in _MINUTES:
+                args["seconds"] = int(groups["amount"]) * 60
+            else:
+                return None
+        return Intent(name, args)
+    return None
+
+
+def _planned_exercise_name(exercise: str) -> Optional[str]:
+    """Resolve a spoken exercise name against today's plan, or None if it is not planned."""
+    key = workout_ops.normalize_exercise_name(exercise)
+    for item in workout_ops.get_today_plan():
+        if workout_ops.normalize_exercise_name(item["exercise"]) == key:
+            return item["exercise"]
+    return None
+
+
+def dispatch(intent: Intent) -> Optional[str]:
+    """Run an intent and return the reply, or None to let the agent handle it."""
+    if intent.name == "complete_set":
+        exercise = intent.args.get("exercise")
+        if exercise:
+            exercise = _planned_exercise_name(exercise)
+            if exercise is None:
+                return None
+        try:
+            return workout_ops.complete_planned_set(exercise, intent.args.get("reps"), intent.args.get("load"))
+        except ValueError:
+            # Out-of-range values; the agent can explain or ask
+            return None
+
+    if intent.name == "timer_status":
+        return timer_engine.status(DEFAULT_TIMER)["message"]
+
+    if intent.name == "set_timer":
+        seconds = intent.args["seconds"]
+        if not (1 <= seconds <= MAX_TIMER_SECONDS):
+            return None
+        timer_engine.set(DEFAULT_TIMER, seconds)
+        if seconds % 60 == 0:
+            return f"Timer set for {seconds // 60} minutes"
+        return f"Timer set for {seconds} seconds"
+
+    if intent.name == "whats_next":
+        plan = workout_ops.get_today_plan()
+        if not plan:
+            return "No planned sets remaining for today"
+        nxt = plan[0]
+        reply = f"Next up: {nxt['exercise']} - {nxt['reps']} reps @ {nxt['load']} load"
+        if nxt.get("rest"):
+            reply += f", then {nxt['rest']} seconds rest"
+        remaining = len(plan) - 1
+        if remaining:
+            reply += f". {remaining} more set{'s' if remaining != 1 else ''} after that."
+        return reply
+
+    return None
+
+
+def route(message: str) -> Optional[str]:
+    """Handle a message on the fast path if possible; None means use the agent."""
+    reply = None
+    if INTENT_FAST_PATH:
+        intent = match(message)
+        if intent is not None:
+            reply = dispatch(intent)
+    with _stats_lock:
+        _stats["handled" if reply is not None else "fallback"] += 1
+    return reply
+
+
+def stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
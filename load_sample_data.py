@@ -8,6 +8,7 @@ import uuid
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from datetime import date, timedelta
+import db
 import db_config
 
 
@@ -31,46 +32,14 @@ def get_connection():
 def load_comprehensive_sample_data():
     """Load comprehensive 3-day MMA workout sample data with dynamic dates"""
     print("Loading comprehensive 3-day MMA workout sample data...")
-    
+
+    # Make sure the schema exists and is current
+    db.apply_migrations()
+
     conn = get_connection()
     try:
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
-        # Create schema (in case it doesn't exist)
-        print("Creating schema...")
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS exercises (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(255) UNIQUE NOT NULL
-            );
-            CREATE TABLE IF NOT EXISTS daily_logs (
-                id TEXT PRIMARY KEY,
-                log_date DATE NOT NULL UNIQUE,
-                summary TEXT
-            );
-            CREATE TABLE IF NOT EXISTS planned_sets (
-                id SERIAL PRIMARY KEY,
-                log_id TEXT REFERENCES daily_logs(id) ON DELETE CASCADE,
-                exercise_id INTEGER REFERENCES exercises(id),
-                order_num INTEGER NOT NULL,
-                reps INTEGER NOT NULL,
-                load REAL NOT NULL
-            );
-            CREATE TABLE IF NOT EXISTS completed_sets (
-                id SERIAL PRIMARY KEY,
-                log_id TEXT REFERENCES daily_logs(id) ON DELETE CASCADE,
-                exercise_id INTEGER REFERENCES exercises(id),
-                reps_done INTEGER,
-                load_done REAL,
-                completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            CREATE TABLE IF NOT EXISTS timer (
-                id SERIAL PRIMARY KEY,
-                timer_end_time TIMESTAMP NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-        
         # Clear existing data
         print("Clearing existing data...")
         cur.execute("DELETE FROM completed_sets")
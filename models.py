@@ -1,16 +1,23 @@
 from typing import List, Dict, Optional
-from pydantic import BaseModel, Field, conint, confloat, ConfigDict
+from pydantic import AliasChoices, BaseModel, Field, conint, confloat, ConfigDict
 
 MAX_LOAD = 2000
 MAX_REPS = 100
+MAX_REST = 600
 
 class PlanItem(BaseModel):
     exercise: str
-    order: conint(ge=1)
+    # get_today_plan rows carry order_num, so echoed rows validate as-is
+    order: conint(ge=1) = Field(validation_alias=AliasChoices("order", "order_num"))
     reps: conint(ge=1, le=MAX_REPS)
     load: confloat(ge=0, le=MAX_LOAD)
+    rest: conint(ge=0, le=MAX_REST) = 60
 
-    model_config = ConfigDict(extra="forbid")
+    # Read-only keys the model echoes back (id, log_id, ...) are dropped
+    model_config = ConfigDict(extra="ignore")
+
+class SplitItem(PlanItem):
+    relative: bool = False
 
 class LogCompletedInput(BaseModel):
     exercise: str
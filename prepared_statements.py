@@ -0,0 +1,84 @@
+"""Server-side prepared statements for the hot workout queries.
+
+Statements are registered once by name with their ``%s`` SQL. The first
+``execute_prepared`` on a pooled connection issues ``PREPARE`` for that
+statement; later calls only send ``EXECUTE name(...)``, so Postgres skips
+parsing and planning. Prepared statements live as long as the session, so
+the set of names prepared is tracked on the connection object itself
+(``PreparedConnection``) and a reconnect simply starts fresh.
+"""
+
+import re
+import threading
+import time
+from typing import Any, Dict, Sequence
+
+import psycopg2.extensions
+
+_statements: Dict[str, tuple] = {}  # name -> (sql with $n placeholders, param count, original sql)
+_stats: Dict[str, Dict[str, float]] = {}
+_lock = threading.Lock()
+
+
+class PreparedConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers which statements it has prepared."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+def register(name: str, sql: str):
+    """Register a statement under a name; safe to call again with the same SQL."""
+    count = 0
+
+    def number(_):
+        nonlocal count
+        count += 1
+        return f"${count}"
+
+    _statements[name] = (re.sub(r"%s", number, sql), count, sql)
+
+
+def execute_prepared(cur, name: str, params: Sequence[Any] = ()):
+    """Execute a registered statement on ``cur``, preparing it on first use per connection."""
+    server_sql, count, sql = _statements[name]
+    conn = cur.connection
+    started = time.perf_counter()
+    prepared = getattr(conn, "prepared", None)
+    if prepared is None:
+        # Plain (unpooled) connection: nothing to reuse across calls
+        cur.execute(sql, params)
+    else:
+        if name not in prepared:
+            cur.execute(f"PREPARE {name} AS {server_sql}")
+            prepared.add(name)
+        if count:
+            cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * count)})", params)
+        else:
+            cur.execute(f"EXECUTE {name}")
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    with _lock:
+        entry = _stats.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        entry["count"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+
+
+def stats() -> Dict[str, Dict[str, float]]:
+    """Per-statement execution count, total/average/max time in milliseconds."""
+    with _lock:
+        return {
+            name: {
+                "count": int(entry["count"]),
+                "total_ms": round(entry["total_ms"], 3),
+                "avg_ms": round(entry["total_ms"] / entry["count"], 3) if entry["count"] else 0.0,
+                "max_ms": round(entry["max_ms"], 3),
+            }
+            for name, entry in _stats.items()
+        }
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
@@ -0,0 +1,128 @@
+"""Read-through cache for the read-only tools.
+
+Results are keyed by tool name, arguments and the context_cache data
+version, so any write made through the tools (which bumps the version)
+invalidates them immediately. Inside a chat turn (``turn()``) entries live
+for the rest of the turn; outside one they expire after ``READ_CACHE_TTL``
+seconds, which also bounds how long writes made through the Node UI go
+unseen.
+"""
+
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from context_cache import data_version
+
+READ_CACHE_TTL = float(os.environ.get("READ_CACHE_TTL", "5"))
+READ_CACHE_SIZE = 256
+
+# Per-turn entries; None outside a turn
+_turn_entries: contextvars.ContextVar[Optional[Dict[tuple, Any]]] = contextvars.ContextVar(
+    "read_cache_turn", default=None
+)
+
+_lock = threading.Lock()
+_ttl_entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (expires_at, value)
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+@contextmanager
+def turn():
+    """Scope cached reads to one agent run."""
+    _turn_entries.set({})
+    try:
+        yield
+    finally:
+        _turn_entries.set(None)
+
+
+def _count(name: str, outcome: str):
+    with _lock:
+        counts = _stats.setdefault(name, {"hits": 0, "misses": 0})
+        counts[outcome] += 1
+
+
+def _lookup(key: tuple):
+    entries = _turn_entries.get()
+    if entries is not None:
+        return key in entries, entries.get(key)
+    with _lock:
+        cached = _ttl_entries.get(key)
+        if cached and cached[0] > time.monotonic():
+            _ttl_entries.move_to_end(key)
+            return True, cached[1]
+    return False, None
+
+
+def _store(key: tuple, version: int, value):
+    # Skip results that may predate a write which landed mid-query
+    if data_version() != version:
+        return
+    entries = _turn_entries.get()
+    if entries is not None:
+        entries[key] = value
+        return
+    with _lock:
+        _ttl_entries[key] = (time.monotonic() + READ_CACHE_TTL, value)
+        _ttl_entries.move_to_end(key)
+        while len(_ttl_entries) > READ_CACHE_SIZE:
+            _ttl_entries.popitem(last=False)
+
+
+def _copy(rows):
+    return [dict(row) for row in rows]
+
+
+def read_through(name: str) -> Callable:
+    """Cache a read-only function returning a list of row dicts (sync or async)."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                version = data_version()
+                key = (name, version, args, tuple(sorted(kwargs.items())))
+                hit, value = _lookup(key)
+                if hit:
+                    _count(name, "hits")
+                    return _copy(value)
+                _count(name, "misses")
+                value = _copy(await func(*args, **kwargs))
+                _store(key, version, value)
+                return _copy(value)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            version = data_version()
+            key = (name, version, args, tuple(sorted(kwargs.items())))
+            hit, value = _lookup(key)
+            if hit:
+                _count(name, "hits")
+                return _copy(value)
+            _count(name, "misses")
+            value = _copy(func(*args, **kwargs))
+            _store(key, version, value)
+            return _copy(value)
+        return wrapper
+    return decorator
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counters per tool."""
+    with _lock:
+        return {name: dict(counts) for name, counts in _stats.items()}
+
+
+def clear():
+    with _lock:
+        _ttl_entries.clear()
+    entries = _turn_entries.get()
+    if entries is not None:
+        entries.clear()
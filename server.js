@@ -10,6 +10,20 @@ app.use(express.json());
 // Serve static files from the current directory
 app.use(express.static('.'));
 
+// Resident Python agent service (agent_service.py)
+const AGENT_SERVICE_URL = process.env.AGENT_SERVICE_URL || 'http://127.0.0.1:8765';
+
+async function callAgentService(method, route, body) {
+  const options = { method, headers: {} };
+  if (body !== undefined) {
+    options.headers['Content-Type'] = 'application/json';
+    options.body = JSON.stringify(body);
+  }
+  const response = await fetch(`${AGENT_SERVICE_URL}${route}`, options);
+  const data = await response.json();
+  return { status: response.status, data };
+}
+
 // Database is initialized via Python scripts
 // db.initDb(false);
 
@@ -148,19 +162,8 @@ app.post('/api/days/:id/completed', async (req, res) => {
     // If there was a next set, set a timer for its rest period
     if (nextSet && nextSet.rest) {
       try {
-        const { spawn } = require('child_process');
-        const path = require('path');
-        const restSeconds = nextSet.rest; // Use exact seconds
-        const timerScript = path.join(__dirname, 'timer_temp.py');
-        const pythonProcess = spawn('python', [timerScript, 'set', restSeconds.toString(), 'seconds']);
-
-        pythonProcess.stdout.on('data', (data) => {
-          console.log('Timer set:', data.toString().trim());
-        });
-
-        pythonProcess.stderr.on('data', (data) => {
-          console.error('Timer error:', data.toString().trim());
-        });
+        const { data } = await callAgentService('POST', '/timer', { seconds: nextSet.rest });
+        console.log('Timer set:', data.message || data.error);
       } catch (timerError) {
         console.error('Error setting timer:', timerError);
         // Don't fail the main request if timer setting fails
@@ -295,7 +298,7 @@ app.delete('/api/tracked-exercises', async (req, res) => {
   }
 });
 
-// Chat endpoint - connects to Python agent
+// Chat endpoint - proxies to the resident Python agent service
 app.post('/api/chat', async (req, res) => {
   try {
     const { message } = req.body;
@@ -304,93 +307,65 @@ app.post('/api/chat', async (req, res) => {
       return res.status(400).json({ error: 'Message is required' });
     }
 
-    // Create a temporary JSON file with the message data
-    const fs = require('fs');
-    const path = require('path');
-    const crypto = require('crypto');
-    
-    const tempId = crypto.randomBytes(16).toString('hex');
-    const tempFile = path.join(__dirname, `temp_chat_${tempId}.json`);
-    
-    const chatData = {
-      message: message,
-      timestamp: new Date().toISOString()
-    };
-    
-    fs.writeFileSync(tempFile, JSON.stringify(chatData));
-
-    // Call Python agent with the temp file
-    const { spawn } = require('child_process');
-    const pythonProcess = spawn('python', ['chat_agent.py', tempFile]);
-
-    let responseData = '';
-    let errorData = '';
-
-    pythonProcess.stdout.on('data', (data) => {
-      responseData += data.toString();
-    });
+    const { status, data } = await callAgentService('POST', '/chat', { message });
+    if (status === 200) {
+      res.json({ response: data.response });
+    } else {
+      console.error('Agent service error:', data);
+      res.status(500).json({ error: 'Failed to process message' });
+    }
+  } catch (error) {
+    console.error('Error in chat endpoint:', error);
+    res.status(500).json({ error: 'Internal server error' });
+  }
+});
 
-    pythonProcess.stderr.on('data', (data) => {
-      errorData += data.toString();
-    });
+// Streaming chat: relay the agent service's server-sent events as they arrive
+app.post('/api/chat/stream', async (req, res) => {
+  const { message } = req.body;
+  if (!message) {
+    return res.status(400).json({ error: 'Message is required' });
+  }
 
-    pythonProcess.on('close', (code) => {
-      // Clean up temp file if it still exists
-      try {
-        if (fs.existsSync(tempFile)) {
-          fs.unlinkSync(tempFile);
-        }
-      } catch (cleanupError) {
-        console.error('Error cleaning up temp file:', cleanupError);
-      }
-      
-      if (code === 0) {
-        res.json({ response: responseData.trim() });
-      } else {
-        console.error('Python process error:', errorData);
-        res.status(500).json({ error: 'Failed to process message' });
-      }
+  try {
+    const response = await fetch(`${AGENT_SERVICE_URL}/chat/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ message })
     });
+    if (!response.ok || !response.body) {
+      console.error('Agent service error:', response.status);
+      return res.status(500).json({ error: 'Failed to process message' });
+    }
 
+    res.setHeader('Content-Type', 'text/event-stream');
+    res.setHeader('Cache-Control', 'no-cache');
+    res.setHeader('Connection', 'keep-alive');
+    res.flushHeaders();
+    for await (const chunk of response.body) {
+      res.write(chunk);
+    }
+    res.end();
   } catch (error) {
-    console.error('Error in chat endpoint:', error);
-    res.status(500).json({ error: 'Internal server error' });
+    console.error('Error in chat stream endpoint:', error);
+    if (res.headersSent) {
+      res.end();
+    } else {
+      res.status(500).json({ error: 'Internal server error' });
+    }
   }
 });
 
 // Clear chat memory endpoint
 app.delete('/api/chat/memory', async (req, res) => {
   try {
-    const { spawn } = require('child_process');
-    const pythonProcess = spawn('python', ['-c', `
-import sys
-sys.path.append('.')
-from db import clear_chat_memory
-
-clear_chat_memory()
-print("Chat memory cleared")
-`]);
-
-    let responseData = '';
-    let errorData = '';
-
-    pythonProcess.stdout.on('data', (data) => {
-      responseData += data.toString();
-    });
-
-    pythonProcess.stderr.on('data', (data) => {
-      errorData += data.toString();
-    });
-
-    pythonProcess.on('close', (code) => {
-      if (code === 0) {
-        res.json({ success: true, message: 'Chat memory cleared' });
-      } else {
-        console.error('Python process error:', errorData);
-        res.status(500).json({ error: 'Failed to clear chat memory' });
-      }
-    });
-
+    const { status, data } = await callAgentService('DELETE', '/chat/memory');
+    if (status === 200) {
+      res.json({ success: true, message: 'Chat memory cleared' });
+    } else {
+      console.error('Agent service error:', data);
+      res.status(500).json({ error: 'Failed to clear chat memory' });
+    }
   } catch (error) {
     console.error('Error clearing chat memory:', error);
     res.status(500).json({ error: 'Internal server error' });
@@ -400,36 +375,13 @@ print("Chat memory cleared")
 // Get timer status endpoint
 app.get('/api/timer', async (req, res) => {
   try {
-    const { spawn } = require('child_process');
-    const path = require('path');
-    const timerScript = path.join(__dirname, 'timer_temp.py');
-    const pythonProcess = spawn('python', [timerScript, 'get']);
-
-    let responseData = '';
-    let errorData = '';
-
-    pythonProcess.stdout.on('data', (data) => {
-      responseData += data.toString();
-    });
-
-    pythonProcess.stderr.on('data', (data) => {
-      errorData += data.toString();
-    });
-
-    pythonProcess.on('close', (code) => {
-      if (code === 0) {
-        try {
-          const timerStatus = JSON.parse(responseData.trim());
-          res.json(timerStatus);
-        } catch (parseError) {
-          res.status(500).json({ error: 'Failed to parse timer status' });
-        }
-      } else {
-        console.error('Python process error:', errorData);
-        res.status(500).json({ error: 'Failed to get timer status' });
-      }
-    });
-
+    const { status, data } = await callAgentService('GET', '/timer');
+    if (status === 200) {
+      res.json(data);
+    } else {
+      console.error('Agent service error:', data);
+      res.status(500).json({ error: 'Failed to get timer status' });
+    }
   } catch (error) {
     console.error('Error getting timer status:', error);
     res.status(500).json({ error: 'Internal server error' });
@@ -439,42 +391,41 @@ app.get('/api/timer', async (req, res) => {
 // Complete the next planned set for today (for automation)
 app.post('/api/complete-today-set', async (req, res) => {
   try {
-    const { spawn } = require('child_process');
-    const path = require('path');
-    const script = path.join(__dirname, 'complete_next_set.py');
-    const pythonProcess = spawn('python', [script]);
-
-    let responseData = '';
-    let errorData = '';
-
-    pythonProcess.stdout.on('data', (data) => {
-      responseData += data.toString();
-    });
-
-    pythonProcess.stderr.on('data', (data) => {
-      errorData += data.toString();
+    // Device id and idempotency key let the service drop bounced/retried presses
+    const body = req.body || {};
+    const { status, data } = await callAgentService('POST', '/complete-next-set', {
+      device_id: body.device_id || req.query.device_id || null,
+      idempotency_key: body.idempotency_key || req.get('Idempotency-Key') || null,
+      exercise: body.exercise || req.query.exercise || null
     });
-
-    pythonProcess.on('close', (code) => {
-      if (code === 0) {
-        try {
-          const result = JSON.parse(responseData.trim());
-          res.json(result);
-        } catch (err) {
-          res.json({ message: responseData.trim() });
-        }
-      } else {
-        console.error('Python process error:', errorData);
-        res.status(500).json({ error: 'Failed to complete set' });
-      }
-    });
-
+    if (status === 200) {
+      res.json(data);
+    } else {
+      console.error('Agent service error:', data);
+      res.status(500).json({ error: 'Failed to complete set' });
+    }
   } catch (error) {
     console.error('Error completing set:', error);
     res.status(500).json({ error: 'Internal server error' });
   }
 });
 
+app.post('/api/apply-split', async (req, res) => {
+  try {
+    const date = (req.body && req.body.date) || req.query.date || null;
+    const { status, data } = await callAgentService('POST', '/apply-split', { date });
+    if (status === 200) {
+      res.json(data);
+    } else {
+      console.error('Agent service error:', data);
+      res.status(status === 400 ? 400 : 500).json({ error: data.error || 'Failed to apply split' });
+    }
+  } catch (error) {
+    console.error('Error applying split:', error);
+    res.status(500).json({ error: 'Internal server error' });
+  }
+});
+
 // Serve the React app for the root route
 app.get('/', (req, res) => {
   res.sendFile(path.resolve(__dirname, 'index.html'));
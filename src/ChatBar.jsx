@@ -5,6 +5,7 @@ export default function ChatBar() {
   const [messages, setMessages] = useState([]);
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  const [progress, setProgress] = useState('');
   const messagesEndRef = useRef(null);
 
   // Load chat history from session storage on mount
@@ -39,27 +40,57 @@ export default function ChatBar() {
     setInput('');
     setIsLoading(true);
 
+    const aiId = Date.now() + 1;
+    const updateAiMessage = (update) => {
+      setMessages(prev => {
+        const existing = prev.find(m => m.id === aiId);
+        if (!existing) {
+          return [...prev, {
+            id: aiId,
+            type: 'ai',
+            content: update(''),
+            timestamp: new Date().toLocaleTimeString()
+          }];
+        }
+        return prev.map(m => (m.id === aiId ? { ...m, content: update(m.content) } : m));
+      });
+    };
+
     try {
-      const response = await fetch('/api/chat', {
+      const response = await fetch('/api/chat/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ message: input.trim() })
       });
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         throw new Error('Failed to send message');
       }
 
-      const data = await response.json();
-      
-      const aiMessage = {
-        id: Date.now() + 1,
-        type: 'ai',
-        content: data.response,
-        timestamp: new Date().toLocaleTimeString()
-      };
-
-      setMessages(prev => [...prev, aiMessage]);
+      // Read server-sent events: text deltas, tool progress and the final reply
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const frames = buffer.split('\n\n');
+        buffer = frames.pop();
+        for (const frame of frames) {
+          if (!frame.startsWith('data: ')) continue;
+          const event = JSON.parse(frame.slice(6));
+          if (event.type === 'delta') {
+            updateAiMessage(content => content + event.text);
+          } else if (event.type === 'tool') {
+            setProgress(event.status === 'done' ? '' : event.status);
+          } else if (event.type === 'final') {
+            updateAiMessage(() => event.text);
+          } else if (event.type === 'error') {
+            throw new Error(event.error);
+          }
+        }
+      }
     } catch (error) {
       console.error('Error sending message:', error);
       const errorMessage = {
@@ -68,9 +99,10 @@ export default function ChatBar() {
         content: 'Sorry, I encountered an error. Please try again.',
         timestamp: new Date().toLocaleTimeString()
       };
-      setMessages(prev => [...prev, errorMessage]);
+      setMessages(prev => [...prev.filter(m => m.id !== aiId), errorMessage]);
     } finally {
       setIsLoading(false);
+      setProgress('');
     }
   };
 
@@ -274,7 +306,7 @@ export default function ChatBar() {
 
           {isLoading && (
             <div style={loadingIndicatorStyle}>
-              <div>CoachByte is thinking...</div>
+              <div>{progress ? `CoachByte is ${progress}` : 'CoachByte is thinking...'}</div>
             </div>
           )}
 
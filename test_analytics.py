@@ -0,0 +1,97 @@
+"""Training analytics against the configured PostgreSQL database.
+
+Inserts sets for a throwaway mixed-case exercise (live and archived), checks
+that the exercise filter matches it however it is typed, then removes them.
+Skipped when the database is unreachable or its schema is not set up
+(run `python db.py` first).
+
+Run with:
+    pytest test_analytics.py
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+pytest.importorskip("numpy")
+
+import analytics
+from db import TODAY_LOG_UPSERT_SQL, current_log_date, get_connection
+
+
+@pytest.fixture
+def mixed_case_exercise():
+    """Yield the name of an exercise with 3 live sets yesterday and 2 archived sets 40 days ago.
+
+    Yesterday one of the live sets was planned, one more planned set is still
+    open and the other two live sets are unplanned extras.
+    """
+    try:
+        conn = get_connection()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"database unavailable: {e}")
+    cur = conn.cursor()
+    cur.execute("SELECT to_regclass('completed_sets_archive') IS NOT NULL")
+    if not cur.fetchone()[0]:
+        conn.close()
+        pytest.skip("schema not migrated")
+
+    name = f"Analytics Test Press {uuid.uuid4().hex[:8].upper()}"
+    day = current_log_date() - timedelta(days=1)
+    cur.execute("INSERT INTO exercises (name) VALUES (%s) RETURNING id", (name,))
+    exercise_id = cur.fetchone()[0]
+    cur.execute(TODAY_LOG_UPSERT_SQL, (str(uuid.uuid4()), day))
+    log_id, created_log = cur.fetchone()
+    completed_at = datetime.combine(day, datetime.min.time()) + timedelta(hours=12)
+    for reps, load, planned in [(5, 100, True), (5, 110, False), (3, 120, False)]:
+        cur.execute(
+            "INSERT INTO completed_sets (log_id, exercise_id, reps_done, load_done, completed_at, planned)"
+            " VALUES (%s, %s, %s, %s, %s, %s)",
+            (log_id, exercise_id, reps, load, completed_at, planned),
+        )
+    cur.execute(
+        "INSERT INTO planned_sets (log_id, exercise_id, order_num, reps, load) VALUES (%s, %s, 99, 5, 100)",
+        (log_id, exercise_id),
+    )
+    cur.execute(
+        "INSERT INTO completed_sets_archive (log_date, exercise_id, reps, sets, max_load, total_volume)"
+        " VALUES (%s, %s, 8, 2, 90, 1440)",
+        (day - timedelta(days=39), exercise_id),
+    )
+    conn.commit()
+    try:
+        yield name
+    finally:
+        cur.execute("DELETE FROM completed_sets WHERE exercise_id = %s", (exercise_id,))
+        cur.execute("DELETE FROM planned_sets WHERE exercise_id = %s", (exercise_id,))
+        cur.execute("DELETE FROM exercises WHERE id = %s", (exercise_id,))
+        if created_log:
+            cur.execute("DELETE FROM daily_logs WHERE id = %s", (log_id,))
+        conn.commit()
+        conn.close()
+
+
+def test_exercise_filter_ignores_case_and_spacing(mixed_case_exercise):
+    for spelled in (mixed_case_exercise, mixed_case_exercise.lower(), f"  {mixed_case_exercise.upper()} "):
+        result = analytics.training_analytics(days=7, exercise=spelled, period="day")
+        rows = result["exercises"]["rows"]
+        assert [row[0] for row in rows] == [mixed_case_exercise], spelled
+        _, sessions, sets, reps, tonnage, best_e1rm, _, _ = rows[0]
+        assert (sessions, sets, reps, tonnage) == (1, 3, 13, 1410)
+        assert best_e1rm == pytest.approx(132.0)
+
+
+def test_window_includes_archived_months(mixed_case_exercise):
+    result = analytics.training_analytics(days=60, exercise=mixed_case_exercise.lower())
+    _, sessions, sets, reps, tonnage, _, first_e1rm, _ = result["exercises"]["rows"][0]
+    assert (sessions, sets, reps, tonnage) == (2, 5, 29, 2850)
+    assert first_e1rm == pytest.approx(114.0)
+
+
+def test_adherence_counts_only_planned_sets(mixed_case_exercise):
+    result = analytics.training_analytics(days=7, exercise=mixed_case_exercise)
+    # One of two planned sets done; the two unplanned extras do not count
+    assert [row[1:] for row in result["adherence"]["rows"]] == [[1, 2, 50.0]]
+    assert result["window"]["adherence_pct"] == 50.0
@@ -0,0 +1,116 @@
+"""Button press coalescing: debounce, idempotency keys and per-device ordering.
+
+Uses a fake action in place of completing a set, so no database is needed.
+
+Run with:
+    pytest test_button_presses.py
+"""
+
+import threading
+import time
+
+import pytest
+
+from button_presses import PressCoalescer
+
+
+class FakeAction:
+    """Records each call; optionally fails the first few or blocks until released."""
+
+    def __init__(self, failures=0):
+        self.calls = []
+        self.failures = failures
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, exercise):
+        self.calls.append(exercise)
+        self.started.set()
+        self.release.wait(5)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database unavailable")
+        return f"set {len(self.calls)}"
+
+
+@pytest.fixture
+def make_coalescer():
+    made = []
+
+    def make(action, window=0.2):
+        coalescer = PressCoalescer(action, window=window, workers=2)
+        made.append(coalescer)
+        return coalescer
+
+    yield make
+    for coalescer in made:
+        coalescer.shutdown()
+
+
+def _wait_for(predicate):
+    deadline = time.monotonic() + 5
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_repeat_within_window_is_coalesced(make_coalescer):
+    action = FakeAction()
+    coalescer = make_coalescer(action)
+    assert coalescer.press("kitchen") == ("set 1", False)
+    assert coalescer.press("kitchen") == ("set 1", True)
+    # Another device is not debounced by the first
+    assert coalescer.press("garage") == ("set 2", False)
+    time.sleep(0.25)
+    assert coalescer.press("kitchen") == ("set 3", False)
+    assert len(action.calls) == 3
+    assert coalescer.stats == {"accepted": 3, "coalesced": 1}
+
+
+def test_idempotency_key_outlives_window(make_coalescer):
+    action = FakeAction()
+    coalescer = make_coalescer(action, window=0)
+    assert coalescer.press("kitchen", "evt-1") == ("set 1", False)
+    assert coalescer.press("kitchen", "evt-1") == ("set 1", True)
+    assert coalescer.press("kitchen", "evt-2") == ("set 2", False)
+    assert len(action.calls) == 2
+
+
+def test_failed_press_is_not_cached(make_coalescer):
+    action = FakeAction(failures=1)
+    coalescer = make_coalescer(action)
+    with pytest.raises(RuntimeError):
+        coalescer.press("kitchen", "evt-1")
+    # The retry runs the action again instead of replaying the error
+    assert coalescer.press("kitchen", "evt-1") == ("set 2", False)
+    assert coalescer.press("kitchen", "evt-1") == ("set 2", True)
+    assert len(action.calls) == 2
+
+
+def test_presses_run_in_arrival_order_per_device(make_coalescer):
+    action = FakeAction()
+    action.release.clear()
+    coalescer = make_coalescer(action)
+    results = {}
+
+    def press(key, exercise):
+        results[key] = coalescer.press("kitchen", key, exercise)
+
+    threads = []
+    for i, exercise in enumerate(["squat", "bench", "row"]):
+        thread = threading.Thread(target=press, args=(f"evt-{i}", exercise))
+        thread.start()
+        threads.append(thread)
+        _wait_for(lambda: coalescer.stats["accepted"] == i + 1)
+    # Only the first press runs while it is blocked; the rest wait their turn
+    action.started.wait(5)
+    assert action.calls == ["squat"]
+    action.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert action.calls == ["squat", "bench", "row"]
+    assert [results[f"evt-{i}"] for i in range(3)] == [("set 1", False), ("set 2", False), ("set 3", False)]
+    # The device's queue is dropped once drained
+    _wait_for(lambda: not coalescer._queues)
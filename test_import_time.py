@@ -0,0 +1,94 @@
+"""Import-time budget for the non-chat entry points.
+
+`complete_next_set.py` and other automations import `workout_ops`, which must
+stay free of the agent SDK and cheap to load. Runs `python -X importtime` in a
+fresh interpreter and checks the cumulative import time and the modules pulled in.
+The chat entry points (`tools`, `agent`) are checked too: the async driver,
+NumPy and tiktoken are only loaded when a tool or turn first needs them.
+
+Run with:
+    python test_import_time.py        (or pytest test_import_time.py)
+"""
+
+import os
+import subprocess
+import sys
+
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", "100"))
+# Chat-only dependencies that must never load on the automation path
+FORBIDDEN_MODULES = ("agents", "openai", "pydantic", "fastapi")
+# Heavy or async-only modules the sync chat path must load lazily (psycopg is psycopg 3)
+LAZY_MODULES = ("psycopg", "numpy", "tiktoken")
+CHAT_MODULES = ("tools", "agent")
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure_import(module: str):
+    """Return (cumulative microseconds for `module`, set of imported top-level packages)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = None
+    packages = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if not cumulative.isdigit():
+            continue  # header row
+        packages.add(name.split(".")[0])
+        if name == module:
+            cumulative_us = int(cumulative)
+    return cumulative_us, packages
+
+
+def loaded_modules(modules, names):
+    """Return which of `names` are in sys.modules after importing `modules` in a fresh interpreter."""
+    code = (
+        f"import sys, {', '.join(modules)}; "
+        f"print(' '.join(name for name in {tuple(names)!r} if name in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=HERE, capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+def test_workout_ops_import_is_light():
+    cumulative_us, packages = measure_import("workout_ops")
+    loaded = sorted(set(FORBIDDEN_MODULES) & packages)
+    assert not loaded, f"workout_ops imports chat-only modules: {', '.join(loaded)}"
+    assert cumulative_us is not None
+    elapsed_ms = cumulative_us / 1000
+    assert elapsed_ms < IMPORT_BUDGET_MS, f"import workout_ops took {elapsed_ms:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)"
+
+
+def test_chat_import_defers_heavy_modules():
+    loaded = loaded_modules(CHAT_MODULES, LAZY_MODULES)
+    assert not loaded, f"importing {', '.join(CHAT_MODULES)} loads: {', '.join(loaded)}"
+
+
+def main():
+    cumulative_us, packages = measure_import("workout_ops")
+    print(f"import workout_ops: {cumulative_us / 1000:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    loaded = sorted(set(FORBIDDEN_MODULES) & packages)
+    if loaded:
+        print(f"FAIL: chat-only modules imported: {', '.join(loaded)}")
+        return 1
+    if cumulative_us / 1000 >= IMPORT_BUDGET_MS:
+        print("FAIL: over budget")
+        return 1
+    loaded = loaded_modules(CHAT_MODULES, LAZY_MODULES)
+    if loaded:
+        print(f"FAIL: importing {', '.join(CHAT_MODULES)} loads: {', '.join(loaded)}")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
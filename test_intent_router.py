@@ -0,0 +1,71 @@
+"""Intent router pattern table.
+
+Pure pattern matching, no database: checks which short messages take the fast
+path and that ambiguous ones fall through to the agent.
+
+Run with:
+    pytest test_intent_router.py
+"""
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+import intent_router
+from intent_router import Intent
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("done", Intent("complete_set")),
+    ("Done.", Intent("complete_set")),
+    ("just finished", Intent("complete_set")),
+    ("done with that set", Intent("complete_set")),
+    ("I'm done with that set", Intent("complete_set")),
+    ("set done!", Intent("complete_set")),
+    ("finished bench", Intent("complete_set", {"exercise": "bench"})),
+    ("done with my squats", Intent("complete_set", {"exercise": "squats"})),
+    ("did 8 reps at 185", Intent("complete_set", {"reps": 8, "load": 185.0})),
+    ("8 reps @ 185 lbs on bench press", Intent("complete_set", {"reps": 8, "load": 185.0, "exercise": "bench press"})),
+    ("did 5 reps", Intent("complete_set", {"reps": 5})),
+    ("what's my timer", Intent("timer_status")),
+    ("how much time is left", Intent("timer_status")),
+    ("set timer for 90 seconds", Intent("set_timer", {"seconds": 90})),
+    ("start a 2 minute rest timer", Intent("set_timer", {"seconds": 120})),
+    ("What’s next?", Intent("whats_next")),
+    ("next set", Intent("whats_next")),
+])
+def test_matches(message, expected):
+    assert intent_router.match(message) == expected
+
+
+@pytest.mark.parametrize("message", [
+    # The whole session rather than a set
+    "I'm done",
+    "done for today",
+    "I'm done for today",
+    "finished my workout",
+    "done with my workout",
+    "done with the session",
+    "finished for the day",
+    # Not exact matches
+    "done, and change tomorrow's plan",
+    "set timer for 3 fortnights",
+    "what's the best way to do a deadlift",
+    "",
+])
+def test_ambiguous_messages_fall_back(message):
+    assert intent_router.match(message) is None
+
+
+def test_unplanned_exercise_falls_back(monkeypatch):
+    monkeypatch.setattr(intent_router.workout_ops, "get_today_plan", lambda: [{"exercise": "Bench Press"}])
+    monkeypatch.setattr(intent_router.workout_ops, "complete_planned_set", lambda *args: f"completed {args}")
+    assert intent_router.dispatch(Intent("complete_set", {"exercise": "squats"})) is None
+    assert intent_router.dispatch(Intent("complete_set", {"exercise": "bench  press"})) == (
+        "completed ('Bench Press', None, None)"
+    )
+
+
+def test_fast_path_disabled(monkeypatch):
+    monkeypatch.setattr(intent_router, "INTENT_FAST_PATH", False)
+    assert intent_router.route("done") is None
@@ -0,0 +1,87 @@
+"""Read-through cache: TTL expiry, turn scoping and write invalidation.
+
+Wraps a counting fake in ``read_through``, so no database is needed.
+
+Run with:
+    pytest test_read_cache.py
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import read_cache
+from context_cache import bump_data_version
+
+
+@pytest.fixture
+def counted(monkeypatch):
+    """A cached fake tool and the list of argument tuples it was actually called with."""
+    monkeypatch.setattr(read_cache, "READ_CACHE_TTL", 0.1)
+    read_cache.clear()
+    calls = []
+
+    @read_cache.read_through("fake_tool")
+    def fake_tool(*args, **kwargs):
+        calls.append(args)
+        return [{"n": len(calls)}]
+
+    yield fake_tool, calls
+    read_cache.clear()
+
+
+def test_ttl_entries_expire(counted):
+    fake_tool, calls = counted
+    assert fake_tool(1) == [{"n": 1}]
+    assert fake_tool(1) == [{"n": 1}]
+    assert fake_tool(2) == [{"n": 2}]
+    time.sleep(0.15)
+    assert fake_tool(1) == [{"n": 3}]
+    assert calls == [(1,), (2,), (1,)]
+
+
+def test_write_invalidates(counted):
+    fake_tool, calls = counted
+    fake_tool(1)
+    bump_data_version()
+    fake_tool(1)
+    assert len(calls) == 2
+
+
+def test_turn_entries_outlive_ttl_and_end_with_turn(counted):
+    fake_tool, calls = counted
+    with read_cache.turn():
+        fake_tool(1)
+        time.sleep(0.15)
+        assert fake_tool(1) == [{"n": 1}]
+        bump_data_version()
+        assert fake_tool(1) == [{"n": 2}]
+    # Turn entries are not shared with later turns or with the TTL cache
+    with read_cache.turn():
+        assert fake_tool(1) == [{"n": 3}]
+    assert fake_tool(1) == [{"n": 4}]
+
+
+def test_cached_rows_are_copies(counted):
+    fake_tool, _ = counted
+    fake_tool(1)[0]["n"] = "mutated"
+    assert fake_tool(1) == [{"n": 1}]
+
+
+def test_async_tools():
+    read_cache.clear()
+    calls = []
+
+    @read_cache.read_through("fake_async_tool")
+    async def fake_async_tool(day):
+        calls.append(day)
+        return [{"day": day}]
+
+    async def run():
+        with read_cache.turn():
+            return [await fake_async_tool("mon") for _ in range(3)]
+
+    assert asyncio.run(run()) == [[{"day": "mon"}]] * 3
+    assert calls == ["mon"]
+    assert read_cache.stats()["fake_async_tool"] == {"hits": 2, "misses": 1}
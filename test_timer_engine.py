@@ -0,0 +1,128 @@
+"""Timer engine: deadline ordering, lazy deletion and file persistence.
+
+Each test uses its own timer file and a fake clock, so nothing waits in real
+time and the shared ``temp_timer.json`` is left alone.
+
+Run with:
+    pytest test_timer_engine.py
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import timer_engine
+from timer_engine import DEFAULT_TIMER, TimerEngine
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime(2024, 1, 1, 12, 0, 0)
+
+    def advance(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+
+    class FakeDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return fake.now
+
+    monkeypatch.setattr(timer_engine, "datetime", FakeDatetime)
+    return fake
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "timer.json")
+
+
+def test_expired_in_deadline_order_once(clock, path):
+    engine = TimerEngine(path)
+    engine.set("workout", 30)
+    engine.set("rest", 10)
+    engine.set("emom", 20, interval_seconds=5)
+    assert engine.expired() == []
+    clock.advance(25)
+    assert engine.expired() == ["rest", "emom"]
+    assert engine.expired() == []
+    clock.advance(10)
+    assert engine.expired() == ["workout"]
+    assert engine.next_deadline() is None
+
+
+def test_cancelled_and_replaced_timers_are_skipped(clock, path):
+    engine = TimerEngine(path)
+    engine.set("rest", 10)
+    engine.set("workout", 60)
+    assert engine.cancel("rest") is True
+    assert engine.cancel("rest") is False
+    assert engine.next_deadline() == ("workout", clock.now + timedelta(seconds=60))
+    # Moving a deadline later leaves its old heap entry behind
+    engine.set("rest", 5)
+    engine.set("rest", 90)
+    clock.advance(61)
+    assert engine.expired() == ["workout"]
+    assert engine.next_deadline() == ("rest", clock.now + timedelta(seconds=29))
+
+
+def test_heap_stays_bounded(clock, path):
+    engine = TimerEngine(path)
+    for seconds in range(1, 200):
+        engine.set(DEFAULT_TIMER, seconds)
+    assert len(engine._heap) <= 2 * len(engine._timers) + 9
+
+
+def test_timers_shared_through_file(clock, path):
+    writer = TimerEngine(path)
+    reader = TimerEngine(path)
+    writer.set("rest", 90)
+    assert reader.status("rest")["remaining_seconds"] == 90
+    reader.set("workout", 600)
+    # Each writer reloads before saving, so neither overwrites the other's timer
+    writer.set("emom", 300, interval_seconds=60)
+    assert sorted(TimerEngine(path).status(name)["status"] for name in ("rest", "workout", "emom")) == [
+        "running", "running", "running"
+    ]
+    reader.cancel("rest")
+    assert writer.status("rest")["status"] == "no_timer"
+
+    with open(path) as f:
+        data = json.load(f)
+    assert set(data["timers"]) == {"workout", "emom"}
+    assert "end_time" not in data
+
+
+def test_legacy_file_and_top_level_keys(clock, path):
+    end_time = clock.now + timedelta(seconds=45)
+    with open(path, "w") as f:
+        json.dump({"end_time": end_time.isoformat(), "created_at": clock.now.isoformat()}, f)
+    engine = TimerEngine(path)
+    assert engine.next_deadline() == (DEFAULT_TIMER, end_time)
+
+    engine.set(DEFAULT_TIMER, 120)
+    with open(path) as f:
+        data = json.load(f)
+    assert data["end_time"] == (clock.now + timedelta(seconds=120)).isoformat()
+    assert data["timers"][DEFAULT_TIMER]["end_time"] == data["end_time"]
+
+
+def test_interval_status(clock, path):
+    engine = TimerEngine(path)
+    engine.set("emom", 300, interval_seconds=60)
+    clock.advance(130)
+    status = engine.status("emom")
+    assert (status["round"], status["rounds"], status["interval_remaining_seconds"]) == (3, 5, 50)
+    clock.advance(200)
+    assert engine.status("emom")["status"] == "expired"
+
+
+@pytest.mark.parametrize("seconds, interval", [(0, None), (10801, None), (60, 0), (60, 61)])
+def test_rejects_bad_durations(clock, path, seconds, interval):
+    with pytest.raises(ValueError):
+        TimerEngine(path).set("rest", seconds, interval_seconds=interval)
@@ -0,0 +1,241 @@
+"""In-process timer engine for rest, workout and EMOM interval timers.
+
+Timers are kept in memory with a min-heap of deadlines and persisted
+atomically to ``temp_timer.json`` so the agent service, scripts and the UI
+see the same state. Writers hold an exclusive lock on ``temp_timer.json.lock``
+while they reload, change and replace the file, so processes do not overwrite
+each other's timers. The file keeps the legacy top-level ``end_time`` /
+``created_at`` keys for the default timer, so ``get_timer_temp()`` callers
+and older readers keep working.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TIMER_FILE = os.path.join(SCRIPT_DIR, "temp_timer.json")
+
+# The timer reported by get_timer_temp() and replaced by set_timer_temp()
+DEFAULT_TIMER = "rest"
+MAX_TIMER_SECONDS = 10800  # 3 hours
+
+
+class TimerEngine:
+    """Named timers with a deadline heap and atomic, locked file persistence."""
+
+    def __init__(self, path: str = TIMER_FILE):
+        self.path = path
+        self._timers: Dict[str, Dict[str, Any]] = {}
+        # (deadline timestamp, sequence, name); cancelled or replaced entries are skipped lazily
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        # Deadlines at or before this have been moved from the heap to _due
+        self._drained_at = datetime.now().timestamp()
+        self._due: List[str] = []
+        self._lock = threading.RLock()
+        self._mtime: Optional[int] = None
+
+    # Persistence -----------------------------------------------------------
+
+    def _reload_if_changed(self):
+        """Pick up timers written by another process since our last look."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            if self._mtime is not None:
+                self._timers, self._heap, self._mtime = {}, [], None
+            return
+        if mtime == self._mtime:
+            return
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        timers = data.get("timers")
+        if timers is None and "end_time" in data:
+            # Legacy single-timer file
+            timers = {DEFAULT_TIMER: {"end_time": data["end_time"], "created_at": data["created_at"]}}
+        self._timers = {}
+        self._heap = []
+        for name, timer in (timers or {}).items():
+            self._add(
+                name,
+                datetime.fromisoformat(timer["end_time"]),
+                datetime.fromisoformat(timer["created_at"]),
+                timer.get("interval_seconds"),
+            )
+        self._mtime = mtime
+
+    def _save(self):
+        data: Dict[str, Any] = {
+            "timers": {
+                name: {
+                    "end_time": t["end_time"].isoformat(),
+                    "created_at": t["created_at"].isoformat(),
+                    "interval_seconds": t["interval_seconds"],
+                }
+                for name, t in self._timers.items()
+            }
+        }
+        default = self._timers.get(DEFAULT_TIMER)
+        if default:
+            data["end_time"] = default["end_time"].isoformat()
+            data["created_at"] = default["created_at"].isoformat()
+        # Imported here to keep it off the import path of short-lived entry points
+        import tempfile
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".timer_", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    @contextmanager
+    def _persist(self):
+        """Reload, let the caller change timers, then save, all under the cross-process file lock."""
+        with self._lock, open(self.path + ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._reload_if_changed()
+                yield
+                self._save()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _add(self, name: str, end_time: datetime, created_at: datetime, interval_seconds: Optional[int]):
+        self._timers[name] = {
+            "end_time": end_time,
+            "created_at": created_at,
+            "interval_seconds": interval_seconds,
+        }
+        deadline = end_time.timestamp()
+        if deadline > self._drained_at:
+            heapq.heappush(self._heap, (deadline, next(self._seq), name))
+        if len(self._heap) > 2 * len(self._timers) + 8:
+            # Mostly superseded entries; rebuild from the live ones
+            self._heap = [entry for entry in self._heap if self._is_current(entry)]
+            heapq.heapify(self._heap)
+
+    def _is_current(self, entry: Tuple[float, int, str]) -> bool:
+        timer = self._timers.get(entry[2])
+        return timer is not None and timer["end_time"].timestamp() == entry[0]
+
+    def _drain(self):
+        """Move deadlines that have passed to _due and drop superseded entries from the heap top."""
+        now = datetime.now().timestamp()
+        while self._heap and (self._heap[0][0] <= now or not self._is_current(self._heap[0])):
+            entry = heapq.heappop(self._heap)
+            if entry[0] <= now and self._is_current(entry) and entry[2] not in self._due:
+                self._due.append(entry[2])
+        self._drained_at = now
+
+    # Public API ------------------------------------------------------------
+
+    def set(self, name: str, seconds: int, interval_seconds: Optional[int] = None) -> datetime:
+        """Start (or replace) the named timer and return its end time."""
+        if not (1 <= seconds <= MAX_TIMER_SECONDS):
+            raise ValueError(f"Timer duration must be between 1 and {MAX_TIMER_SECONDS} seconds")
+        if interval_seconds is not None and not (1 <= interval_seconds <= seconds):
+            raise ValueError("Interval must be between 1 second and the timer duration")
+        with self._persist():
+            now = datetime.now()
+            end_time = now + timedelta(seconds=seconds)
+            self._add(name, end_time, now, interval_seconds)
+        return end_time
+
+    def cancel(self, name: str) -> bool:
+        """Remove the named timer; returns False if it did not exist. Its heap entry goes stale."""
+        with self._persist():
+            return self._timers.pop(name, None) is not None
+
+    def next_deadline(self) -> Optional[Tuple[str, datetime]]:
+        """Return (name, end time) of the running timer that ends soonest, if any."""
+        with self._lock:
+            self._reload_if_changed()
+            self._drain()
+            if not self._heap:
+                return None
+            name = self._heap[0][2]
+            return name, self._timers[name]["end_time"]
+
+    def expired(self) -> List[str]:
+        """Names of timers that ran out since the last call, in deadline order; each is reported once."""
+        with self._lock:
+            self._reload_if_changed()
+            self._drain()
+            due, self._due = self._due, []
+            return due
+
+    def status(self, name: str = DEFAULT_TIMER) -> Dict[str, Any]:
+        """Status dict for one timer, in the format of get_timer_temp()."""
+        try:
+            with self._lock:
+                self._reload_if_changed()
+                timer = self._timers.get(name)
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+        if timer is None:
+            return {"status": "no_timer", "message": "No timer currently set"}
+
+        end_time = timer["end_time"]
+        created_at = timer["created_at"]
+        now = datetime.now()
+        if now >= end_time:
+            time_expired = int((now - end_time).total_seconds())
+            return {
+                "status": "expired",
+                "message": f"Timer expired {time_expired} seconds ago",
+                "end_time": end_time.isoformat(),
+                "created_at": created_at.isoformat(),
+            }
+
+        remaining_seconds = int((end_time - now).total_seconds())
+        remaining_minutes = remaining_seconds // 60
+        remaining_secs = remaining_seconds % 60
+        result = {
+            "status": "running",
+            "message": f"Timer running - {remaining_minutes}:{remaining_secs:02d} remaining",
+            "remaining_seconds": remaining_seconds,
+            "end_time": end_time.isoformat(),
+            "created_at": created_at.isoformat(),
+        }
+        interval = timer["interval_seconds"]
+        if interval:
+            elapsed = int((now - created_at).total_seconds())
+            total = int((end_time - created_at).total_seconds())
+            rounds = -(-total // interval)
+            current_round = min(elapsed // interval + 1, rounds)
+            interval_remaining = interval - elapsed % interval
+            result.update({
+                "round": current_round,
+                "rounds": rounds,
+                "interval_remaining_seconds": interval_remaining,
+                "message": f"Round {current_round}/{rounds} - next interval in {interval_remaining}s, "
+                           f"{remaining_minutes}:{remaining_secs:02d} remaining",
+            })
+        return result
+
+
+engine = TimerEngine()
+
+
+def set_rest_timer(seconds: int) -> str:
+    """Start the default rest timer; used after completing a set."""
+    end_time = engine.set(DEFAULT_TIMER, seconds)
+    return f"Rest timer set for {seconds} seconds (until {end_time.strftime('%H:%M:%S')})"
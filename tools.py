@@ -1,40 +1,20 @@
-"""Application tools for workout tracking agent."""
+"""Application tools for workout tracking agent.
+
+Thin `function_tool` wrappers over `workout_ops`; the docstrings are what the
+model sees as each tool's description.
+"""
 
 from typing import List, Dict, Any, Optional
-from datetime import date, timedelta, datetime, timezone
-import psycopg2.extras
+from datetime import datetime, timezone
 
-from db import get_connection, get_today_log_id
+import workout_ops
+from timer_engine import DEFAULT_TIMER
 from agents import function_tool
 
 def get_corrected_time():
     """Get the current UTC time"""
     return datetime.now(timezone.utc)
 
-# Helper validation
-MAX_LOAD = 2000
-MAX_REPS = 100
-
-DAY_MAP = {
-    "sunday": 0,
-    "monday": 1,
-    "tuesday": 2,
-    "wednesday": 3,
-    "thursday": 4,
-    "friday": 5,
-    "saturday": 6,
-}
-
-
-def _get_exercise_id(conn, name: str) -> int:
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cur.execute("SELECT id FROM exercises WHERE name = %s", (name,))
-    row = cur.fetchone()
-    if row:
-        return row['id']
-    cur.execute("INSERT INTO exercises (name) VALUES (%s) RETURNING id", (name,))
-    return cur.fetchone()['id']
-
 
 @function_tool(strict_mode=False)
 def new_daily_plan(items: List[Dict[str, Any]]):
@@ -57,30 +37,7 @@ def new_daily_plan(items: List[Dict[str, Any]]):
     
     Returns: Success message with number of sets planned
     """
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        log_id = get_today_log_id(conn)
-        for item in items:
-            reps = int(item["reps"])
-            load = float(item["load"])
-            rest = int(item.get("rest", 60))  # Default to 60 seconds if not provided
-            if not (1 <= reps <= MAX_REPS):
-                raise ValueError("reps out of range")
-            if not (0 <= load <= MAX_LOAD):
-                raise ValueError("load out of range")
-            if not (0 <= rest <= 600):  # Max 10 minutes rest
-                raise ValueError("rest time out of range")
-            exercise_id = _get_exercise_id(conn, item["exercise"])
-            order_num = int(item["order"])
-            cur.execute(
-                "INSERT INTO planned_sets (log_id, exercise_id, order_num, reps, load, rest) VALUES (%s, %s, %s, %s, %s, %s)",
-                (log_id, exercise_id, order_num, reps, load, rest),
-            )
-        conn.commit()
-    finally:
-        conn.close()
-    return f"planned {len(items)} sets for today"
+    return workout_ops.new_daily_plan(items)
 
 
 @function_tool(strict_mode=False)
@@ -102,18 +59,7 @@ def get_today_plan() -> List[Dict[str, Any]]:
         {"exercise": "squat", "reps": 8, "load": 185.0, "rest": 120, "order_num": 2}
     ]
     """
-    conn = get_connection()
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        log_id = get_today_log_id(conn)
-        cur.execute(
-            "SELECT e.name as exercise, reps, load, rest, order_num FROM planned_sets ps JOIN exercises e ON ps.exercise_id = e.id WHERE log_id = %s ORDER BY order_num",
-            (log_id,),
-        )
-        rows = [dict(row) for row in cur.fetchall()]
-    finally:
-        conn.close()
-    return rows
+    return workout_ops.get_today_plan()
 
 
 @function_tool(strict_mode=False)
@@ -134,23 +80,7 @@ def log_completed_set(exercise: str, reps: int, load: float):
     
     Returns: "logged" on success
     """
-    if not (1 <= reps <= MAX_REPS):
-        raise ValueError("reps out of range")
-    if not (0 <= load <= MAX_LOAD):
-        raise ValueError("load out of range")
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        log_id = get_today_log_id(conn)
-        exercise_id = _get_exercise_id(conn, exercise)
-        cur.execute(
-            "INSERT INTO completed_sets (log_id, exercise_id, reps_done, load_done, completed_at) VALUES (%s, %s, %s, %s, %s)",
-            (log_id, exercise_id, reps, load, datetime.now(timezone.utc)),
-        )
-        conn.commit()
-    finally:
-        conn.close()
-    return "logged"
+    return workout_ops.log_completed_set(exercise, reps, load)
 
 
 @function_tool(strict_mode=False)
@@ -181,93 +111,7 @@ def complete_planned_set(exercise: Optional[str] = None, reps: Optional[int] = N
     
     Returns: Detailed completion message with actual values and timer info
     """
-    conn = get_connection()
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        log_id = get_today_log_id(conn)
-        
-        # Find the next planned set to complete (same logic as UI)
-        if exercise:
-            # Complete specific exercise - find first planned set for that exercise
-            cur.execute("""
-                SELECT ps.id, ps.exercise_id, e.name as exercise, ps.reps, ps.load, ps.rest, ps.order_num
-                FROM planned_sets ps
-                JOIN exercises e ON ps.exercise_id = e.id
-                WHERE ps.log_id = %s AND e.name = %s
-                ORDER BY ps.order_num
-                LIMIT 1
-            """, (log_id, exercise))
-        else:
-            # Complete next planned set in order (first in queue, same as UI)
-            cur.execute("""
-                SELECT ps.id, ps.exercise_id, e.name as exercise, ps.reps, ps.load, ps.rest, ps.order_num
-                FROM planned_sets ps
-                JOIN exercises e ON ps.exercise_id = e.id
-                WHERE ps.log_id = %s
-                ORDER BY ps.order_num
-                LIMIT 1
-            """, (log_id,))
-        
-        planned_set = cur.fetchone()
-        if not planned_set:
-            if exercise:
-                return f"No planned sets found for exercise: {exercise}"
-            else:
-                return "No planned sets remaining for today"
-        
-        # Use planned values as defaults, override if provided
-        actual_reps = reps if reps is not None else planned_set['reps']
-        actual_load = load if load is not None else planned_set['load']
-        
-        # Validate overrides
-        if not (1 <= actual_reps <= MAX_REPS):
-            raise ValueError("reps out of range")
-        if not (0 <= actual_load <= MAX_LOAD):
-            raise ValueError("load out of range")
-        
-        # Record the completion
-        cur.execute(
-            "INSERT INTO completed_sets (log_id, exercise_id, planned_set_id, reps_done, load_done, completed_at) VALUES (%s, %s, %s, %s, %s, %s)",
-            (log_id, planned_set['exercise_id'], planned_set['id'], actual_reps, actual_load, datetime.now(timezone.utc)),
-        )
-        
-        # Delete the completed planned set (same as UI behavior)
-        cur.execute(
-            "DELETE FROM planned_sets WHERE id = %s",
-            (planned_set['id'],)
-        )
-        
-        conn.commit()
-        
-        # Set timer for rest period if there's a rest time
-        rest_time = planned_set.get('rest', 60)  # Default to 60 seconds
-        if rest_time > 0:
-            try:
-                import subprocess
-                import os
-                # Ensure we're in the correct directory for the timer script
-                script_dir = os.path.dirname(os.path.abspath(__file__))
-                timer_script = os.path.join(script_dir, 'timer_temp.py')
-                result = subprocess.run(['python', timer_script, 'set', str(rest_time), 'seconds'], 
-                                       capture_output=True, text=True, cwd=script_dir)
-                if result.returncode == 0:
-                    rest_info = f" Rest timer set for {rest_time} seconds."
-                else:
-                    rest_info = f" (Timer error: {result.stderr.strip()})"
-            except Exception as e:
-                rest_info = f" (Timer error: {e})"
-        else:
-            rest_info = ""
-        
-        # Return completion summary
-        result = f"Completed {planned_set['exercise']}: {actual_reps} reps @ {actual_load} load"
-        if reps is not None or load is not None:
-            result += f" (planned: {planned_set['reps']} reps @ {planned_set['load']} load)"
-        result += rest_info
-        return result
-        
-    finally:
-        conn.close()
+    return workout_ops.complete_planned_set(exercise, reps, load)
 
 
 @function_tool(strict_mode=False)
@@ -288,15 +132,7 @@ def update_summary(text: str):
     
     Returns: "summary updated" on success
     """
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        log_id = get_today_log_id(conn)
-        cur.execute("UPDATE daily_logs SET summary = %s WHERE id = %s", (text, log_id))
-        conn.commit()
-    finally:
-        conn.close()
-    return "summary updated"
+    return workout_ops.update_summary(text)
 
 
 @function_tool(strict_mode=False)
@@ -311,8 +147,8 @@ def get_recent_history(days: int) -> List[Dict[str, Any]]:
     Returns: List of dictionaries, each containing:
     - log_date (str): Date of the workout (YYYY-MM-DD format)
     - exercise (str): Exercise name
-    - reps (int): Planned repetitions (if planned)
-    - load (float): Planned weight in pounds (if planned)
+    - reps (int): Planned repetitions (if planned; null for unplanned extra sets)
+    - load (float): Planned weight in pounds (if planned; null for unplanned extra sets)
     - reps_done (int): Actual repetitions completed (if completed)
     - load_done (float): Actual weight used in pounds (if completed)
     
@@ -323,26 +159,44 @@ def get_recent_history(days: int) -> List[Dict[str, Any]]:
     
     Use this to analyze progress, identify patterns, or review recent workouts.
     """
-    conn = get_connection()
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        start = date.today() - timedelta(days=days)
-        cur.execute(
-            """
-            SELECT dl.log_date, e.name as exercise, ps.reps, ps.load, cs.reps_done, cs.load_done
-            FROM planned_sets ps
-            JOIN daily_logs dl ON ps.log_id = dl.id
-            JOIN exercises e ON ps.exercise_id = e.id
-            LEFT JOIN completed_sets cs ON cs.planned_set_id = ps.id
-            WHERE dl.log_date >= %s
-            ORDER BY dl.log_date, ps.order_num
-            """,
-            (start.isoformat(),),
-        )
-        rows = [dict(row) for row in cur.fetchall()]
-    finally:
-        conn.close()
-    return rows
+    return workout_ops.get_recent_history(days)
+
+
+@function_tool(strict_mode=False)
+def get_training_analytics(days: int = 28, exercise: Optional[str] = None, period: str = "week") -> Dict[str, Any]:
+    """Compute training statistics for recent days: volume, tonnage, e1RM progression and adherence.
+
+    Use this instead of run_sql or get_recent_history whenever the user asks about
+    trends, totals, weekly tonnage, strength progression or how consistent they have been.
+    All numbers are computed exactly; report them rather than recalculating.
+
+    Parameters:
+    - days (int): Number of days to analyze, including today (default 28)
+    - exercise (str, optional): Limit to one exercise (e.g., "bench press"); case-insensitive
+    - period (str): "week" (default) or "day" - granularity of the periods table
+
+    Archived months are included, so long windows cover the full history.
+
+    Returns: Dictionary of compact tables, each {"columns": [...], "rows": [[...], ...]}:
+    - window: start, end, days, period and overall adherence_pct
+    - exercises: per exercise - sessions, sets, reps, tonnage (reps x load), best_e1rm,
+      first_e1rm and last_e1rm (best estimated 1RM at the first and last session)
+    - periods: per period and exercise - sets, reps, tonnage, best_e1rm and rolling_tonnage
+      (average tonnage over the last 4 weeks or 7 days)
+    - adherence: per day with planned sets - planned_done (planned sets completed), planned,
+      adherence_pct; unplanned extra sets count towards volume but not adherence
+
+    e1RM uses the Epley formula: load x (1 + reps / 30), or the load itself for singles.
+
+    Examples:
+    - get_training_analytics()  # Last 4 weeks, by week
+    - get_training_analytics(90, "squat")  # Squat progression over 3 months
+    - get_training_analytics(7, period="day")  # Daily breakdown of the last week
+    """
+    # NumPy is imported on first use to keep it off the tools import path
+    import analytics
+
+    return analytics.training_analytics(days, exercise, period)
 
 
 @function_tool(strict_mode=False)
@@ -358,35 +212,7 @@ def set_weekly_split_day(day: str, items: List[Dict[str, Any]]):
 
     Returns success message with number of sets stored.
     """
-    key = day.lower()
-    if key not in DAY_MAP:
-        raise ValueError("invalid day")
-    day_num = DAY_MAP[key]
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM split_sets WHERE day_of_week = %s", (day_num,))
-        for item in items:
-            reps = int(item["reps"])
-            load = float(item["load"])
-            rest = int(item.get("rest", 60))
-            if not (1 <= reps <= MAX_REPS):
-                raise ValueError("reps out of range")
-            if not (0 <= load <= MAX_LOAD):
-                raise ValueError("load out of range")
-            if not (0 <= rest <= 600):
-                raise ValueError("rest out of range")
-            ex_id = _get_exercise_id(conn, item["exercise"])
-            order_num = int(item.get("order", item.get("order_num", 1)))
-            relative = bool(item.get("relative", False))
-            cur.execute(
-                "INSERT INTO split_sets (day_of_week, exercise_id, order_num, reps, load, rest, relative) VALUES (%s,%s,%s,%s,%s,%s,%s)",
-                (day_num, ex_id, order_num, reps, load, rest, relative),
-            )
-        conn.commit()
-    finally:
-        conn.close()
-    return f"split updated for {key} with {len(items)} sets"
+    return workout_ops.set_weekly_split_day(day, items)
 
 
 @function_tool(strict_mode=False)
@@ -396,59 +222,35 @@ def get_weekly_split(day: Optional[str] = None) -> List[Dict[str, Any]]:
     Parameters:
     - day (str, optional): Specific day name to fetch. If omitted, returns all days.
 
-    Returns list of sets with exercise, reps, load, rest and order_num.
+    Returns list of sets with exercise, reps, load, rest, order_num and relative.
+    For relative sets, load is a percentage of the exercise's estimated 1RM;
+    resolved_load is that percentage applied to the current best e1RM (the
+    weight apply_weekly_split would plan). For other sets resolved_load equals load.
     """
-    conn = get_connection()
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        if day is None:
-            cur.execute(
-                "SELECT day_of_week, e.name as exercise, reps, load, rest, order_num, relative FROM split_sets ss JOIN exercises e ON ss.exercise_id = e.id ORDER BY day_of_week, order_num"
-            )
-        else:
-            key = day.lower()
-            if key not in DAY_MAP:
-                raise ValueError("invalid day")
-            cur.execute(
-                "SELECT e.name as exercise, reps, load, rest, order_num, relative FROM split_sets ss JOIN exercises e ON ss.exercise_id = e.id WHERE day_of_week = %s ORDER BY order_num",
-                (DAY_MAP[key],),
-            )
-        rows = [dict(row) for row in cur.fetchall()]
-    finally:
-        conn.close()
-    return rows
-
-
-def _execute_sql(query: str, params: Optional[Dict[str, Any]] = None, confirm: bool = False):
-    """Internal SQL execution function"""
-    if params is None:
-        params = {}
-    lowered = query.strip().lower()
-    if not lowered.startswith("select") and not confirm:
-        raise ValueError("updates require confirm=True")
-    conn = get_connection()
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        
-        # Convert params dict to list if needed for PostgreSQL
-        if params:
-            # PostgreSQL uses %(name)s format for named parameters
-            cur.execute(query, params)
-        else:
-            cur.execute(query)
-            
-        if lowered.startswith("select"):
-            rows = [dict(row) for row in cur.fetchall()]
-        else:
-            conn.commit()
-            rows = {"rows_affected": cur.rowcount}
-    finally:
-        conn.close()
-    return rows
+    return workout_ops.get_weekly_split(day)
 
 
 @function_tool(strict_mode=False)
-def run_sql(query: str, params: Optional[Dict[str, Any]] = None, confirm: bool = False):
+def apply_weekly_split(log_date: Optional[str] = None):
+    """Fill a day's workout plan from the weekly split.
+
+    Only applies when that day has no planned sets yet. Relative split loads are
+    converted to pounds from the current best estimated 1RM (0 if there is none).
+
+    Parameters:
+    - log_date (str, optional): Date to plan (YYYY-MM-DD). Defaults to today
+
+    Examples:
+    - apply_weekly_split()  # Today's plan from today's split day
+    - apply_weekly_split("2024-06-03")  # Plan a specific date
+
+    Returns: Message with the number of sets planned, or why nothing was added
+    """
+    return workout_ops.apply_weekly_split(log_date)
+
+
+@function_tool(strict_mode=False)
+def run_sql(query: str, params: Optional[Dict[str, Any]] = None, confirm: bool = False, summary: bool = False):
     """Execute SQL queries against the workout database.
     
     SELECT queries run automatically. UPDATE/INSERT/DELETE require confirm=True for safety.
@@ -457,6 +259,8 @@ def run_sql(query: str, params: Optional[Dict[str, Any]] = None, confirm: bool =
     - query (str): SQL query to execute. Use %(param_name)s for parameter placeholders
     - params (dict, optional): Dictionary of named parameters for the query
     - confirm (bool): Must be True for UPDATE/INSERT/DELETE queries. Defaults to False
+    - summary (bool): For SELECT, return only the total row count, column names and the
+      first few rows. Use it to size up a table before pulling rows
     
     Examples:
     - run_sql("SELECT * FROM exercises")  # Simple select
@@ -465,12 +269,16 @@ def run_sql(query: str, params: Optional[Dict[str, Any]] = None, confirm: bool =
               {"new_name": "back squat", "id": 1}, confirm=True)  # Requires confirm=True
     
     Returns: 
-    - For SELECT: List of dictionaries with query results
+    - For SELECT: List of dictionaries with query results. Large results are cut off at a
+      row/byte limit and end with a {"truncated": true, "message": ...} marker
+    - For SELECT with summary=True: {"row_count", "columns", "first_rows"}
     - For UPDATE/INSERT/DELETE: Dictionary with "rows_affected" count
+    - {"error": ...} if the query exceeds the statement timeout
     
     Safety: Only SELECT queries are allowed without confirm=True to prevent accidental data changes.
+    Prefer aggregates (COUNT, MAX, GROUP BY) and LIMIT over fetching whole tables.
     """
-    return _execute_sql(query, params, confirm)
+    return workout_ops.execute_sql(query, params, confirm, summary)
 
 
 @function_tool(strict_mode=False)
@@ -497,20 +305,22 @@ def arbitrary_update(query: str, params: Optional[Dict[str, Any]] = None):
     Note: This function is for advanced use cases. Most operations should use the specific 
     functions like new_daily_plan, complete_planned_set, etc.
     """
-    if params is None:
-        params = {}
-    return _execute_sql(query, params=params, confirm=True)
+    return workout_ops.execute_sql(query, params or {}, confirm=True)
 
 
 @function_tool(strict_mode=False)
-def set_timer(minutes: int):
-    """Set a workout timer for rest periods or workout duration.
+def set_timer(minutes: int, name: str = DEFAULT_TIMER, interval_seconds: Optional[int] = None):
+    """Set a workout timer for rest periods, workout duration or EMOM intervals.
     
     Useful for timing rest between sets or entire workout duration.
     Timer runs in the background and can be checked with get_timer().
     
     Parameters:
     - minutes (int): Timer duration in minutes (1-180). Max 3 hours
+    - name (str, optional): Timer name, e.g. "rest", "workout" or "emom". Defaults to "rest".
+      Timers with different names run side by side
+    - interval_seconds (int, optional): Interval length for EMOM-style timers. When set,
+      get_timer() also reports the current round and time until the next interval
     
     Common timer durations:
     - 1-2 minutes: Rest between light sets
@@ -520,44 +330,30 @@ def set_timer(minutes: int):
     
     Examples:
     - set_timer(3)   # 3-minute rest timer
-    - set_timer(90)  # 90-minute workout timer
-    - set_timer(2)   # 2-minute rest between sets
+    - set_timer(90, name="workout")  # 90-minute workout timer alongside rest timers
+    - set_timer(10, name="emom", interval_seconds=60)  # 10 rounds every minute on the minute
     
     Returns: Success message with timer duration or error message
     
-    Note: Setting a new timer will replace any existing timer.
+    Note: Setting a timer replaces any existing timer with the same name.
     """
-    if not (1 <= minutes <= 180):  # Max 3 hours
-        raise ValueError("Timer duration must be between 1 and 180 minutes")
-    
-    try:
-        import subprocess
-        import os
-        # Ensure we're in the correct directory for the timer script
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        timer_script = os.path.join(script_dir, 'timer_temp.py')
-        result = subprocess.run(['python', timer_script, 'set', str(minutes)], 
-                               capture_output=True, text=True, cwd=script_dir)
-        if result.returncode == 0:
-            return f"Timer set for {minutes} minutes"
-        else:
-            return f"Timer error: {result.stderr.strip()}"
-    except Exception as e:
-        return f"Timer error: {e}"
+    return workout_ops.set_timer(minutes, name, interval_seconds)
 
 
 @function_tool(strict_mode=False)
-def get_timer() -> Dict[str, Any]:
+def get_timer(name: Optional[str] = None) -> Dict[str, Any]:
     """Check the current timer status and remaining time.
     
     Use this to see how much time is left on a rest timer or workout timer.
     
-    No parameters required.
+    Parameters:
+    - name (str, optional): Timer to check. Defaults to the rest timer
     
     Returns: Dictionary containing:
     - status (str): Timer state - "running", "expired", "no_timer", or "error"  
     - remaining_seconds (int): Seconds left (if status is "running")
     - message (str): Human-readable status message
+    - round / rounds / interval_remaining_seconds: Only for interval (EMOM) timers
     
     Possible statuses:
     - "running": Timer is active with remaining_seconds showing time left
@@ -568,31 +364,11 @@ def get_timer() -> Dict[str, Any]:
     Examples:
     - get_timer() might return {"status": "running", "remaining_seconds": 120, "message": "2:00 remaining"}
     - get_timer() might return {"status": "expired", "message": "Timer expired!"}
-    - get_timer() might return {"status": "no_timer", "message": "No timer set"}
+    - get_timer(name="workout") might return {"status": "no_timer", "message": "No timer set"}
     
     Use this between sets to check if rest time is up.
     """
-    try:
-        import subprocess
-        import os
-        import json
-        # Ensure we're in the correct directory for the timer script
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        timer_script = os.path.join(script_dir, 'timer_temp.py')
-        result = subprocess.run(['python', timer_script, 'get'], 
-                               capture_output=True, text=True, cwd=script_dir)
-        if result.returncode == 0:
-            try:
-                # Parse the JSON output from timer_temp.py
-                timer_data = json.loads(result.stdout.strip())
-                return timer_data
-            except json.JSONDecodeError:
-                # If it's not JSON, treat it as a simple message
-                return {"status": "no_timer", "message": result.stdout.strip()}
-        else:
-            return {"status": "error", "message": f"Timer error: {result.stderr.strip()}"}
-    except Exception as e:
-        return {"status": "error", "message": f"Timer error: {e}"}
+    return workout_ops.get_timer(name)
 
 
 __all__ = [
@@ -602,8 +378,10 @@ __all__ = [
     "complete_planned_set",
     "update_summary",
     "get_recent_history",
+    "get_training_analytics",
     "set_weekly_split_day",
     "get_weekly_split",
+    "apply_weekly_split",
     "run_sql",
     "arbitrary_update",
     "set_timer",
@@ -0,0 +1,612 @@
+"""Workout data operations used by the agent tools and automations.
+
+Plain functions over the connection pool with no agent SDK import, so
+entry points like `complete_next_set.py` start quickly. `tools.py` wraps
+these as `function_tool`s for the agent.
+"""
+
+import functools
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+import uuid
+from datetime import date, timedelta, datetime, timezone
+import psycopg2.errors
+import psycopg2.extras
+
+from db import TODAY_LOG_UPSERT_SQL, pooled_connection, current_log_date, get_today_log_id, invalidate_today_log_cache
+from context_cache import bump_data_version
+from read_cache import read_through
+from prepared_statements import execute_prepared, register
+from timer_engine import DEFAULT_TIMER, engine as timer_engine, set_rest_timer
+
+# Helper validation
+MAX_LOAD = 2000
+MAX_REPS = 100
+
+DAY_MAP = {
+    "sunday": 0,
+    "monday": 1,
+    "tuesday": 2,
+    "wednesday": 3,
+    "thursday": 4,
+    "friday": 5,
+    "saturday": 6,
+}
+DAY_NAMES = {num: name.capitalize() for name, num in DAY_MAP.items()}
+
+# Queries shared with the async tools (async_tools.py); psycopg 2 and 3 both use %s
+TODAY_PLAN_SQL = "SELECT e.name as exercise, reps, load, rest, order_num FROM planned_sets ps JOIN exercises e ON ps.exercise_id = e.id WHERE log_id = %s ORDER BY order_num"
+
+# Pop the next planned set (optionally for one exercise) and record its completion
+# in one statement. SKIP LOCKED lets concurrent callers each take a different set.
+# The planned row is deleted in the same statement, so the completion keeps
+# planned = TRUE and the planned reps/load itself (planned_set_id stays NULL).
+COMPLETE_NEXT_SET_SQL = """
+    WITH next_set AS (
+        SELECT ps.id, ps.exercise_id, ps.reps, ps.load, ps.rest, ps.order_num
+        FROM planned_sets ps
+        JOIN exercises e ON ps.exercise_id = e.id
+        WHERE ps.log_id = %s AND (%s::text IS NULL OR e.name = %s)
+        ORDER BY ps.order_num
+        LIMIT 1
+        FOR UPDATE OF ps SKIP LOCKED
+    ), removed AS (
+        DELETE FROM planned_sets ps
+        USING next_set n
+        WHERE ps.id = n.id
+        RETURNING ps.id
+    ), completed AS (
+        INSERT INTO completed_sets (log_id, exercise_id, reps_done, load_done, completed_at,
+                                    planned, planned_reps, planned_load)
+        SELECT %s, n.exercise_id, COALESCE(%s, n.reps), COALESCE(%s, n.load), %s, TRUE, n.reps, n.load
+        FROM next_set n
+        JOIN removed r ON r.id = n.id
+        RETURNING id, reps_done, load_done
+    )
+    SELECT n.id, n.exercise_id, e.name AS exercise, n.reps, n.load, n.rest, n.order_num,
+           c.id AS completed_id, c.reps_done, c.load_done
+    FROM next_set n
+    CROSS JOIN completed c
+    JOIN exercises e ON e.id = n.exercise_id
+"""
+
+
+def complete_next_set_params(log_id, exercise=None, reps=None, load=None):
+    """Positional parameters for COMPLETE_NEXT_SET_SQL"""
+    return (log_id, exercise, exercise, log_id, reps, load, datetime.now(timezone.utc))
+
+
+# Hot per-set statements run as server-side prepared statements
+register("today_plan", TODAY_PLAN_SQL)
+register("complete_next_set", COMPLETE_NEXT_SET_SQL)
+
+INSERT_EXTRA_COMPLETION_SQL = "INSERT INTO completed_sets (log_id, exercise_id, reps_done, load_done, completed_at) VALUES (%s, %s, %s, %s, %s)"
+
+UPDATE_SUMMARY_SQL = "UPDATE daily_logs SET summary = %s WHERE id = %s"
+
+# Completed sets in the window, then planned sets nobody has completed yet.
+# The completed_at bound lets Postgres prune completed_sets partitions
+# outside the window; log_date does the exact filtering.
+RECENT_HISTORY_SQL = """
+    SELECT log_date, exercise, reps, load, reps_done, load_done
+    FROM (
+        SELECT dl.log_date, e.name AS exercise, COALESCE(cs.planned_reps, ps.reps) AS reps,
+               COALESCE(cs.planned_load, ps.load) AS load, cs.reps_done, cs.load_done,
+               0 AS kind, cs.completed_at, ps.order_num
+        FROM completed_sets cs
+        JOIN daily_logs dl ON cs.log_id = dl.id
+        JOIN exercises e ON cs.exercise_id = e.id
+        LEFT JOIN planned_sets ps ON cs.planned_set_id = ps.id
+        WHERE cs.completed_at >= %s AND dl.log_date >= %s
+        UNION ALL
+        SELECT dl.log_date, e.name, ps.reps, ps.load, NULL, NULL, 1, NULL, ps.order_num
+        FROM planned_sets ps
+        JOIN daily_logs dl ON ps.log_id = dl.id
+        JOIN exercises e ON ps.exercise_id = e.id
+        WHERE dl.log_date >= %s
+          AND NOT EXISTS (
+              SELECT 1 FROM completed_sets cs
+              WHERE cs.planned_set_id = ps.id AND cs.completed_at >= %s
+          )
+    ) history
+    ORDER BY log_date, kind, completed_at, order_num
+"""
+
+
+def recent_history_params(days: int):
+    """Positional parameters for RECENT_HISTORY_SQL"""
+    start = current_log_date() - timedelta(days=days)
+    # A day of slack for the rollover hour and timezone differences
+    completed_after = datetime.combine(start - timedelta(days=1), datetime.min.time())
+    return (completed_after, start, start, completed_after)
+
+# Relative split loads are a percentage of the exercise's best estimated 1RM
+# (exercise_e1rm, kept current by a trigger); with no e1RM yet the load is 0,
+# as in db.js applySplitIfEmpty
+RESOLVED_SPLIT_LOAD = (
+    "CASE WHEN ss.relative THEN COALESCE(ROUND((r.e1rm * ss.load / 100)::numeric), 0)::real ELSE ss.load END"
+)
+
+WEEKLY_SPLIT_ALL_SQL = f"""
+    SELECT ss.day_of_week, e.name as exercise, ss.reps, ss.load, ss.rest, ss.order_num, ss.relative,
+           {RESOLVED_SPLIT_LOAD} AS resolved_load
+    FROM split_sets ss
+    JOIN exercises e ON ss.exercise_id = e.id
+    LEFT JOIN exercise_e1rm r ON r.exercise_id = ss.exercise_id
+    ORDER BY ss.day_of_week, ss.order_num
+"""
+
+WEEKLY_SPLIT_DAY_SQL = f"""
+    SELECT e.name as exercise, ss.reps, ss.load, ss.rest, ss.order_num, ss.relative,
+           {RESOLVED_SPLIT_LOAD} AS resolved_load
+    FROM split_sets ss
+    JOIN exercises e ON ss.exercise_id = e.id
+    LEFT JOIN exercise_e1rm r ON r.exercise_id = ss.exercise_id
+    WHERE ss.day_of_week = %s
+    ORDER BY ss.order_num
+"""
+
+# Expands one split day into a dated plan in a single statement
+APPLY_SPLIT_SQL = f"""
+    INSERT INTO planned_sets (log_id, exercise_id, order_num, reps, load, rest)
+    SELECT %s, ss.exercise_id, ss.order_num, ss.reps, {RESOLVED_SPLIT_LOAD}, ss.rest
+    FROM split_sets ss
+    LEFT JOIN exercise_e1rm r ON r.exercise_id = ss.exercise_id
+    WHERE ss.day_of_week = %s
+    ORDER BY ss.order_num
+"""
+
+
+def validate_set_values(reps, load):
+    if not (1 <= reps <= MAX_REPS):
+        raise ValueError("reps out of range")
+    if not (0 <= load <= MAX_LOAD):
+        raise ValueError("load out of range")
+
+
+def validate_overrides(reps, load):
+    """Validate optional reps/load overrides; planned values are already valid"""
+    if reps is not None and not (1 <= reps <= MAX_REPS):
+        raise ValueError("reps out of range")
+    if load is not None and not (0 <= load <= MAX_LOAD):
+        raise ValueError("load out of range")
+
+
+EXERCISE_LOOKUP_SQL = """
+    SELECT DISTINCT ON (key) key, id
+    FROM (SELECT lower(regexp_replace(btrim(name), '\\s+', ' ', 'g')) AS key, id FROM exercises) e
+    WHERE key = ANY(%s)
+    ORDER BY key, id
+"""
+
+# DO UPDATE (rather than DO NOTHING) so rows created concurrently are returned too
+EXERCISE_UPSERT_SQL = """
+    INSERT INTO exercises (name) SELECT DISTINCT unnest(%s::text[])
+    ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+    RETURNING id, name
+"""
+
+
+def normalize_exercise_name(name: str) -> str:
+    """Cache key for an exercise name: trimmed, single-spaced, lower case"""
+    return " ".join(name.split()).lower()
+
+
+class ExerciseIdCache:
+    """Bounded, thread-safe LRU of normalized exercise name -> id"""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[int]:
+        with self._lock:
+            ex_id = self._ids.get(key)
+            if ex_id is not None:
+                self._ids.move_to_end(key)
+            return ex_id
+
+    def put(self, key: str, ex_id: int):
+        with self._lock:
+            self._ids[key] = ex_id
+            self._ids.move_to_end(key)
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+
+exercise_cache = ExerciseIdCache(int(os.environ.get("EXERCISE_CACHE_SIZE", "1024")))
+
+
+def warm_exercise_cache():
+    """Preload the exercise cache (e.g. at service startup)"""
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id, name FROM exercises ORDER BY id DESC LIMIT %s", (exercise_cache.max_size,))
+        for ex_id, name in cur.fetchall():
+            exercise_cache.put(normalize_exercise_name(name), ex_id)
+
+
+def invalidate_exercise_cache():
+    exercise_cache.clear()
+
+
+def retry_on_stale_ids(func):
+    """Retry a write once with cold id caches if it hit a foreign key violation.
+
+    A cached exercise or daily_logs id goes stale when its row is deleted
+    behind this process (reset, manual cleanup); the failed transaction has
+    already been rolled back, so the write can simply run again.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except psycopg2.errors.ForeignKeyViolation:
+            invalidate_exercise_cache()
+            invalidate_today_log_cache()
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _get_exercise_ids(conn, names: List[str]) -> Dict[str, int]:
+    """Resolve (creating as needed) exercise names to ids.
+
+    Names are matched case- and whitespace-insensitively. Cached names cost no
+    round trip; misses are looked up in one query and whatever is still
+    missing is created in one INSERT ... ON CONFLICT.
+    """
+    result: Dict[str, int] = {}
+    missing: Dict[str, List[str]] = {}
+    for name in names:
+        key = normalize_exercise_name(name)
+        ex_id = exercise_cache.get(key)
+        if ex_id is not None:
+            result[name] = ex_id
+        else:
+            missing.setdefault(key, []).append(name)
+    if not missing:
+        return result
+
+    cur = conn.cursor()
+    cur.execute(EXERCISE_LOOKUP_SQL, (list(missing),))
+    found = dict(cur.fetchall())
+    to_create = [" ".join(originals[0].split()) for key, originals in missing.items() if key not in found]
+    if to_create:
+        cur.execute(EXERCISE_UPSERT_SQL, (to_create,))
+        for ex_id, name in cur.fetchall():
+            found[normalize_exercise_name(name)] = ex_id
+    for key, originals in missing.items():
+        exercise_cache.put(key, found[key])
+        for name in originals:
+            result[name] = found[key]
+    return result
+
+
+def _get_exercise_id(conn, name: str) -> int:
+    return _get_exercise_ids(conn, [name])[name]
+
+
+@retry_on_stale_ids
+def new_daily_plan(items: List[Dict[str, Any]]) -> str:
+    """Append sets to today's plan, creating today's log if needed"""
+    # pydantic is imported on first use to keep it off the automation import path
+    from models import PlanItem
+
+    # Validate everything before touching the database
+    plan = [PlanItem(**item) for item in items]
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        log_id = get_today_log_id(conn)
+        if plan:
+            exercise_ids = _get_exercise_ids(conn, [p.exercise for p in plan])
+            psycopg2.extras.execute_values(
+                cur,
+                "INSERT INTO planned_sets (log_id, exercise_id, order_num, reps, load, rest) VALUES %s",
+                [(log_id, exercise_ids[p.exercise], p.order, p.reps, p.load, p.rest) for p in plan],
+                page_size=len(plan),
+            )
+        conn.commit()
+    bump_data_version()
+    return f"planned {len(items)} sets for today"
+
+
+@read_through("get_today_plan")
+def get_today_plan() -> List[Dict[str, Any]]:
+    """Today's remaining planned sets in order"""
+    with pooled_connection() as conn:
+        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        log_id = get_today_log_id(conn, create=False)
+        if log_id is None:
+            return []
+        execute_prepared(cur, "today_plan", (log_id,))
+        rows = [dict(row) for row in cur.fetchall()]
+    return rows
+
+
+@retry_on_stale_ids
+def log_completed_set(exercise: str, reps: int, load: float):
+    """Record an unplanned set for today"""
+    validate_set_values(reps, load)
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        log_id = get_today_log_id(conn)
+        exercise_id = _get_exercise_id(conn, exercise)
+        cur.execute(INSERT_EXTRA_COMPLETION_SQL, (log_id, exercise_id, reps, load, datetime.now(timezone.utc)))
+        conn.commit()
+    bump_data_version()
+    return "logged"
+
+
+def complete_planned_set(exercise: Optional[str] = None, reps: Optional[int] = None, load: Optional[float] = None) -> str:
+    """Complete the next planned set (optionally for one exercise) and start its rest timer"""
+    validate_overrides(reps, load)
+    with pooled_connection() as conn:
+        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        log_id = get_today_log_id(conn, create=False)
+        if log_id is None:
+            return "No planned sets remaining for today"
+        
+        # Take the next set in the queue (same order as UI), record it and remove it from the plan
+        execute_prepared(cur, "complete_next_set", complete_next_set_params(log_id, exercise, reps, load))
+        planned_set = cur.fetchone()
+        if not planned_set:
+            if exercise:
+                return f"No planned sets found for exercise: {exercise}"
+            else:
+                return "No planned sets remaining for today"
+        
+        conn.commit()
+    
+    actual_reps = planned_set['reps_done']
+    actual_load = planned_set['load_done']
+    return finish_completion(planned_set, actual_reps, actual_load, reps, load)
+
+
+def finish_completion(planned_set, actual_reps, actual_load, reps=None, load=None) -> str:
+    """Post-commit side effects of completing a set: cache bump, rest timer and reply text"""
+    bump_data_version()
+    
+    # Set timer for rest period if there's a rest time
+    rest_time = planned_set.get('rest', 60)  # Default to 60 seconds
+    if rest_time > 0:
+        try:
+            set_rest_timer(rest_time)
+            rest_info = f" Rest timer set for {rest_time} seconds."
+        except Exception as e:
+            rest_info = f" (Timer error: {e})"
+    else:
+        rest_info = ""
+    
+    # Return completion summary
+    result = f"Completed {planned_set['exercise']}: {actual_reps} reps @ {actual_load} load"
+    if reps is not None or load is not None:
+        result += f" (planned: {planned_set['reps']} reps @ {planned_set['load']} load)"
+    result += rest_info
+    return result
+
+
+def update_summary(text: str):
+    """Set today's workout summary"""
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        log_id = get_today_log_id(conn)
+        cur.execute(UPDATE_SUMMARY_SQL, (text, log_id))
+        conn.commit()
+    bump_data_version()
+    return "summary updated"
+
+
+@read_through("get_recent_history")
+def get_recent_history(days: int) -> List[Dict[str, Any]]:
+    """Planned and completed sets for the last `days` days"""
+    with pooled_connection() as conn:
+        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cur.execute(RECENT_HISTORY_SQL, recent_history_params(days))
+        rows = [dict(row) for row in cur.fetchall()]
+    return rows
+
+
+@retry_on_stale_ids
+def set_weekly_split_day(day: str, items: List[Dict[str, Any]]) -> str:
+    """Replace the split for one day of the week"""
+    from models import SplitItem
+
+    key = day.lower()
+    if key not in DAY_MAP:
+        raise ValueError("invalid day")
+    day_num = DAY_MAP[key]
+    # Validate everything before touching the database
+    split = [
+        SplitItem(
+            exercise=item["exercise"],
+            order=item.get("order", item.get("order_num", 1)),
+            reps=item["reps"],
+            load=item["load"],
+            rest=item.get("rest", 60),
+            relative=bool(item.get("relative", False)),
+        )
+        for item in items
+    ]
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM split_sets WHERE day_of_week = %s", (day_num,))
+        if split:
+            exercise_ids = _get_exercise_ids(conn, [row.exercise for row in split])
+            psycopg2.extras.execute_values(
+                cur,
+                "INSERT INTO split_sets (day_of_week, exercise_id, order_num, reps, load, rest, relative) VALUES %s",
+                [(day_num, exercise_ids[row.exercise], row.order, row.reps, row.load, row.rest, row.relative) for row in split],
+                page_size=len(split),
+            )
+        conn.commit()
+    bump_data_version()
+    return f"split updated for {key} with {len(items)} sets"
+
+
+@read_through("get_weekly_split")
+def get_weekly_split(day: Optional[str] = None) -> List[Dict[str, Any]]:
+    """The weekly split, for one day or all days"""
+    with pooled_connection() as conn:
+        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        if day is None:
+            cur.execute(WEEKLY_SPLIT_ALL_SQL)
+        else:
+            key = day.lower()
+            if key not in DAY_MAP:
+                raise ValueError("invalid day")
+            cur.execute(WEEKLY_SPLIT_DAY_SQL, (DAY_MAP[key],))
+        rows = [dict(row) for row in cur.fetchall()]
+    return rows
+
+
+
+def _log_id_for(conn, day: date) -> str:
+    """daily_logs id for any date, creating the row if needed"""
+    if day == current_log_date():
+        return get_today_log_id(conn)
+    cur = conn.cursor()
+    cur.execute(TODAY_LOG_UPSERT_SQL, (str(uuid.uuid4()), day))
+    return cur.fetchone()[0]
+
+
+def apply_weekly_split(log_date: Optional[str] = None) -> str:
+    """Fill a day's plan from the weekly split if it has no planned sets yet"""
+    day = date.fromisoformat(log_date) if log_date else current_log_date()
+    day_of_week = (day.weekday() + 1) % 7  # Sunday = 0, as in DAY_MAP
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        log_id = _log_id_for(conn, day)
+        # Lock the day so concurrent appliers (Python or Node) cannot both fill it
+        cur.execute("SELECT 1 FROM daily_logs WHERE id = %s FOR UPDATE", (log_id,))
+        cur.execute("SELECT COUNT(*) FROM planned_sets WHERE log_id = %s", (log_id,))
+        existing = cur.fetchone()[0]
+        if existing:
+            conn.commit()
+            return f"{day.isoformat()} already has {existing} planned sets"
+        cur.execute(APPLY_SPLIT_SQL, (log_id, day_of_week))
+        added = cur.rowcount
+        conn.commit()
+    bump_data_version()
+    if not added:
+        return f"no {DAY_NAMES[day_of_week]} split sets to apply"
+    return f"planned {added} sets for {day.isoformat()} from the {DAY_NAMES[day_of_week]} split"
+
+# run_sql bounds: per-statement timeout, rows/bytes returned to the model
+RUN_SQL_TIMEOUT_MS = int(os.environ.get("RUN_SQL_TIMEOUT_MS", "5000"))
+RUN_SQL_MAX_ROWS = int(os.environ.get("RUN_SQL_MAX_ROWS", "200"))
+RUN_SQL_MAX_BYTES = int(os.environ.get("RUN_SQL_MAX_BYTES", "32000"))
+RUN_SQL_FETCH_SIZE = 100
+RUN_SQL_SUMMARY_ROWS = 10
+
+
+def _row_bytes(row: Dict[str, Any]) -> int:
+    return len(json.dumps(row, default=str))
+
+
+def _fetch_bounded(cur, summary: bool):
+    """Stream rows from a named cursor, keeping at most RUN_SQL_MAX_ROWS/BYTES"""
+    keep_rows = RUN_SQL_SUMMARY_ROWS if summary else RUN_SQL_MAX_ROWS
+    rows: List[Dict[str, Any]] = []
+    size = 0
+    truncated = False
+    while not truncated:
+        batch = cur.fetchmany(RUN_SQL_FETCH_SIZE)
+        if not batch:
+            break
+        for row in batch:
+            row = dict(row)
+            size += _row_bytes(row)
+            if len(rows) >= keep_rows or size > RUN_SQL_MAX_BYTES:
+                truncated = True
+                break
+            rows.append(row)
+    columns = [col.name for col in cur.description] if cur.description else []
+    return rows, columns, truncated
+
+
+def execute_sql(query: str, params: Optional[Dict[str, Any]] = None, confirm: bool = False, summary: bool = False):
+    """Run free-form SQL for run_sql/arbitrary_update under a timeout and result caps"""
+    if params is None:
+        params = {}
+    lowered = query.strip().lower()
+    is_select = lowered.startswith("select")
+    if not is_select and not confirm:
+        raise ValueError("updates require confirm=True")
+    try:
+        with pooled_connection() as conn:
+            cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            # Applies to this transaction only; the pooled connection is unaffected afterwards
+            cur.execute("SELECT set_config('statement_timeout', %s, true)", (str(RUN_SQL_TIMEOUT_MS),))
+
+            row_count = None
+            if is_select and summary:
+                # Counted by the server under the same timeout, not by reading every row
+                count_query = f"SELECT count(*) AS row_count FROM ({query.strip().rstrip(';')}) q"
+                cur.execute(count_query, params or None)
+                row_count = cur.fetchone()["row_count"]
+
+            if is_select:
+                # Server-side cursor: rows are streamed, never fetched all at once
+                cur = conn.cursor(name="run_sql", cursor_factory=psycopg2.extras.RealDictCursor)
+                cur.itersize = RUN_SQL_FETCH_SIZE
+
+            # Convert params dict to list if needed for PostgreSQL
+            if params:
+                # PostgreSQL uses %(name)s format for named parameters
+                cur.execute(query, params)
+            else:
+                cur.execute(query)
+
+            if is_select:
+                rows, columns, truncated = _fetch_bounded(cur, summary)
+                cur.close()
+                if summary:
+                    return {"row_count": row_count, "columns": columns, "first_rows": rows}
+                if truncated:
+                    rows.append({
+                        "truncated": True,
+                        "message": (
+                            f"Result truncated after {len(rows)} rows "
+                            f"(limits: {RUN_SQL_MAX_ROWS} rows, {RUN_SQL_MAX_BYTES} bytes). "
+                            "Add WHERE/LIMIT or aggregate, or use summary=True for a row count."
+                        ),
+                    })
+                return rows
+
+            conn.commit()
+            rows = {"rows_affected": cur.rowcount}
+            bump_data_version()
+            if re.search(r"\bexercises\b", lowered):
+                # Renamed or deleted exercises would leave stale cached ids
+                invalidate_exercise_cache()
+            if re.search(r"\bdaily_logs\b", lowered):
+                invalidate_today_log_cache()
+        return rows
+    except psycopg2.errors.QueryCanceled:
+        return {"error": f"Query cancelled: exceeded the {RUN_SQL_TIMEOUT_MS} ms statement timeout. Narrow it with WHERE/LIMIT."}
+
+
+def set_timer(minutes: int, name: str = DEFAULT_TIMER, interval_seconds: Optional[int] = None):
+    """Start (or replace) a named timer"""
+    if not (1 <= minutes <= 180):  # Max 3 hours
+        raise ValueError("Timer duration must be between 1 and 180 minutes")
+    
+    try:
+        timer_engine.set(name, minutes * 60, interval_seconds)
+        return f"Timer set for {minutes} minutes"
+    except Exception as e:
+        return f"Timer error: {e}"
+
+
+def get_timer(name: Optional[str] = None) -> Dict[str, Any]:
+    """Status of a named timer (the rest timer by default)"""
+    return timer_engine.status(name or DEFAULT_TIMER)